@@ -1,5 +1,22 @@
 # Agent package
-from .agent import BusBookingAgent, get_agent
-from .tools import booking_tools
+# The LangChain/LangGraph stack is slow to import, so nothing is imported
+# here eagerly: importing app.agent.providers (e.g. for transcription) must
+# not pull in langgraph. The names below load their module on first access.
+import importlib
+
+_LAZY = {
+    "BusBookingAgent": ".agent",
+    "get_agent": ".agent",
+    "booking_tools": ".tools",
+}
 
 __all__ = ["BusBookingAgent", "get_agent", "booking_tools"]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,15 +1,15 @@
 """
 LangChain agent for bus booking.
-Uses Groq LLM with tools for conversational booking.
+Uses the configured model provider (Groq by default) with tools for conversational booking.
 """
 
-import os
+import threading
 from typing import List, Optional
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
 
 from .tools import booking_tools
+from .providers import ModelProvider, get_provider
 
 # System prompt for the bus booking agent
 SYSTEM_PROMPT = """
@@ -72,7 +72,7 @@ b. Ask for seat preferences if not specified
 c. Collect passenger details: name, age, gender for each seat
 d. Check wallet balance with `check_wallet_balance(user_id)`
 e. Confirm booking details before proceeding
-f. Use `book_seats(...)` to complete the booking
+f. Use `book_seats(...)` to complete the booking, passing a new `idempotency_key` such as "bk-<schedule_id>-<seat_ids>-<4 random letters>"; if you have to retry that same booking, reuse the same key so it is not booked twice
 g. Provide booking confirmation with booking code
 
 #### 5. **💰 WALLET:**
@@ -113,32 +113,20 @@ You: "🚌 బెంగళూరు నుండి చెన్నైకి అ
 """
 
 
-# Initialize LLM and agent at module level
-groq_api_key = os.getenv("GROQ_API_KEY")
-agent = None
-
-if groq_api_key:
-    llm = ChatGroq(
-        temperature=0.3,
-        model="openai/gpt-oss-120b",
-        api_key=groq_api_key
-    )
-    
-    # Create the agent using langgraph
-    agent = create_react_agent(
-        model=llm,
-        tools=booking_tools,
-        state_modifier=SYSTEM_PROMPT
-    )
-
-
 class BusBookingAgent:
-    """Bus booking agent using LangChain and Groq."""
+    """Bus booking agent using LangChain and a pluggable model provider."""
     
-    def __init__(self):
-        if agent is None:
+    def __init__(self, provider: Optional[ModelProvider] = None):
+        self.provider = provider or get_provider()
+        if not self.provider.is_configured():
             raise ValueError("GROQ_API_KEY environment variable not set")
-        self.agent = agent
+        
+        # Create the agent using langgraph
+        self.agent = create_react_agent(
+            model=self.provider.chat_model(),
+            tools=booking_tools,
+            state_modifier=SYSTEM_PROMPT
+        )
     
     def chat(
         self,
@@ -186,11 +174,23 @@ class BusBookingAgent:
 
 
 _agent_instance: Optional[BusBookingAgent] = None
+_agent_lock = threading.Lock()
 
 
 def get_agent() -> BusBookingAgent:
     """Get or create the agent instance."""
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = BusBookingAgent()
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = BusBookingAgent()
     return _agent_instance
+
+
+def warm_agent():
+    """Build the agent ahead of the first chat request; failures are left for that request to report."""
+    try:
+        get_agent()
+        print("✅ Booking agent ready")
+    except Exception as e:
+        print(f"⚠️ Booking agent warm-up skipped: {e}")
@@ -0,0 +1,76 @@
+"""
+Scripted tool-calling chat model used by the fake provider.
+Replays a fixed sequence of tool calls so the LangGraph agent, the tools and
+the database are exercised exactly as with the live model, minus the network.
+"""
+
+import re
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+USER_ID_PATTERN = re.compile(r"\[User ID: (\d+)\]")
+
+# Tool calls issued for every user turn, in order. "{user_id}" is filled in
+# from the "[User ID: X]" prefix the agent adds to each message.
+DEFAULT_SCRIPT = [
+    {"name": "get_popular_cities", "args": {}},
+    {"name": "check_wallet_balance", "args": {"user_id": "{user_id}"}},
+]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Fake chat model that issues scripted tool calls, then answers."""
+
+    latency: float = 0.0
+    script: List[dict] = Field(default_factory=lambda: list(DEFAULT_SCRIPT))
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        # The script names tools directly, so the schemas are not needed
+        return self
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+
+        # Find the current turn: everything after the last human message
+        turn_start = 0
+        for i, message in enumerate(messages):
+            if isinstance(message, HumanMessage):
+                turn_start = i
+        turn = messages[turn_start:]
+        tool_results = [m for m in turn if isinstance(m, ToolMessage)]
+
+        step = len(tool_results)
+        if step < len(self.script):
+            match = USER_ID_PATTERN.search(str(turn[0].content)) if turn else None
+            user_id = int(match.group(1)) if match else 0
+            call = self.script[step]
+            args = {
+                key: (user_id if value == "{user_id}" else value)
+                for key, value in call["args"].items()
+            }
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": call["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}]
+            )
+        else:
+            last_result = str(tool_results[-1].content) if tool_results else ""
+            message = AIMessage(content=f"🚌 Here is what I found: {last_result[:200]}")
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
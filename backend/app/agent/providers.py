@@ -0,0 +1,215 @@
+"""
+Model providers for the bus booking agent and voice transcription.
+Groq is used in production; the fake provider runs fully offline so the
+agent and transcription endpoints can be load tested without the live API.
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Optional, Union
+
+from ..config import get_settings
+
+GROQ_TRANSCRIPTION_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+GROQ_MODELS_URL = "https://api.groq.com/openai/v1/models"
+GROQ_CHAT_MODEL = "openai/gpt-oss-120b"
+GROQ_WHISPER_MODEL = "whisper-large-v3"
+
+# Audio can be passed as bytes, streamed once as chunks, or as a callable
+# returning a fresh chunk stream each time (replayable, so it can be retried)
+AudioContent = Union[bytes, AsyncIterator[bytes], Callable[[], AsyncIterator[bytes]]]
+
+
+class ProviderError(Exception):
+    """Raised when the upstream model provider fails."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ProviderNotConfigured(ProviderError):
+    """Raised when the provider is missing credentials."""
+
+
+class ProviderTimeout(ProviderError):
+    """Raised when the provider does not answer in time."""
+
+
+class ModelProvider:
+    """Base class for LLM + speech-to-text providers."""
+
+    name = "base"
+
+    def is_configured(self) -> bool:
+        """Whether the provider can serve requests."""
+        return True
+
+    def chat_model(self):
+        """Return a LangChain chat model supporting tool calling."""
+        raise NotImplementedError
+
+    async def transcribe(self, filename: str, content: AudioContent, content_type: str) -> dict:
+        """Transcribe audio and return {"text": ..., "language": ...}."""
+        raise NotImplementedError
+
+    async def check(self) -> dict:
+        """Reachability for health probes: {"status": "ok" | "down", ...}."""
+        return {"status": "ok"}
+
+
+class GroqProvider(ModelProvider):
+    """Live Groq API (chat completions + Whisper)."""
+
+    name = "groq"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def chat_model(self):
+        if not self.api_key:
+            raise ProviderNotConfigured("GROQ_API_KEY environment variable not set")
+
+        from langchain_groq import ChatGroq
+        from ..utils.http_client import get_http_client
+
+        return ChatGroq(
+            temperature=0.3,
+            model=GROQ_CHAT_MODEL,
+            api_key=self.api_key,
+            http_client=get_http_client().sync_client
+        )
+
+    async def transcribe(self, filename: str, content: AudioContent, content_type: str) -> dict:
+        if not self.api_key:
+            raise ProviderNotConfigured("Transcription service not configured. GROQ_API_KEY not set.")
+
+        import httpx
+        from ..utils.audio import multipart_stream, new_boundary
+        from ..utils.http_client import get_http_client
+
+        fields = {"model": GROQ_WHISPER_MODEL, "response_format": "json"}
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        try:
+            if isinstance(content, bytes):
+                response = await get_http_client().request(
+                    "POST",
+                    GROQ_TRANSCRIPTION_URL,
+                    name="groq.transcribe",
+                    headers=headers,
+                    files={
+                        "file": (filename, content, content_type),
+                    },
+                    data=fields,
+                    timeout=60.0
+                )
+            else:
+                # Stream the chunks straight through as a multipart body. A
+                # replayable source is re-read for each retry; a one-shot
+                # stream cannot be replayed, so it is sent once
+                boundary = new_boundary()
+                replayable = callable(content)
+
+                def body():
+                    chunks = content() if replayable else content
+                    return multipart_stream(fields, "file", filename, content_type, chunks, boundary)
+
+                response = await get_http_client().request(
+                    "POST",
+                    GROQ_TRANSCRIPTION_URL,
+                    name="groq.transcribe",
+                    retry=replayable,
+                    content_factory=body,
+                    headers={
+                        **headers,
+                        "Content-Type": f"multipart/form-data; boundary={boundary}",
+                    },
+                    timeout=60.0
+                )
+        except httpx.TimeoutException:
+            raise ProviderTimeout("Transcription timed out. Please try again.")
+
+        if response.status_code != 200:
+            raise ProviderError(f"Transcription failed: {response.text}", response.status_code)
+
+        result = response.json()
+        return {"text": result.get("text", ""), "language": result.get("language")}
+
+    async def check(self) -> dict:
+        if not self.api_key:
+            return {"status": "down", "detail": "GROQ_API_KEY not set"}
+
+        import httpx
+        from ..utils.http_client import get_http_client
+
+        try:
+            response = await get_http_client().request(
+                "GET",
+                GROQ_MODELS_URL,
+                name="groq.health",
+                retry=False,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=get_settings().health_check_timeout_seconds
+            )
+        except httpx.HTTPError as e:
+            return {"status": "down", "detail": f"{type(e).__name__}: {e}"}
+        await response.aclose()
+        if response.status_code != 200:
+            return {"status": "down", "detail": f"HTTP {response.status_code}"}
+        return {"status": "ok"}
+
+
+class FakeProvider(ModelProvider):
+    """
+    Offline provider for benchmarks.
+    Uses a scripted tool-calling chat model and returns a canned transcription,
+    each with a configurable artificial latency.
+    """
+
+    name = "fake"
+
+    CANNED_TRANSCRIPTION = "Find buses from Bengaluru to Chennai tomorrow"
+
+    def __init__(self, llm_latency_ms: int = 0, transcription_latency_ms: int = 0):
+        self.llm_latency = llm_latency_ms / 1000
+        self.transcription_latency = transcription_latency_ms / 1000
+
+    def chat_model(self):
+        from .fake_llm import ScriptedChatModel
+
+        return ScriptedChatModel(latency=self.llm_latency)
+
+    async def transcribe(self, filename: str, content: AudioContent, content_type: str) -> dict:
+        # Drain streamed uploads like a real upstream would
+        if callable(content):
+            content = content()
+        if not isinstance(content, bytes):
+            async for _ in content:
+                pass
+        if self.transcription_latency:
+            await asyncio.sleep(self.transcription_latency)
+        return {"text": self.CANNED_TRANSCRIPTION, "language": "en"}
+
+    async def check(self) -> dict:
+        return {"status": "ok", "detail": "local fake provider"}
+
+
+@lru_cache()
+def get_provider() -> ModelProvider:
+    """Get the configured model provider (MODEL_PROVIDER=groq|fake)."""
+    settings = get_settings()
+
+    if settings.model_provider == "fake":
+        return FakeProvider(
+            llm_latency_ms=settings.fake_llm_latency_ms,
+            transcription_latency_ms=settings.fake_transcription_latency_ms
+        )
+
+    if settings.model_provider != "groq":
+        raise ValueError(f"Unknown model provider '{settings.model_provider}'")
+
+    return GroqProvider(api_key=settings.groq_api_key)
@@ -5,13 +5,17 @@ LangChain tools for the bus booking AI agent.
 from langchain_core.tools import tool
 from sqlalchemy.orm import Session, joinedload
 from datetime import date, datetime
+from typing import Optional
 import json
 
 from ..database import SessionLocal
 from ..models.bus import City, Route, Bus, BusSchedule, Seat, BoardingPoint, DroppingPoint
 from ..models.booking import Booking, BookingPassenger
-from ..models.wallet import Wallet, Transaction
+from ..models.wallet import Wallet
 from ..models.user import User
+from ..services import idempotency, ledger
+from ..services.ledger import InsufficientBalance, to_paise
+from ..services.inventory import adjust_available, take_seats
 
 
 def get_db_session():
@@ -279,7 +283,8 @@ def book_seats(
     seat_ids_json: str,
     passenger_names_json: str,
     passenger_ages_json: str,
-    passenger_genders_json: str
+    passenger_genders_json: str,
+    idempotency_key: Optional[str] = None
 ) -> str:
     """
     Book seats on a bus and pay from wallet.
@@ -291,10 +296,21 @@ def book_seats(
         passenger_names_json: JSON string of passenger names, e.g. '["John", "Jane"]'
         passenger_ages_json: JSON string of passenger ages, e.g. "[25, 30]"
         passenger_genders_json: JSON string of genders, e.g. '["male", "female"]'
+        idempotency_key: Optional unique string for this booking attempt; reuse it
+            when retrying so the same booking is returned instead of a new one
     
     Returns:
         Booking confirmation with booking code or error message
     """
+    try:
+        claim = idempotency.claim(user_id, idempotency_key, "agent.book_seats", [
+            schedule_id, seat_ids_json, passenger_names_json, passenger_ages_json, passenger_genders_json
+        ])
+    except (idempotency.IdempotencyKeyReused, idempotency.IdempotencyInProgress) as e:
+        return f"Error: {str(e)}"
+    if claim.is_replay:
+        return claim.replay_body
+    
     db = get_db_session()
     try:
         # Parse JSON inputs
@@ -320,7 +336,7 @@ def book_seats(
         
         # Get seats and check availability
         seats_to_book = []
-        total_amount = 0
+        total_paise = 0
         for seat_id in seat_ids:
             seat = db.query(Seat).filter(
                 Seat.id == seat_id,
@@ -333,28 +349,21 @@ def book_seats(
                 return f"Error: Seat {seat.seat_number} is no longer available"
             
             seats_to_book.append(seat)
-            total_amount += seat.price
+            total_paise += to_paise(seat.price)
+        total_amount = total_paise / 100
         
-        # Check wallet balance
+        # Check wallet exists
         wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
         
         if not wallet:
             return "Error: Wallet not found. Please add money to wallet first."
         
-        if wallet.balance < total_amount:
-            return f"Error: Insufficient wallet balance. Required: ₹{total_amount:.2f}, Available: ₹{wallet.balance:.2f}"
-        
-        # Deduct from wallet
-        wallet.balance -= total_amount
-        
-        # Create wallet transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type="debit",
-            amount=total_amount,
-            description=f"Bus booking: {schedule.route.from_city.name} to {schedule.route.to_city.name}"
-        )
-        db.add(transaction)
+        # Take the seats only if they are still free; a concurrent booking of the same seat loses here
+        taken = take_seats(db, schedule_id, [seat.id for seat in seats_to_book])
+        if len(taken) != len(seats_to_book):
+            db.rollback()
+            lost = [seat.seat_number for seat in seats_to_book if seat.id not in taken]
+            return f"Error: Seat {', '.join(lost)} is no longer available"
         
         # Generate booking code
         import random
@@ -374,7 +383,21 @@ def book_seats(
         db.add(booking)
         db.flush()
         
-        # Create passengers and mark seats as booked
+        # Deduct from wallet atomically; fails if the balance is too low
+        try:
+            ledger.debit(
+                db,
+                wallet.id,
+                total_paise,
+                f"Bus booking: {schedule.route.from_city.name} to {schedule.route.to_city.name}",
+                reference_id=booking.id
+            )
+        except InsufficientBalance:
+            db.rollback()
+            available = db.query(Wallet.balance_paise).filter(Wallet.user_id == user_id).scalar() or 0
+            return f"Error: Insufficient wallet balance. Required: ₹{total_amount:.2f}, Available: ₹{available / 100:.2f}"
+        
+        # Create passengers (their seats were taken above)
         passenger_details = []
         for i, seat in enumerate(seats_to_book):
             passenger = BookingPassenger(
@@ -385,7 +408,6 @@ def book_seats(
                 passenger_gender=passenger_genders[i] if i < len(passenger_genders) else "male"
             )
             db.add(passenger)
-            seat.is_available = False
             
             passenger_details.append({
                 "name": passenger_names[i],
@@ -393,11 +415,9 @@ def book_seats(
                 "age": passenger_ages[i]
             })
         
-        schedule.available_seats -= len(seats_to_book)
-        
-        db.commit()
+        adjust_available(db, schedule.id, taken=[seat.id for seat in seats_to_book])
         
-        return json.dumps({
+        result = json.dumps({
             "success": True,
             "booking_code": booking_code,
             "message": f"🎉 Booking confirmed! Your booking code is {booking_code}",
@@ -411,11 +431,19 @@ def book_seats(
             }
         }, indent=2)
         
+        # Stored with the booking so a retried call returns this confirmation
+        claim.complete(db, result)
+        db.commit()
+        
+        return result
+        
     except Exception as e:
         db.rollback()
         return f"Error during booking: {str(e)}"
     finally:
         db.close()
+        # Error replies are not stored; the key can be retried
+        claim.release()
 
 
 @tool
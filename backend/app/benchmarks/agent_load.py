@@ -0,0 +1,143 @@
+"""
+Offline end-to-end load test for the AI agent and transcription endpoints.
+Uses the fake model provider and a local SQLite database, so it measures our
+own overhead (routing, auth, chat persistence, tools, DB) without Groq.
+
+Run with: python -m app.benchmarks.agent_load --users 10 --turns 5
+"""
+
+import os
+
+# Must be set before any app module reads settings or creates the engine
+os.environ.setdefault("MODEL_PROVIDER", "fake")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_agent.db")
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+import uuid
+
+import httpx
+
+from ..database import SessionLocal, init_db
+from ..main import app
+from ..models.user import User
+from ..models.wallet import Wallet
+from ..utils.security import create_access_token, get_password_hash
+
+
+def create_bench_users(count: int) -> list:
+    """Create throwaway users with wallets and return their access tokens."""
+    db = SessionLocal()
+    try:
+        tokens = []
+        password_hash = get_password_hash("benchmark")
+        for _ in range(count):
+            tag = uuid.uuid4().hex[:10]
+            user = User(
+                email=f"bench-{tag}@example.com",
+                phone=tag,
+                password_hash=password_hash,
+                full_name="Benchmark User"
+            )
+            db.add(user)
+            db.flush()
+            db.add(Wallet(user_id=user.id, balance_paise=100000))
+            tokens.append(create_access_token(data={"sub": str(user.id)}))
+        db.commit()
+        return tokens
+    finally:
+        db.close()
+
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([0-9.]+);desc="(\d+) statements, (\d+) commits"')
+
+
+def summarize(name: str, latencies: list, wall_time: float):
+    """Print latency percentiles and throughput for one scenario."""
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(f"\n📊 {name}")
+    print(f"   requests:   {len(latencies)}")
+    print(f"   throughput: {len(latencies) / wall_time:.1f} req/s")
+    print(f"   p50:        {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"   p95:        {p95 * 1000:.1f} ms")
+    print(f"   max:        {latencies[-1] * 1000:.1f} ms")
+
+
+async def run_user_chat(client: httpx.AsyncClient, token: str, turns: int, latencies: list, db_times: list):
+    """Run a multi-turn chat conversation for one user."""
+    headers = {"Authorization": f"Bearer {token}"}
+    session_id = None
+    for turn in range(turns):
+        start = time.perf_counter()
+        response = await client.post(
+            "/agent/chat",
+            json={"message": f"Show me popular cities (turn {turn})", "session_id": session_id},
+            headers=headers
+        )
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+        match = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+        if match:
+            db_times.append(tuple(float(g) for g in match.groups()))
+
+
+async def run_user_transcriptions(client: httpx.AsyncClient, token: str, count: int, audio: bytes, latencies: list):
+    """Upload the same voice note several times for one user."""
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.post(
+            "/agent/transcribe-upload",
+            files={"file": ("note.m4a", audio, "audio/m4a")},
+            headers=headers
+        )
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def main(users: int, turns: int, transcriptions: int, audio_kb: int):
+    init_db()
+    tokens = create_bench_users(users)
+    audio = os.urandom(audio_kb * 1024)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+        chat_latencies = []
+        db_times = []
+        start = time.perf_counter()
+        await asyncio.gather(*(run_user_chat(client, t, turns, chat_latencies, db_times) for t in tokens))
+        summarize(f"/agent/chat ({users} users x {turns} turns)", chat_latencies, time.perf_counter() - start)
+        if db_times:
+            print(
+                f"   chat db:    {statistics.mean(t[0] for t in db_times):.1f} ms, "
+                f"{statistics.mean(t[1] for t in db_times):.1f} statements, "
+                f"{statistics.mean(t[2] for t in db_times):.1f} commits per turn (Server-Timing)"
+            )
+
+        if transcriptions:
+            transcribe_latencies = []
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                run_user_transcriptions(client, t, transcriptions, audio, transcribe_latencies)
+                for t in tokens
+            ))
+            summarize(
+                f"/agent/transcribe-upload ({users} users x {transcriptions} uploads, {audio_kb} KB)",
+                transcribe_latencies,
+                time.perf_counter() - start
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline agent load test")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent users")
+    parser.add_argument("--turns", type=int, default=5, help="Chat turns per user")
+    parser.add_argument("--transcriptions", type=int, default=5, help="Voice notes per user")
+    parser.add_argument("--audio-kb", type=int, default=256, help="Size of each voice note")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.turns, args.transcriptions, args.audio_kb))
@@ -0,0 +1,226 @@
+"""
+Analytics rollup benchmark.
+Seeds a synthetic network (routes, buses, departures, seats, bookings and
+passengers; a few million rows at the default scale), then times:
+  - computing load factor per route straight from the raw tables
+  - a full ScheduleStats rebuild, and reports served from it
+  - an incremental refresh after a burst of new and cancelled bookings,
+    checked against a full rebuild
+
+Run with: python -m app.benchmarks.analytics_rollup --schedules 20000 --bookings 1000000
+(use an empty database: rows are seeded with explicit ids. Defaults to a
+local SQLite file; set DATABASE_URL to run against PostgreSQL)
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_analytics.db")
+
+import argparse
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+from sqlalchemy import insert, update
+
+from ..database import SessionLocal, init_db, engine
+from ..models.user import User
+from ..models.bus import Operator, City, Route, Bus, BusSchedule, Seat
+from ..models.booking import Booking, BookingPassenger
+from ..services.analytics import refresh_rollups, summarize, _rollup_query
+
+SEATS_PER_BUS = 40
+BATCH = 10000
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<42} {elapsed * 1000:>10.1f} ms")
+    return result
+
+
+def insert_batches(conn, model, rows):
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            conn.execute(insert(model), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(model), batch)
+        count += len(batch)
+    return count
+
+
+def seed(schedules: int, bookings: int, seed_value: int = 7) -> dict:
+    rng = random.Random(seed_value)
+    past = datetime.now(timezone.utc) - timedelta(days=120)
+    today = date.today()
+    n_cities, n_operators, n_routes, n_buses = 60, 25, 400, 800
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "id": 1, "email": "analytics@example.com", "phone": "analytics",
+            "password_hash": "x", "full_name": "Analytics Bench",
+        }])
+        conn.execute(insert(City), [
+            {"id": i, "name": f"City {i}", "state": "KA", "code": f"C{i}"} for i in range(1, n_cities + 1)
+        ])
+        conn.execute(insert(Operator), [
+            {"id": i, "name": f"Operator {i}", "code": f"OP{i}"} for i in range(1, n_operators + 1)
+        ])
+        routes = []
+        for i in range(1, n_routes + 1):
+            origin, destination = rng.sample(range(1, n_cities + 1), 2)
+            routes.append({
+                "id": i, "from_city_id": origin, "to_city_id": destination,
+                "distance_km": rng.randint(80, 900), "duration_minutes": rng.randint(90, 900),
+            })
+        conn.execute(insert(Route), routes)
+        conn.execute(insert(Bus), [
+            {
+                "id": i, "operator_id": rng.randint(1, n_operators), "bus_number": f"KA{i:05d}",
+                "bus_type": "AC Sleeper", "total_seats": SEATS_PER_BUS, "seat_layout": "2+1", "amenities": [],
+            }
+            for i in range(1, n_buses + 1)
+        ])
+
+        insert_batches(conn, BusSchedule, (
+            {
+                "id": i, "bus_id": rng.randint(1, n_buses), "route_id": rng.randint(1, n_routes),
+                "travel_date": today - timedelta(days=rng.randint(0, 90)),
+                "departure_time": dtime(21, 0), "arrival_time": dtime(6, 0),
+                "base_price": 800.0, "available_seats": SEATS_PER_BUS, "status": "scheduled",
+                "created_at": past,
+            }
+            for i in range(1, schedules + 1)
+        ))
+        seat_rows = insert_batches(conn, Seat, (
+            {
+                "id": (s - 1) * SEATS_PER_BUS + k, "bus_schedule_id": s, "seat_number": f"S{k}",
+                "seat_type": "sleeper", "deck": "lower", "row_number": k, "column_number": 1,
+                "price": 800.0, "is_available": True,
+            }
+            for s in range(1, schedules + 1) for k in range(1, SEATS_PER_BUS + 1)
+        ))
+
+        # Bookings take seats from their departure in order
+        next_seat = {}
+        booking_rows, passenger_rows = [], []
+        passenger_id = 0
+        for b in range(1, bookings + 1):
+            schedule_id = rng.randint(1, schedules)
+            taken = next_seat.get(schedule_id, 0)
+            party = min(rng.choice((1, 1, 1, 2, 2, 3)), SEATS_PER_BUS - taken)
+            if party <= 0:
+                party = 1
+                taken = 0  # Oversold departures just reuse seats; fine for timing
+            cancelled = rng.random() < 0.08
+            booked_at = past + timedelta(minutes=rng.randint(0, 60 * 24 * 100))
+            booking_rows.append({
+                "id": b, "booking_code": f"B{b:09d}", "user_id": 1, "bus_schedule_id": schedule_id,
+                "total_amount": 800.0 * party, "status": "cancelled" if cancelled else "confirmed",
+                "payment_method": "wallet", "booking_source": "app", "booked_at": booked_at,
+                "cancelled_at": booked_at + timedelta(hours=2) if cancelled else None,
+            })
+            for k in range(party):
+                passenger_id += 1
+                passenger_rows.append({
+                    "id": passenger_id, "booking_id": b,
+                    "seat_id": (schedule_id - 1) * SEATS_PER_BUS + taken + k + 1,
+                    "passenger_name": "Bench", "passenger_age": 30, "passenger_gender": "male",
+                })
+            next_seat[schedule_id] = taken + party
+            if len(booking_rows) >= BATCH:
+                conn.execute(insert(Booking), booking_rows)
+                conn.execute(insert(BookingPassenger), passenger_rows)
+                booking_rows, passenger_rows = [], []
+        if booking_rows:
+            conn.execute(insert(Booking), booking_rows)
+            conn.execute(insert(BookingPassenger), passenger_rows)
+
+    return {
+        "schedules": schedules,
+        "seats": seat_rows,
+        "bookings": bookings,
+        "passengers": passenger_id,
+    }
+
+
+def raw_load_factor(db):
+    """The per-route report computed straight from the raw tables."""
+    rows = db.execute(_rollup_query()).all()
+    totals = {}
+    for row in rows:
+        offered, sold = totals.get(row[2], (0, 0))
+        totals[row[2]] = (offered + row[6], sold + row[7])
+    return totals
+
+
+def touch_bookings(count: int, schedules: int, start_id: int):
+    """New bookings plus cancellations, as the app would write them."""
+    rng = random.Random(99)
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        db.execute(insert(Booking), [
+            {
+                "id": start_id + i, "booking_code": f"N{start_id + i:09d}", "user_id": 1,
+                "bus_schedule_id": rng.randint(1, schedules), "total_amount": 800.0, "status": "confirmed",
+                "payment_method": "wallet", "booking_source": "app", "booked_at": now,
+            }
+            for i in range(count)
+        ])
+        cancel_ids = rng.sample(range(1, start_id), count)
+        db.execute(
+            update(Booking).where(Booking.id.in_(cancel_ids), Booking.status != "cancelled")
+            .values(status="cancelled", cancelled_at=now)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analytics rollups")
+    parser.add_argument("--schedules", type=int, default=20000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--touch", type=int, default=1000, help="Bookings created and cancelled before the incremental refresh")
+    args = parser.parse_args()
+
+    init_db()
+    print("🌱 Seeding...")
+    start = time.perf_counter()
+    counts = seed(args.schedules, args.bookings)
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"   {total} rows ({', '.join(f'{v} {k}' for k, v in counts.items())}) in {elapsed:.1f}s")
+
+    today = date.today()
+    window = (today - timedelta(days=90), today)
+    db = SessionLocal()
+    try:
+        print("\n📊 Timings")
+        timed("raw tables: load factor per route", lambda: raw_load_factor(db))
+        timed("full rollup rebuild", lambda: refresh_rollups(db, full=True))
+        for group_by in ("route", "operator", "day"):
+            timed(f"report from rollup by {group_by}", lambda: summarize(db, group_by, *window))
+
+        touch_bookings(args.touch, args.schedules, args.bookings + 1)
+        refresh = timed(f"incremental refresh ({args.touch} new + cancelled)", lambda: refresh_rollups(db))
+        print(f"   rebuilt {refresh.schedules} departures")
+
+        incremental = summarize(db, "route", *window)
+        refresh_rollups(db, full=True)
+        full = summarize(db, "route", *window)
+        print("✅ Incremental rollup matches full rebuild" if incremental == full else "❌ Incremental rollup drifted")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold-start import profile.
+Imports each target module in a fresh interpreter under `python -X importtime`
+(median of several runs), reports the total and the slowest packages and
+app modules it pulls in (cumulative, so nested entries overlap), and checks that the serving path (app.main, and the
+provider module the transcription endpoints use) does not import the
+LangChain/LangGraph agent stack. Exits non-zero when a check or the
+--budget-ms limit fails, so it can gate startup regressions in CI.
+
+Run with: python -m app.benchmarks.import_time --runs 5 --budget-ms 2500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# (module, may it import the agent stack?)
+TARGETS = [
+    ("app.main", False),
+    ("app.agent.providers", False),
+    ("app.agent.agent", True),
+]
+
+AGENT_STACK = ("langchain", "langchain_core", "langchain_groq", "langgraph", "groq")
+
+
+def profile(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """(cumulative ms, ms per top-level package, modules imported) for one fresh import."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    total = 0.0
+    packages: Dict[str, float] = {}
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        ms = int(cumulative) / 1000
+        imported.append(name)
+        # Third-party packages by top-level name, app modules one level down
+        parts = name.split(".")
+        package = ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+        if package != "app" and name != module:
+            packages[package] = max(packages.get(package, 0.0), ms)
+        if name == module:
+            total = ms
+    return total, packages, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold-start imports")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Slowest packages to list per module")
+    parser.add_argument("--budget-ms", type=float, default=0, help="Fail if app.main takes longer (0 = no limit)")
+    args = parser.parse_args()
+
+    failures = []
+    for module, agent_allowed in TARGETS:
+        runs = [profile(module) for _ in range(args.runs)]
+        total = statistics.median(run[0] for run in runs)
+        _, packages, imported = runs[-1]
+        agent_modules = sorted({name.split(".")[0] for name in imported if name.split(".")[0] in AGENT_STACK})
+
+        print(f"\n📦 {module}: {total:.0f} ms (median of {args.runs})")
+        for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"   {name:<28} {ms:>8.1f} ms")
+        if agent_modules and not agent_allowed:
+            failures.append(f"{module} imports the agent stack ({', '.join(agent_modules)})")
+        if module == "app.main" and args.budget_ms and total > args.budget_ms:
+            failures.append(f"app.main took {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Serving path is free of the agent stack")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Journey planner benchmark.
+Seeds the 25-city network from seed_data (operators, cities, routes, buses)
+with 20 departures per route per day for the planner window, then times a
+full timetable build, an incremental refresh after some departures change,
+and journey queries for every city pair at each transfer limit.
+
+Run with: python -m app.benchmarks.journey_planner --days 14 --changed 200
+(use an empty database. Defaults to a local SQLite file; set DATABASE_URL
+to run against PostgreSQL)
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_journeys.db")
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from ..database import SessionLocal, init_db, engine
+from ..models.bus import City, Route, BusSchedule
+from ..seed_data import create_operators, create_cities, create_routes, create_buses
+from ..services.journeys import build_timetable, refresh_timetable
+
+DEPARTURE_TIMES = [dtime(h, m) for h, m in (
+    (5, 0), (6, 0), (7, 0), (7, 30), (8, 0), (9, 0), (10, 0), (11, 0), (13, 0), (14, 0),
+    (15, 0), (16, 0), (17, 0), (18, 0), (19, 0), (20, 0), (21, 0), (21, 30), (22, 0), (23, 0),
+)]
+
+
+def seed(days: int) -> int:
+    rng = random.Random(5)
+    db = SessionLocal()
+    try:
+        operators = create_operators(db)
+        cities = create_cities(db)
+        routes = create_routes(db, cities)
+        buses = create_buses(db, operators)
+        route_rows = [(route.id, route.duration_minutes) for route in routes]
+        bus_rows = [(bus.id, bus.total_seats) for bus in buses]
+    finally:
+        db.close()
+
+    schedules = []
+    for day in range(days):
+        travel_date = date.today() + timedelta(days=day)
+        for r, (route_id, duration) in enumerate(route_rows):
+            for k, departure in enumerate(DEPARTURE_TIMES):
+                bus_id, seats = bus_rows[(r * len(DEPARTURE_TIMES) + k) % len(bus_rows)]
+                arrival = (datetime.combine(travel_date, departure) + timedelta(minutes=duration)).time()
+                schedules.append({
+                    "bus_id": bus_id, "route_id": route_id, "travel_date": travel_date,
+                    "departure_time": departure, "arrival_time": arrival,
+                    "base_price": rng.randint(400, 1400), "available_seats": rng.randint(0, seats),
+                    "status": "scheduled",
+                })
+    with engine.begin() as conn:
+        for offset in range(0, len(schedules), 5000):
+            conn.execute(insert(BusSchedule), schedules[offset:offset + 5000])
+    return len(schedules)
+
+
+def percentile(values, q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the journey planner")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--changed", type=int, default=200, help="Departures changed before the incremental refresh")
+    args = parser.parse_args()
+
+    init_db()
+    print("🌱 Seeding...")
+    total = seed(args.days)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        timetable = build_timetable(db, days=args.days)
+        build = time.perf_counter() - start
+        print(f"\n⏱️ Full build: {build * 1000:.0f} ms for {len(timetable.connections)} of {total} departures")
+
+        start = time.perf_counter()
+        refresh_timetable(db, timetable)
+        print(f"   refresh, nothing changed: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        ids = [schedule_id for (schedule_id,) in db.execute(select(BusSchedule.id))]
+        changed = random.Random(9).sample(ids, min(args.changed, len(ids)))
+        db.execute(
+            update(BusSchedule).where(BusSchedule.id.in_(changed)).values(
+                available_seats=BusSchedule.available_seats + 1, version=BusSchedule.version + 1
+            )
+        )
+        db.commit()
+        start = time.perf_counter()
+        timetable = refresh_timetable(db, timetable)
+        print(f"   refresh, {len(changed)} changed: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        city_ids = [city_id for (city_id,) in db.execute(select(City.id))]
+        pairs = [(a, b) for a in city_ids for b in city_ids if a != b]
+        direct = {(a, b) for a, b in db.execute(select(Route.from_city_id, Route.to_city_id))}
+        depart_after = datetime.combine(date.today() + timedelta(days=1), dtime(0, 0))
+        depart_before = depart_after + timedelta(days=1)
+
+        print(f"\n⏱️ {len(pairs)} city pairs ({len(direct)} with a direct route), departing {depart_after.date()}")
+        print(f"{'transfers':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'pairs served':>13} {'journeys':>9}")
+        for max_transfers in range(3):
+            latencies, served, found = [], 0, 0
+            for origin, destination in pairs:
+                start = time.perf_counter()
+                journeys = timetable.plan(
+                    origin, destination, depart_after, depart_before, max_transfers=max_transfers
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                served += bool(journeys)
+                found += len(journeys)
+            latencies.sort()
+            print(
+                f"{max_transfers:>10} {statistics.median(latencies):>8.2f} {percentile(latencies, 0.99):>8.2f} "
+                f"{latencies[-1]:>8.2f} {served:>13} {found:>9}"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
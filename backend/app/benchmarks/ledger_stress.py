@@ -0,0 +1,130 @@
+"""
+Concurrent stress test for the wallet ledger.
+Many threads hammer one wallet with random credits and debits through
+app.services.ledger, each in its own session/transaction. Afterwards the
+wallet balance must equal the sum of its Transaction rows, never be negative,
+and match the total of the operations that reported success, and the monthly
+snapshots must agree with the raw ledger.
+
+Run with: python -m app.benchmarks.ledger_stress --threads 16 --ops 200
+(set DATABASE_URL to run against PostgreSQL; defaults to a local SQLite file)
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_ledger.db")
+
+import argparse
+import random
+import threading
+import time
+import uuid
+
+from sqlalchemy.exc import OperationalError
+
+from ..database import SessionLocal, init_db
+from ..models.user import User
+from ..models.wallet import Wallet
+from ..services import ledger
+from ..services.ledger import InsufficientBalance
+from ..services.statements import verify_snapshots
+
+
+def create_wallet(opening_paise: int) -> int:
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:10]
+        user = User(email=f"ledger-{tag}@example.com", phone=tag, password_hash="x", full_name="Ledger Stress")
+        db.add(user)
+        db.flush()
+        wallet = Wallet(user_id=user.id, balance_paise=0)
+        db.add(wallet)
+        db.flush()
+        if opening_paise:
+            ledger.credit(db, wallet.id, opening_paise, "Opening balance")
+        db.commit()
+        return wallet.id
+    finally:
+        db.close()
+
+
+def worker(wallet_id: int, ops: int, applied: list, rejected: list, lock: threading.Lock):
+    rng = random.Random()
+    for _ in range(ops):
+        # Bias towards debits so the non-negative guard is exercised
+        delta = rng.choice([1, -1, -1]) * rng.randint(1, 50000)
+        for attempt in range(20):
+            db = SessionLocal()
+            try:
+                if delta > 0:
+                    ledger.credit(db, wallet_id, delta, "Stress credit")
+                else:
+                    ledger.debit(db, wallet_id, -delta, "Stress debit")
+                db.commit()
+                with lock:
+                    applied.append(delta)
+                break
+            except InsufficientBalance:
+                db.rollback()
+                with lock:
+                    rejected.append(delta)
+                break
+            except OperationalError:
+                # SQLite "database is locked" under heavy write contention; retry
+                db.rollback()
+                time.sleep(0.01 * (attempt + 1))
+            finally:
+                db.close()
+
+
+def main(threads: int, ops: int, opening_paise: int):
+    init_db()
+    wallet_id = create_wallet(opening_paise)
+
+    applied, rejected = [], []
+    lock = threading.Lock()
+    pool = [
+        threading.Thread(target=worker, args=(wallet_id, ops, applied, rejected, lock))
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    db = SessionLocal()
+    try:
+        report = ledger.reconcile_wallet(db, wallet_id)
+        snapshot_problems = verify_snapshots(db, wallet_id)
+    finally:
+        db.close()
+
+    expected = opening_paise + sum(applied)
+    print(f"\n📊 Ledger stress ({threads} threads x {ops} ops)")
+    print(f"   applied:  {len(applied)} ops, rejected (insufficient): {len(rejected)}")
+    print(f"   rate:     {(len(applied) + len(rejected)) / elapsed:.0f} ops/s")
+    print(f"   balance:  {report['balance_paise']} paise")
+    print(f"   ledger:   {report['ledger_paise']} paise")
+    print(f"   expected: {expected} paise")
+    for problem in snapshot_problems:
+        print(f"   snapshot: {problem}")
+
+    ok = (
+        report["consistent"]
+        and report["balance_paise"] == expected
+        and report["balance_paise"] >= 0
+        and not snapshot_problems
+    )
+    print("✅ Balance matches ledger" if ok else "❌ Balance drifted from ledger")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wallet ledger concurrency stress test")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=200, help="Operations per thread")
+    parser.add_argument("--opening-paise", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.threads, args.ops, args.opening_paise)
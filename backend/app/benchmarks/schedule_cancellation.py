@@ -0,0 +1,169 @@
+"""
+Departure cancellation benchmark.
+Seeds a day of fully booked departures (one seat per booking, spread over a
+pool of wallets) and cancels half of them the old way (a wallet lookup and a
+ledger.credit per booking, then per-seat updates) and the other half with
+services.cancellation, then checks every wallet against its ledger and
+snapshots.
+
+Run with: python -m app.benchmarks.schedule_cancellation --departures 200
+(use an empty database: rows are seeded with explicit ids. Defaults to a
+local SQLite file; set DATABASE_URL to run against PostgreSQL)
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_cancellation.db")
+
+import argparse
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from ..database import SessionLocal, init_db, engine
+from ..models.user import User
+from ..models.bus import Operator, City, Route, Bus, BusSchedule, Seat
+from ..models.booking import Booking, BookingPassenger
+from ..models.wallet import Wallet
+from ..services import ledger
+from ..services.cancellation import cancel_schedules
+from ..services.statements import verify_snapshots
+
+SEATS_PER_BUS = 36
+FARE_PAISE = 95000
+
+
+def seed(departures: int, wallets: int) -> date:
+    rng = random.Random(11)
+    travel_date = date.today() + timedelta(days=3)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"cancel-{i}@example.com", "phone": f"c{i}", "password_hash": "x", "full_name": "Cancel Bench"}
+            for i in range(1, wallets + 1)
+        ])
+        conn.execute(insert(Wallet), [
+            {"id": i, "user_id": i, "balance_paise": 0, "transaction_count": 0} for i in range(1, wallets + 1)
+        ])
+        conn.execute(insert(City), [
+            {"id": 1, "name": "Bengaluru", "state": "KA", "code": "BLR"},
+            {"id": 2, "name": "Hyderabad", "state": "TS", "code": "HYD"},
+        ])
+        conn.execute(insert(Operator), [{"id": 1, "name": "Bench Travels", "code": "BT"}])
+        conn.execute(insert(Route), [{"id": 1, "from_city_id": 1, "to_city_id": 2, "distance_km": 570, "duration_minutes": 600}])
+        conn.execute(insert(Bus), [{
+            "id": 1, "operator_id": 1, "bus_number": "KA01BT", "bus_type": "AC Sleeper",
+            "total_seats": SEATS_PER_BUS, "seat_layout": "2+1", "amenities": [],
+        }])
+        conn.execute(insert(BusSchedule), [
+            {
+                "id": s, "bus_id": 1, "route_id": 1, "travel_date": travel_date,
+                "departure_time": dtime(21, 0), "arrival_time": dtime(7, 0), "base_price": FARE_PAISE / 100,
+                "available_seats": 0, "status": "scheduled",
+            }
+            for s in range(1, departures + 1)
+        ])
+        conn.execute(insert(Seat), [
+            {
+                "id": (s - 1) * SEATS_PER_BUS + k, "bus_schedule_id": s, "seat_number": f"S{k}",
+                "seat_type": "sleeper", "row_number": k, "column_number": 1,
+                "price": FARE_PAISE / 100, "is_available": False,
+            }
+            for s in range(1, departures + 1) for k in range(1, SEATS_PER_BUS + 1)
+        ])
+        booked_at = datetime.now(timezone.utc)
+        conn.execute(insert(Booking), [
+            {
+                "id": seat_id, "booking_code": f"C{seat_id:08d}", "user_id": rng.randint(1, wallets),
+                "bus_schedule_id": (seat_id - 1) // SEATS_PER_BUS + 1, "total_amount": FARE_PAISE / 100,
+                "status": "confirmed", "payment_method": "wallet", "booking_source": "app", "booked_at": booked_at,
+            }
+            for seat_id in range(1, departures * SEATS_PER_BUS + 1)
+        ])
+        conn.execute(insert(BookingPassenger), [
+            {"id": seat_id, "booking_id": seat_id, "seat_id": seat_id,
+             "passenger_name": "Bench", "passenger_age": 30, "passenger_gender": "male"}
+            for seat_id in range(1, departures * SEATS_PER_BUS + 1)
+        ])
+    return travel_date
+
+
+def cancel_one_by_one(schedule_ids):
+    """What admin.delete_schedule used to do, plus the seat release it skipped."""
+    db = SessionLocal()
+    try:
+        for schedule_id in schedule_ids:
+            schedule = db.query(BusSchedule).filter(BusSchedule.id == schedule_id).first()
+            bookings = db.query(Booking).filter(
+                Booking.bus_schedule_id == schedule_id,
+                Booking.status == "confirmed"
+            ).all()
+            for booking in bookings:
+                wallet = db.query(Wallet).filter(Wallet.user_id == booking.user_id).first()
+                ledger.credit(
+                    db,
+                    wallet.id,
+                    ledger.to_paise(booking.total_amount),
+                    f"Refund: Schedule Cancelled (Booking #{booking.booking_code})",
+                    reference_id=booking.id
+                )
+                booking.status = "cancelled"
+                for passenger in booking.passengers:
+                    passenger.seat.is_available = True
+                    schedule.available_seats += 1
+            schedule.status = "cancelled"
+            db.commit()
+    finally:
+        db.close()
+
+
+def cancel_set_based(schedule_ids):
+    db = SessionLocal()
+    try:
+        return cancel_schedules(db, schedule_ids)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark departure cancellation")
+    parser.add_argument("--departures", type=int, default=200)
+    parser.add_argument("--wallets", type=int, default=2000)
+    args = parser.parse_args()
+
+    init_db()
+    print("🌱 Seeding...")
+    seed(args.departures, args.wallets)
+    half = args.departures // 2
+    bookings = half * SEATS_PER_BUS
+
+    print(f"\n⏱️ Cancelling {half} departures ({bookings} bookings) each way")
+    start = time.perf_counter()
+    cancel_one_by_one(list(range(1, half + 1)))
+    loop = time.perf_counter() - start
+    print(f"   per booking: {loop:.2f}s ({bookings / loop:.0f} bookings/s)")
+
+    start = time.perf_counter()
+    cancel_set_based(list(range(half + 1, 2 * half + 1)))
+    batch = time.perf_counter() - start
+    print(f"   set-based:   {batch:.2f}s ({bookings / batch:.0f} bookings/s, {loop / batch:.1f}x)")
+
+    db = SessionLocal()
+    try:
+        problems = 0
+        for (wallet_id,) in db.query(Wallet.id).order_by(Wallet.id):
+            if verify_snapshots(db, wallet_id) or not ledger.reconcile_wallet(db, wallet_id)["consistent"]:
+                problems += 1
+        unreleased = db.query(Seat).filter(Seat.is_available.is_(False)).count()
+        expected = 2 * bookings * FARE_PAISE
+        refunded = sum(balance for (balance,) in db.query(Wallet.balance_paise))
+        print(f"{'✅' if not problems else '❌'} {problems} wallets disagree with their ledger or snapshots")
+        print(f"{'✅' if refunded == expected else '❌'} refunded {refunded / 100:.2f} of {expected / 100:.2f}")
+        print(f"{'✅' if not unreleased else '❌'} {unreleased} seats still held")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
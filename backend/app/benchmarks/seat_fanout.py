@@ -0,0 +1,97 @@
+"""
+Seat map fan-out benchmark.
+Subscribes thousands of listeners (as the WebSocket handler does) to one
+departure on an event loop, publishes seat deltas from a worker thread (as
+the sync booking handlers do after commit) and reports how long it takes
+until every subscriber has each message: p50/p99/max per message and
+overall deliveries per second. No database or sockets are involved; this
+measures the broker itself.
+
+Run with: python -m app.benchmarks.seat_fanout --subscribers 1000 5000 10000 --messages 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from ..services.seat_events import RESYNC, InMemoryBroker
+
+SCHEDULE_ID = 1
+
+
+async def run(subscribers: int, messages: int, interval: float) -> dict:
+    broker = InMemoryBroker()
+    subscriptions = [broker.subscribe(SCHEDULE_ID) for _ in range(subscribers)]
+    # Last arrival time per message across all subscribers
+    arrivals = [0.0] * messages
+    remaining = asyncio.Event()
+    pending = [subscribers]
+    resyncs = [0]
+
+    async def listen(subscription):
+        for _ in range(messages):
+            payload = await subscription.get()
+            if payload == RESYNC:
+                # Fell behind by a full queue; a real client would refetch
+                resyncs[0] += 1
+                break
+            index = int(payload[payload.index('"version":') + 10:payload.index(',"available_seats"')])
+            arrivals[index] = time.perf_counter()
+        pending[0] -= 1
+        if pending[0] == 0:
+            remaining.set()
+
+    listeners = [asyncio.create_task(listen(s)) for s in subscriptions]
+    sent = [0.0] * messages
+
+    def publisher():
+        for i in range(messages):
+            sent[i] = time.perf_counter()
+            broker.publish(SCHEDULE_ID, {
+                "type": "seats", "schedule_id": SCHEDULE_ID, "version": i,
+                "available_seats": 40 - i % 40, "taken": [i % 40 + 1], "released": [],
+            })
+            if interval:
+                time.sleep(interval)
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=publisher)
+    thread.start()
+    await remaining.wait()
+    elapsed = time.perf_counter() - start
+    thread.join()
+    for task in listeners:
+        await task
+
+    latencies = sorted((arrivals[i] - sent[i]) * 1000 for i in range(messages))
+    return {
+        "elapsed": elapsed,
+        "deliveries_per_second": subscribers * messages / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "max": latencies[-1],
+        "resyncs": resyncs[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark seat map fan-out")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=20.0, help="Pause between publishes")
+    args = parser.parse_args()
+
+    print(f"📡 {args.messages} messages, one every {args.interval_ms} ms, to one departure")
+    print(f"{'subscribers':>12} {'deliveries/s':>14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'resyncs':>8}")
+    for subscribers in args.subscribers:
+        result = asyncio.run(run(subscribers, args.messages, args.interval_ms / 1000))
+        print(
+            f"{subscribers:>12} {result['deliveries_per_second']:>14.0f} "
+            f"{result['p50']:>8.2f} {result['p99']:>8.2f} {result['max']:>8.2f} {result['resyncs']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
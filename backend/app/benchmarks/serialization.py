@@ -0,0 +1,155 @@
+"""
+Response serialization micro-benchmark.
+For the search, schedule detail and seat map endpoints, compares the old
+path (ORM objects -> model_validate -> response_model re-validation ->
+json) with the row fast path (column rows -> dicts -> orjson), timing the
+load and the encode step separately and checking both produce the same JSON.
+
+Run with: python -m app.benchmarks.serialization --departures 60 --seats 54
+(use an empty database: rows are seeded with explicit ids. Defaults to a
+local SQLite file)
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_serialization.db")
+
+import argparse
+import json
+import time
+from datetime import date, time as dtime, timedelta
+from typing import List
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+
+from ..database import SessionLocal, init_db, engine
+from ..models.bus import Operator, City, Route, Bus, BusSchedule, Seat, BoardingPoint, DroppingPoint
+from ..schemas.bus import BusScheduleResponse, BusScheduleDetailResponse, SeatResponse
+from ..routers.buses import _schedule_detail, _seat_rows
+from ..services.search import schedule_query, schedule_dict
+
+ROUNDS = 50
+
+
+def seed(departures: int, seats: int) -> date:
+    travel_date = date.today() + timedelta(days=2)
+    with engine.begin() as conn:
+        conn.execute(insert(City), [
+            {"id": 1, "name": "Bengaluru", "state": "KA", "code": "BLR"},
+            {"id": 2, "name": "Goa", "state": "GA", "code": "GOI"},
+        ])
+        conn.execute(insert(Operator), [{"id": 1, "name": "Bench Travels", "code": "BT", "logo_url": None}])
+        conn.execute(insert(Route), [{"id": 1, "from_city_id": 1, "to_city_id": 2, "distance_km": 560, "duration_minutes": 660}])
+        conn.execute(insert(Bus), [{
+            "id": 1, "operator_id": 1, "bus_number": "KA01BT", "bus_type": "AC Sleeper",
+            "total_seats": seats, "seat_layout": "2+1", "amenities": ["wifi", "charging", "blanket"],
+        }])
+        conn.execute(insert(BusSchedule), [
+            {
+                "id": s, "bus_id": 1, "route_id": 1, "travel_date": travel_date,
+                "departure_time": dtime(18 + s % 6, 0), "arrival_time": dtime(6, 0),
+                "base_price": 1200.0, "available_seats": seats, "status": "scheduled",
+            }
+            for s in range(1, departures + 1)
+        ])
+        conn.execute(insert(Seat), [
+            {
+                "id": (s - 1) * seats + k, "bus_schedule_id": s, "seat_number": f"L{k}",
+                "seat_type": "sleeper", "price": 1200.0, "is_available": k % 3 != 0, "is_ladies_only": False,
+                "row_number": (k - 1) // 3 + 1, "column_number": (k - 1) % 3 + 1,
+                "deck": "lower" if k <= seats // 2 else "upper", "side": "left", "is_window": k % 3 == 1,
+            }
+            for s in range(1, departures + 1) for k in range(1, seats + 1)
+        ])
+        for model in (BoardingPoint, DroppingPoint):
+            conn.execute(insert(model), [
+                {"bus_schedule_id": s, "name": f"Stop {k}", "address": "Main Road", "time": dtime(18, 10 * k)}
+                for s in range(1, departures + 1) for k in range(1, 4)
+            ])
+    return travel_date
+
+
+def validated_json(schema, content) -> bytes:
+    """model_validate per object, then FastAPI's response_model pass and JSONResponse.render."""
+    models = [schema.model_validate(obj) for obj in content] if isinstance(content, list) else schema.model_validate(content)
+    adapter = TypeAdapter(List[schema] if isinstance(content, list) else schema)
+    payload = adapter.dump_python(adapter.validate_python(models, from_attributes=True), mode="json")
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def measure(label: str, load, encode) -> bytes:
+    load_time = encode_time = 0.0
+    body = b""
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        content = load()
+        load_time += time.perf_counter() - start
+        start = time.perf_counter()
+        body = encode(content)
+        encode_time += time.perf_counter() - start
+    print(f"   {label:<24} load {load_time / ROUNDS * 1000:>7.2f} ms   encode {encode_time / ROUNDS * 1000:>7.2f} ms")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--departures", type=int, default=60)
+    parser.add_argument("--seats", type=int, default=54)
+    args = parser.parse_args()
+
+    init_db()
+    travel_date = seed(args.departures, args.seats)
+    schedule_id = 1
+    db = SessionLocal()
+    orjson_body = lambda content: ORJSONResponse(content).body
+
+    try:
+        endpoints = {
+            "search": (
+                lambda: db.query(BusSchedule).options(
+                    joinedload(BusSchedule.bus).joinedload(Bus.operator),
+                    joinedload(BusSchedule.route).joinedload(Route.from_city),
+                    joinedload(BusSchedule.route).joinedload(Route.to_city)
+                ).filter(BusSchedule.travel_date == travel_date).order_by(BusSchedule.departure_time).all(),
+                lambda content: validated_json(BusScheduleResponse, content),
+                lambda: [schedule_dict(row) for row in db.execute(
+                    schedule_query().where(BusSchedule.travel_date == travel_date).order_by(BusSchedule.departure_time)
+                ).mappings()],
+            ),
+            "schedule detail": (
+                lambda: db.query(BusSchedule).options(
+                    joinedload(BusSchedule.bus).joinedload(Bus.operator),
+                    joinedload(BusSchedule.route).joinedload(Route.from_city),
+                    joinedload(BusSchedule.route).joinedload(Route.to_city),
+                    joinedload(BusSchedule.seats),
+                    joinedload(BusSchedule.boarding_points),
+                    joinedload(BusSchedule.dropping_points)
+                ).filter(BusSchedule.id == schedule_id).first(),
+                lambda content: validated_json(BusScheduleDetailResponse, content),
+                lambda: _schedule_detail(db, schedule_id),
+            ),
+            "seat map": (
+                lambda: db.query(Seat).filter(Seat.bus_schedule_id == schedule_id).order_by(
+                    Seat.deck, Seat.row_number, Seat.column_number
+                ).all(),
+                lambda content: validated_json(SeatResponse, content),
+                lambda: _seat_rows(db, schedule_id),
+            ),
+        }
+
+        print(f"⏱️ Mean of {ROUNDS} rounds ({args.departures} departures, {args.seats} seats each)")
+        for name, (orm_load, orm_encode, row_load) in endpoints.items():
+            print(f"\n{name}")
+            before = measure("ORM + validation", lambda: (db.expire_all(), orm_load())[1], orm_encode)
+            after = measure("rows + orjson", row_load, orjson_body)
+            same = json.loads(before) == json.loads(after)
+            print(f"   {'✅ same payload' if same else '❌ payloads differ'} ({len(after)} bytes)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
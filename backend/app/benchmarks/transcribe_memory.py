@@ -0,0 +1,85 @@
+"""
+Memory usage of the transcription upload path under concurrent uploads.
+Uses the fake provider (which drains the stream like a real upstream) and
+reports the traced Python heap peak above the baseline, per endpoint.
+
+Run with: python -m app.benchmarks.transcribe_memory --concurrency 20 --size-mb 5
+"""
+
+import os
+
+# Must be set before any app module reads settings or creates the engine
+os.environ.setdefault("MODEL_PROVIDER", "fake")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_agent.db")
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+import httpx
+
+from ..database import init_db
+from ..main import app
+from .agent_load import create_bench_users
+
+
+async def upload_multipart(client: httpx.AsyncClient, token: str, audio: bytes):
+    response = await client.post(
+        "/agent/transcribe-upload",
+        files={"file": ("note.m4a", audio, "audio/m4a")},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    response.raise_for_status()
+
+
+async def upload_raw(client: httpx.AsyncClient, token: str, audio: bytes):
+    async def body():
+        # Send in client-sized chunks so the server sees a streamed body
+        for i in range(0, len(audio), 256 * 1024):
+            yield audio[i:i + 256 * 1024]
+
+    response = await client.post(
+        "/agent/transcribe",
+        content=body(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "audio/m4a"}
+    )
+    response.raise_for_status()
+
+
+async def measure(name: str, upload, tokens: list, audio: bytes):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300.0) as client:
+        # Warm up imports and the provider outside the measurement
+        await upload(client, tokens[0], audio[:1024])
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(client, t, audio) for t in tokens))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    size_mb = len(audio) / (1024 * 1024)
+    print(f"\n📊 {name}")
+    print(f"   uploads:        {len(tokens)} x {size_mb:.1f} MB in {elapsed:.2f}s")
+    print(f"   heap peak:      {(peak - baseline) / (1024 * 1024):.1f} MB above baseline")
+    print(f"   per upload:     {(peak - baseline) / len(tokens) / 1024:.0f} KB")
+
+
+async def main(concurrency: int, size_mb: int):
+    init_db()
+    tokens = create_bench_users(concurrency)
+    audio = os.urandom(size_mb * 1024 * 1024)
+
+    await measure("/agent/transcribe-upload (multipart)", upload_multipart, tokens, audio)
+    await measure("/agent/transcribe (raw streamed body)", upload_raw, tokens, audio)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcription upload memory benchmark")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent uploads")
+    parser.add_argument("--size-mb", type=int, default=5, help="Size of each voice note")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.size_mb))
@@ -0,0 +1,129 @@
+"""
+Wallet history pagination benchmark.
+Seeds one wallet with a long transaction history and compares the legacy
+COUNT(*) + OFFSET page against the keyset cursor page at increasing depths.
+
+Run with: python -m app.benchmarks.wallet_transactions --transactions 100000
+(set DATABASE_URL to run against PostgreSQL; defaults to a local SQLite file)
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_wallet.db")
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, tuple_, update
+
+from ..database import SessionLocal, init_db
+from ..models.user import User
+from ..models.wallet import Wallet, Transaction
+
+
+def seed_wallet(count: int) -> int:
+    """Create a wallet with `count` transactions spread over the past year."""
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:10]
+        user = User(email=f"history-{tag}@example.com", phone=tag, password_hash="x", full_name="History Bench")
+        db.add(user)
+        db.flush()
+        wallet = Wallet(user_id=user.id, balance_paise=0)
+        db.add(wallet)
+        db.flush()
+
+        rng = random.Random(42)
+        start = datetime.now(timezone.utc) - timedelta(days=365)
+        step = timedelta(days=365) / count
+        batch = []
+        for i in range(count):
+            batch.append({
+                "wallet_id": wallet.id,
+                "type": rng.choice(["credit", "debit"]),
+                "amount_paise": rng.randint(100, 500000),
+                "description": "Bench transaction",
+                "created_at": start + step * i,
+            })
+            if len(batch) == 5000:
+                db.execute(insert(Transaction), batch)
+                batch = []
+        if batch:
+            db.execute(insert(Transaction), batch)
+        db.execute(update(Wallet).where(Wallet.id == wallet.id).values(transaction_count=count))
+        db.commit()
+        return wallet.id
+    finally:
+        db.close()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def offset_page(wallet_id: int, offset: int, limit: int):
+    db = SessionLocal()
+    try:
+        db.query(Transaction).filter(Transaction.wallet_id == wallet_id).count()
+        db.query(Transaction).filter(
+            Transaction.wallet_id == wallet_id
+        ).order_by(Transaction.created_at.desc()).offset(offset).limit(limit).all()
+    finally:
+        db.close()
+
+
+def keyset_page(wallet_id: int, after: tuple, limit: int):
+    db = SessionLocal()
+    try:
+        db.query(Wallet.transaction_count).filter(Wallet.id == wallet_id).scalar()
+        db.query(Transaction).filter(
+            Transaction.wallet_id == wallet_id,
+            tuple_(Transaction.created_at, Transaction.id) < after
+        ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit + 1).all()
+    finally:
+        db.close()
+
+
+def cursor_at(wallet_id: int, offset: int) -> tuple:
+    """The (created_at, id) a client would hold after paging to `offset`."""
+    db = SessionLocal()
+    try:
+        row = db.query(Transaction.created_at, Transaction.id).filter(
+            Transaction.wallet_id == wallet_id
+        ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).offset(offset).first()
+        return tuple(row)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wallet history pagination")
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    init_db()
+    print(f"🌱 Seeding a wallet with {args.transactions} transactions...")
+    wallet_id = seed_wallet(args.transactions)
+
+    print(f"{'depth':>8} {'count+offset ms':>16} {'keyset ms':>10}")
+    depths = [0, 100, 1000, 10000, args.transactions // 2, args.transactions - args.limit]
+    for depth in sorted(set(d for d in depths if 0 <= d < args.transactions)):
+        after = cursor_at(wallet_id, depth)
+        legacy = timed(lambda: offset_page(wallet_id, depth, args.limit), args.repeat)
+        keyset = timed(lambda: keyset_page(wallet_id, after, args.limit), args.repeat)
+        print(f"{depth:>8} {legacy:>16.2f} {keyset:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
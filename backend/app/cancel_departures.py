@@ -0,0 +1,31 @@
+"""
+Cancel a day's departures in one batch.
+Cancels every scheduled departure on the given date (optionally only one
+route or bus), refunds wallet-paid bookings, releases the seats and lists the
+affected bookings.
+
+Run with: python -m app.cancel_departures 2025-01-31 [--route-id ID] [--bus-id ID]
+"""
+
+import argparse
+from datetime import date
+
+from app.database import SessionLocal
+from app.services.cancellation import cancel_departures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cancel all departures on a day and refund bookings")
+    parser.add_argument("travel_date", type=date.fromisoformat)
+    parser.add_argument("--route-id", type=int, default=None)
+    parser.add_argument("--bus-id", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = cancel_departures(db, args.travel_date, route_id=args.route_id, bus_id=args.bus_id)
+        for booking in result["affected"]:
+            print(f"   - {booking['booking_code']} (user {booking['user_id']}): ₹{booking['amount']:.2f}")
+        print(f"💰 Refunded ₹{result['refunded']:.2f} to {result['refunds']} bookings")
+    finally:
+        db.close()
@@ -17,6 +17,44 @@ class Settings(BaseSettings):
     # Groq API
     groq_api_key: str = ""
     
+    # Model provider: "groq" (live API) or "fake" (offline, for benchmarks)
+    model_provider: str = "groq"
+    fake_llm_latency_ms: int = 0
+    fake_transcription_latency_ms: int = 0
+    agent_warmup: bool = False  # Build the agent at startup rather than on the first chat (not for serverless)
+    
+    # Voice uploads
+    max_audio_upload_bytes: int = 25 * 1024 * 1024  # Groq Whisper limit
+    audio_resample_16k_mono: bool = False  # Needs ffmpeg on PATH
+    transcription_cache_size: int = 1000
+    transcription_cache_dir: str = ""  # Empty keeps the cache in memory only
+    
+    # Admin dashboard
+    admin_stats_refresh_seconds: int = 60
+    analytics_refresh_seconds: int = 300  # Max rollup age before a report refreshes it
+    
+    # Real-time seat maps: empty keeps pub/sub in-process (single worker)
+    seat_events_redis_url: str = ""
+    
+    # Caches shared by all workers (empty keeps them per process)
+    shared_cache_redis_url: str = ""
+    schedule_static_cache_seconds: int = 6 * 3600
+    
+    # Connecting-bus journey planner
+    journey_window_days: int = 14
+    journey_refresh_seconds: int = 30
+    journey_min_connection_minutes: int = 30
+    
+    # Search caches (per worker) and startup warm-up of popular routes
+    search_cache_seconds: int = 30
+    search_index_seconds: int = 300
+    search_warmup_days: int = 3  # 0 disables the warm-up
+    
+    # Health probes
+    health_cache_seconds: float = 5.0  # Probes within this interval share one set of checks
+    health_check_timeout_seconds: float = 2.0
+    health_db_slow_ms: int = 250  # Round trips slower than this mark the database degraded
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
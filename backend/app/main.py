@@ -1,26 +1,52 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from .database import init_db
-from .routers import auth_router, buses_router, bookings_router, wallet_router, agent_router, admin_router
+import threading
+from .config import get_settings
+from .database import engine
+from .migrations import check_schema
+from .utils.http_client import get_http_client
+from .utils.audio import UploadSizeLimitMiddleware
+from .utils.db_timing import install_db_timing
+from .services.search import start_warmup, warmup_status
+from .services.health import liveness, readiness
+from .routers import auth_router, buses_router, bookings_router, wallet_router, agent_router, admin_router, analytics_router, realtime_router
+
+
+def _warm_agent():
+    from .agent.agent import warm_agent
+    warm_agent()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    # Startup: Initialize database tables
-    init_db()
-    print("✅ Database initialized")
+    # Startup: the schema is migrated as a deploy step (python -m app.migrate); only check its version here
+    version = check_schema(engine)
+    print(f"✅ Database schema at version {version}")
+    # Open the shared outbound HTTP connection pool
+    await get_http_client().start()
+    # Preload city/route lookups and popular departures without delaying startup
+    start_warmup()
+    # The agent stack is imported on first use; long-lived servers can build it now instead
+    if get_settings().agent_warmup:
+        threading.Thread(target=_warm_agent, name="agent-warmup", daemon=True).start()
     yield
     # Shutdown
+    await get_http_client().close()
     print("👋 Application shutting down")
 
 
+# Per-request DB time accounting (reported via Server-Timing)
+install_db_timing(engine)
+
 app = FastAPI(
     title="Bus Booking API",
     description="A RedBus-like bus booking API with AI-powered booking agent",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for React Native app
@@ -32,6 +58,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Hard limit on voice-note uploads (slack covers multipart framing)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=get_settings().max_audio_upload_bytes + 64 * 1024,
+    paths=["/agent/transcribe", "/agent/transcribe-upload"],
+)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(buses_router)
@@ -39,6 +72,8 @@ app.include_router(bookings_router)
 app.include_router(wallet_router)
 app.include_router(agent_router)
 app.include_router(admin_router)
+app.include_router(analytics_router)
+app.include_router(realtime_router)
 
 
 @app.get("/", tags=["Health"])
@@ -53,15 +88,35 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Detailed health check."""
+    """Detailed health check from the cached readiness report. ready is false until the search cache warm-up has finished."""
+    report = await readiness()
+    checks = report["checks"]
+    agent_up = checks["provider"]["status"] == "ok"
     return {
-        "status": "healthy",
-        "database": "connected",
+        "status": "healthy" if report["status"] == "ok" else report["status"],
+        "ready": report["ready"],
+        "warmup": warmup_status(),
+        "database": "connected" if checks["database"]["status"] != "down" else "disconnected",
         "services": {
             "auth": "up",
             "buses": "up",
             "bookings": "up",
             "wallet": "up",
-            "agent": "up"
-        }
+            "agent": "up" if agent_up else "down"
+        },
+        "checks": checks,
+        "checked_at": report["checked_at"]
     }
+
+
+@app.get("/health/live", tags=["Health"])
+async def health_live():
+    """Liveness probe: the process is up. Checks no dependencies."""
+    return liveness()
+
+
+@app.get("/health/ready", tags=["Health"])
+async def health_ready():
+    """Readiness probe: 503 until the database answers and the search warm-up has finished."""
+    report = await readiness()
+    return ORJSONResponse(report, status_code=200 if report["ready"] else 503)
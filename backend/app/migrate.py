@@ -0,0 +1,43 @@
+"""
+Apply pending schema migrations (run before starting the new version).
+Run with: python -m app.migrate
+          python -m app.migrate --status   (list applied and pending migrations)
+          python -m app.migrate --to 5     (stop after version 5)
+"""
+
+import argparse
+
+from .database import engine
+from .migrations import HEAD, MIGRATIONS, current_version, migrate
+
+
+def show_status():
+    with engine.connect() as conn:
+        version = current_version(conn) or 0
+    print(f"📋 Schema version {version} of {HEAD}")
+    for migration in MIGRATIONS:
+        mark = "✅" if migration.version <= version else "⏳"
+        print(f"   {mark} {migration.version:03d} {migration.name}: {migration.description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations only")
+    parser.add_argument("--to", type=int, default=None, help="Target version (default: latest)")
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+        return
+
+    print("🔄 Migrating database schema...")
+    applied = migrate(engine, args.to)
+    for migration in applied:
+        print(f"✅ {migration.version:03d} {migration.name}: {migration.description}")
+    if not applied:
+        print("✅ Schema already up to date")
+    show_status()
+
+
+if __name__ == "__main__":
+    main()
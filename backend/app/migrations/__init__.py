@@ -0,0 +1,133 @@
+"""
+Versioned schema migrations.
+Each mNNN_<name>.py module is one migration: its docstring describes it and
+upgrade(conn) applies it. Applied versions are recorded in schema_version,
+and migrate() runs the pending ones in order, each in its own transaction.
+Run it as a deploy step (python -m app.migrate); application startup only
+reads the recorded version (check_schema) instead of creating tables.
+
+Migration 1 creates the original tables from a frozen copy of their
+definitions, never from the current models, so a fresh database is built
+by replaying every step and a model change only reaches a database through
+its own migration. Migrations must not be edited once released; add a new
+one. Databases created from the models (or patched by update_db.py) before
+versioning existed already have some of these changes, so a migration may
+check for its change first, but only to adopt those databases.
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from . import (
+    m001_baseline,
+    m002_user_roles,
+    m003_wallet_paise,
+    m004_transaction_count,
+    m005_booking_indexes,
+    m006_schedule_version,
+    m007_route_daily_fares,
+    m008_hot_path_indexes,
+    m009_wallet_snapshots,
+    m010_idempotency_keys,
+    m011_analytics_rollup,
+)
+
+# Serializes concurrent migrate() runs on PostgreSQL
+LOCK_KEY = 7_200_049
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _migration(module) -> Migration:
+    name = module.__name__.rsplit(".", 1)[1]
+    return Migration(int(name[1:4]), name[5:], module.__doc__.strip(), module.upgrade)
+
+
+MIGRATIONS: List[Migration] = [_migration(module) for module in (
+    m001_baseline,
+    m002_user_roles,
+    m003_wallet_paise,
+    m004_transaction_count,
+    m005_booking_indexes,
+    m006_schedule_version,
+    m007_route_daily_fares,
+    m008_hot_path_indexes,
+    m009_wallet_snapshots,
+    m010_idempotency_keys,
+    m011_analytics_rollup,
+)]
+assert [m.version for m in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1)), "migration versions must be consecutive"
+
+HEAD = MIGRATIONS[-1].version
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    """The latest applied version, 0 if none, or None if schema_version does not exist."""
+    try:
+        version = conn.execute(select(func.max(schema_version.c.version))).scalar()
+    except DBAPIError:
+        conn.rollback()
+        return None
+    return version or 0
+
+
+def migrate(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to target (default: all). Returns the ones applied."""
+    target = HEAD if target is None else target
+    applied = []
+    with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+            conn.commit()
+        try:
+            schema_version.create(conn, checkfirst=True)
+            conn.commit()
+            version = current_version(conn)
+            conn.commit()
+            for migration in MIGRATIONS[version:target]:
+                with conn.begin():
+                    migration.upgrade(conn)
+                    conn.execute(insert(schema_version).values(
+                        version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)
+                    ))
+                applied.append(migration)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+                conn.commit()
+    return applied
+
+
+def check_schema(engine: Engine) -> int:
+    """
+    Startup check: one query for the recorded version. Raises SchemaOutOfDate
+    if migrations are pending; a newer schema (rolling deploy) is accepted.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version is None or version < HEAD:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version or 0}, this code needs {HEAD}: run python -m app.migrate"
+        )
+    return version
@@ -0,0 +1,19 @@
+"""
+Schema checks and DDL shared by migrations (PostgreSQL and SQLite).
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def table_exists(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def column_exists(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def create_index(conn: Connection, name: str, table: str, columns: str):
+    """CREATE INDEX IF NOT EXISTS name ON table (columns)."""
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -0,0 +1,180 @@
+"""Create the tables of the original schema"""
+
+from sqlalchemy import (
+    JSON, Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text, Time, func,
+)
+
+# The schema as the models defined it before versioned migrations, frozen
+# here so later model changes only reach a database through their own
+# migration. Do not edit: add a new migration instead.
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("phone", String(15), unique=True, index=True, nullable=False),
+    Column("password_hash", String(255), nullable=False),
+    Column("full_name", String(100), nullable=False),
+    Column("role", String(20), nullable=False),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "wallets", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False),
+    Column("balance", Float),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "transactions", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("wallet_id", Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False),
+    Column("type", String(10), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("description", String(255)),
+    Column("reference_id", Integer, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "operators", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("code", String(20), unique=True, nullable=False),
+    Column("logo_url", String(500), nullable=True),
+    Column("rating", Float),
+    Column("total_buses", Integer),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "cities", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("state", String(100), nullable=False),
+    Column("code", String(10), unique=True, nullable=False),
+    Column("is_popular", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "routes", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("from_city_id", Integer, ForeignKey("cities.id"), nullable=False),
+    Column("to_city_id", Integer, ForeignKey("cities.id"), nullable=False),
+    Column("distance_km", Integer, nullable=False),
+    Column("duration_minutes", Integer, nullable=False),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "buses", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("operator_id", Integer, ForeignKey("operators.id"), nullable=False),
+    Column("bus_number", String(20), nullable=False),
+    Column("bus_type", String(30), nullable=False),
+    Column("total_seats", Integer, nullable=False),
+    Column("seat_layout", String(10), nullable=False),
+    Column("amenities", JSON),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "bus_schedules", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("bus_id", Integer, ForeignKey("buses.id"), nullable=False),
+    Column("route_id", Integer, ForeignKey("routes.id"), nullable=False),
+    Column("travel_date", Date, nullable=False),
+    Column("departure_time", Time, nullable=False),
+    Column("arrival_time", Time, nullable=False),
+    Column("base_price", Float, nullable=False),
+    Column("available_seats", Integer, nullable=False),
+    Column("status", String(20)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "seats", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("bus_schedule_id", Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False),
+    Column("seat_number", String(5), nullable=False),
+    Column("seat_type", String(20), nullable=False),
+    Column("price", Float, nullable=False),
+    Column("is_available", Boolean),
+    Column("is_ladies_only", Boolean),
+    Column("row_number", Integer, nullable=False),
+    Column("column_number", Integer, nullable=False),
+    Column("deck", String(10)),
+    Column("side", String(10)),
+    Column("is_window", Boolean),
+)
+
+for _points in ("boarding_points", "dropping_points"):
+    Table(
+        _points, metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("bus_schedule_id", Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False),
+        Column("name", String(100), nullable=False),
+        Column("address", String(300), nullable=True),
+        Column("landmark", String(200), nullable=True),
+        Column("time", Time, nullable=False),
+        Column("contact_number", String(20), nullable=True),
+    )
+
+Table(
+    "bookings", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("booking_code", String(10), unique=True, nullable=False, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("bus_schedule_id", Integer, ForeignKey("bus_schedules.id"), nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status", String(20)),
+    Column("payment_method", String(20), nullable=False),
+    Column("booking_source", String(20)),
+    Column("booked_at", DateTime(timezone=True), server_default=func.now()),
+    Column("cancelled_at", DateTime(timezone=True), nullable=True),
+)
+
+Table(
+    "booking_passengers", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("booking_id", Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False),
+    Column("seat_id", Integer, ForeignKey("seats.id"), nullable=False),
+    Column("passenger_name", String(100), nullable=False),
+    Column("passenger_age", Integer, nullable=False),
+    Column("passenger_gender", String(10), nullable=False),
+)
+
+Table(
+    "chat_sessions", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("session_id", String(50), unique=True, nullable=False, index=True),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("ended_at", DateTime(timezone=True), nullable=True),
+)
+
+Table(
+    "chat_messages", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("session_id", Integer, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False),
+    Column("role", String(10), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("extra_data", JSON, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(conn):
+    # checkfirst leaves the tables of a database created before versioning alone
+    metadata.create_all(bind=conn)
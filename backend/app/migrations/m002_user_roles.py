@@ -0,0 +1,11 @@
+"""Add users.role"""
+
+from sqlalchemy import text
+
+from .helpers import column_exists
+
+
+def upgrade(conn):
+    # The baseline has the column; databases created before it was added do not
+    if not column_exists(conn, "users", "role"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN role VARCHAR(20) DEFAULT 'user' NOT NULL"))
@@ -0,0 +1,63 @@
+"""Move wallet balances and transaction amounts to integer paise"""
+
+from sqlalchemy import text
+
+from .helpers import column_exists
+
+
+def upgrade(conn):
+    # Databases created from the models after the ledger change, before
+    # versioning, already have the paise columns
+    if column_exists(conn, "wallets", "balance_paise"):
+        return
+    if conn.dialect.name == "sqlite":
+        _rebuild_on_sqlite(conn)
+        return
+    conn.execute(text("ALTER TABLE wallets ADD COLUMN balance_paise BIGINT NOT NULL DEFAULT 0"))
+    conn.execute(text("UPDATE wallets SET balance_paise = ROUND(CAST(COALESCE(balance, 0) AS NUMERIC) * 100)"))
+    conn.execute(text("ALTER TABLE wallets DROP COLUMN balance"))
+    conn.execute(text(
+        "ALTER TABLE wallets ADD CONSTRAINT ck_wallets_balance_non_negative CHECK (balance_paise >= 0)"
+    ))
+    conn.execute(text("ALTER TABLE transactions ADD COLUMN amount_paise BIGINT"))
+    conn.execute(text("UPDATE transactions SET amount_paise = ROUND(CAST(amount AS NUMERIC) * 100)"))
+    conn.execute(text("ALTER TABLE transactions ALTER COLUMN amount_paise SET NOT NULL"))
+    conn.execute(text("ALTER TABLE transactions DROP COLUMN amount"))
+
+
+def _rebuild_on_sqlite(conn):
+    """SQLite cannot add a CHECK or NOT NULL to an existing table, so copy both tables into the new shape."""
+    conn.execute(text(
+        "CREATE TABLE wallets_new ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "user_id INTEGER NOT NULL UNIQUE, "
+        "balance_paise BIGINT NOT NULL DEFAULT 0, "
+        "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), "
+        "updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP), "
+        "CONSTRAINT ck_wallets_balance_non_negative CHECK (balance_paise >= 0), "
+        "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE)"
+    ))
+    conn.execute(text(
+        "INSERT INTO wallets_new (id, user_id, balance_paise, created_at, updated_at) "
+        "SELECT id, user_id, CAST(ROUND(COALESCE(balance, 0) * 100) AS INTEGER), created_at, updated_at FROM wallets"
+    ))
+    conn.execute(text(
+        "CREATE TABLE transactions_new ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "wallet_id INTEGER NOT NULL, "
+        "type VARCHAR(10) NOT NULL, "
+        "amount_paise BIGINT NOT NULL, "
+        "description VARCHAR(255), "
+        "reference_id INTEGER, "
+        "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), "
+        "FOREIGN KEY (wallet_id) REFERENCES wallets (id) ON DELETE CASCADE)"
+    ))
+    conn.execute(text(
+        "INSERT INTO transactions_new (id, wallet_id, type, amount_paise, description, reference_id, created_at) "
+        "SELECT id, wallet_id, type, CAST(ROUND(amount * 100) AS INTEGER), description, reference_id, created_at "
+        "FROM transactions"
+    ))
+    for table in ("transactions", "wallets"):
+        conn.execute(text(f"DROP TABLE {table}"))
+        conn.execute(text(f"ALTER TABLE {table}_new RENAME TO {table}"))
+        conn.execute(text(f"CREATE INDEX ix_{table}_id ON {table} (id)"))
@@ -0,0 +1,15 @@
+"""Add wallets.transaction_count and the keyset index on transactions"""
+
+from sqlalchemy import text
+
+from .helpers import column_exists, create_index
+
+
+def upgrade(conn):
+    if not column_exists(conn, "wallets", "transaction_count"):
+        conn.execute(text("ALTER TABLE wallets ADD COLUMN transaction_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text(
+            "UPDATE wallets SET transaction_count = "
+            "(SELECT COUNT(*) FROM transactions WHERE transactions.wallet_id = wallets.id)"
+        ))
+    create_index(conn, "ix_transactions_wallet_created_id", "transactions", "wallet_id, created_at DESC, id")
@@ -0,0 +1,10 @@
+"""Index bookings for the dashboard series and analytics rollups"""
+
+from .helpers import create_index
+
+
+def upgrade(conn):
+    create_index(conn, "ix_bookings_booked_at", "bookings", "booked_at")
+    create_index(conn, "ix_bookings_cancelled_at", "bookings", "cancelled_at")
+    create_index(conn, "ix_bookings_bus_schedule_id", "bookings", "bus_schedule_id")
+    create_index(conn, "ix_booking_passengers_booking_id", "booking_passengers", "booking_id")
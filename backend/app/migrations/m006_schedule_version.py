@@ -0,0 +1,10 @@
+"""Add bus_schedules.version for conditional GETs"""
+
+from sqlalchemy import text
+
+from .helpers import column_exists
+
+
+def upgrade(conn):
+    if not column_exists(conn, "bus_schedules", "version"):
+        conn.execute(text("ALTER TABLE bus_schedules ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
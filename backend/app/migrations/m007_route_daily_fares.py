@@ -0,0 +1,29 @@
+"""Build the fare calendar aggregate from bus schedules"""
+
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, Table, func, text
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    metadata.reflect(bind=conn, only=["routes"])
+    Table(
+        "route_daily_fares", metadata,
+        Column("route_id", Integer, ForeignKey("routes.id", ondelete="CASCADE"), primary_key=True),
+        Column("travel_date", Date, primary_key=True),
+        Column("min_price", Float, nullable=True),
+        Column("departures", Integer, nullable=False),
+        Column("available_seats", Integer, nullable=False),
+        Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    )
+    metadata.create_all(bind=conn)
+
+    # Already filled when created from the models before versioning
+    if conn.execute(text("SELECT 1 FROM route_daily_fares LIMIT 1")).fetchone():
+        return
+    conn.execute(text(
+        "INSERT INTO route_daily_fares (route_id, travel_date, min_price, departures, available_seats) "
+        "SELECT route_id, travel_date, "
+        "MIN(CASE WHEN available_seats > 0 THEN base_price END), COUNT(id), "
+        "COALESCE(SUM(CASE WHEN available_seats > 0 THEN available_seats ELSE 0 END), 0) "
+        "FROM bus_schedules WHERE status = 'scheduled' GROUP BY route_id, travel_date"
+    ))
@@ -0,0 +1,19 @@
+"""Index the foreign keys and lookups on the search, seat map, booking and chat paths"""
+
+from .helpers import create_index
+
+
+def upgrade(conn):
+    # Search and fare calendar: a route's departures on a day
+    create_index(conn, "ix_bus_schedules_route_date_departure", "bus_schedules", "route_id, travel_date, departure_time")
+    # Journey planner window, departure cancellation and bus edits
+    create_index(conn, "ix_bus_schedules_travel_date", "bus_schedules", "travel_date")
+    create_index(conn, "ix_bus_schedules_bus_id", "bus_schedules", "bus_id")
+    # Seat maps and stops of a departure
+    create_index(conn, "ix_seats_bus_schedule_id", "seats", "bus_schedule_id")
+    create_index(conn, "ix_boarding_points_bus_schedule_id", "boarding_points", "bus_schedule_id")
+    create_index(conn, "ix_dropping_points_bus_schedule_id", "dropping_points", "bus_schedule_id")
+    # My bookings and chat history
+    create_index(conn, "ix_bookings_user_booked_at", "bookings", "user_id, booked_at")
+    create_index(conn, "ix_chat_sessions_user_id", "chat_sessions", "user_id")
+    create_index(conn, "ix_chat_messages_session_id", "chat_messages", "session_id")
@@ -0,0 +1,58 @@
+"""Add monthly wallet snapshots for statements and backfill them from the ledger"""
+
+from sqlalchemy import (
+    BigInteger, Column, Date, DateTime, ForeignKey, Integer, MetaData, Table, UniqueConstraint, func, text,
+)
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    metadata.reflect(bind=conn, only=["wallets"])
+    Table(
+        "wallet_snapshots", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("wallet_id", Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False),
+        Column("period_start", Date, nullable=False),
+        Column("opening_paise", BigInteger, nullable=False),
+        Column("credits_paise", BigInteger, nullable=False),
+        Column("debits_paise", BigInteger, nullable=False),
+        Column("closing_paise", BigInteger, nullable=False),
+        Column("transaction_count", Integer, nullable=False),
+        Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+        UniqueConstraint("wallet_id", "period_start", name="uq_wallet_snapshots_wallet_period"),
+    )
+    metadata.create_all(bind=conn)
+    _backfill(conn)
+
+
+def _backfill(conn):
+    """
+    Rebuild every wallet's snapshots from its transactions, as
+    statements.rebuild_snapshots does one wallet at a time: totals per wallet
+    and UTC month, with the opening balance as the running sum of the
+    months before. Wallets converted by m003 have no snapshots for their
+    history, and a snapshot the ledger created after that conversion misses
+    the earlier postings of its month, so all of them are recomputed.
+    """
+    if conn.dialect.name == "postgresql":
+        # Postings update the wallet row first, so they wait for the rebuild
+        conn.execute(text("LOCK TABLE wallets IN SHARE MODE"))
+        month = "CAST(date_trunc('month', created_at AT TIME ZONE 'UTC') AS DATE)"
+    else:
+        month = "date(created_at, 'start of month')"
+    conn.execute(text("DELETE FROM wallet_snapshots"))
+    conn.execute(text(
+        "INSERT INTO wallet_snapshots "
+        "(wallet_id, period_start, opening_paise, credits_paise, debits_paise, closing_paise, transaction_count) "
+        "SELECT wallet_id, period_start, "
+        "SUM(credits_paise - debits_paise) OVER w - (credits_paise - debits_paise), "
+        "credits_paise, debits_paise, SUM(credits_paise - debits_paise) OVER w, transaction_count "
+        "FROM ("
+        f"SELECT wallet_id, {month} AS period_start, "
+        "SUM(CASE WHEN type = 'credit' THEN amount_paise ELSE 0 END) AS credits_paise, "
+        "SUM(CASE WHEN type = 'credit' THEN 0 ELSE amount_paise END) AS debits_paise, "
+        "COUNT(*) AS transaction_count "
+        f"FROM transactions GROUP BY wallet_id, {month}"
+        ") AS months "
+        "WINDOW w AS (PARTITION BY wallet_id ORDER BY period_start)"
+    ))
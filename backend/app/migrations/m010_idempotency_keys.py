@@ -0,0 +1,26 @@
+"""Add stored outcomes for Idempotency-Key requests"""
+
+from sqlalchemy import (
+    JSON, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, UniqueConstraint, func,
+)
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    metadata.reflect(bind=conn, only=["users"])
+    Table(
+        "idempotency_keys", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        Column("key", String(255), nullable=False),
+        Column("scope", String(50), nullable=False),
+        Column("request_hash", String(64), nullable=False),
+        Column("status", String(20), nullable=False),
+        Column("response_code", Integer, nullable=True),
+        Column("response_body", JSON, nullable=True),
+        Column("locked_at", DateTime(timezone=True), nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+    metadata.create_all(bind=conn)
@@ -0,0 +1,32 @@
+"""Add the per-departure analytics rollup and its refresh log"""
+
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, func
+
+
+def upgrade(conn):
+    metadata = MetaData()
+    metadata.reflect(bind=conn, only=["bus_schedules"])
+    Table(
+        "schedule_stats", metadata,
+        Column("bus_schedule_id", Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), primary_key=True),
+        Column("travel_date", Date, nullable=False, index=True),
+        Column("route_id", Integer, nullable=False, index=True),
+        Column("operator_id", Integer, nullable=False, index=True),
+        Column("schedule_status", String(20), nullable=False),
+        Column("distance_km", Integer, nullable=False),
+        Column("seats_offered", Integer, nullable=False),
+        Column("seats_sold", Integer, nullable=False),
+        Column("bookings", Integer, nullable=False),
+        Column("cancelled_bookings", Integer, nullable=False),
+        Column("revenue", Float, nullable=False),
+        Column("refreshed_at", DateTime(timezone=True), server_default=func.now()),
+    )
+    Table(
+        "analytics_refreshes", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("mode", String(20), nullable=False),
+        Column("started_at", DateTime(timezone=True), nullable=False),
+        Column("finished_at", DateTime(timezone=True), nullable=False),
+        Column("schedules", Integer, nullable=False),
+    )
+    metadata.create_all(bind=conn)
@@ -1,14 +1,17 @@
 # Models package
 from .user import User
-from .wallet import Wallet, Transaction
-from .bus import Operator, City, Route, Bus, BusSchedule, Seat, BoardingPoint, DroppingPoint
+from .wallet import Wallet, Transaction, WalletSnapshot
+from .bus import Operator, City, Route, Bus, BusSchedule, Seat, BoardingPoint, DroppingPoint, RouteDailyFare
 from .booking import Booking, BookingPassenger
 from .chat import ChatSession, ChatMessage
+from .idempotency import IdempotencyKey
+from .analytics import ScheduleStats, AnalyticsRefresh
 
 __all__ = [
     "User",
     "Wallet",
     "Transaction",
+    "WalletSnapshot",
     "Operator",
     "City",
     "Route",
@@ -17,9 +20,13 @@ __all__ = [
     "Seat",
     "BoardingPoint",
     "DroppingPoint",
+    "RouteDailyFare",
     "Booking",
     "BookingPassenger",
     "ChatSession",
     "ChatMessage",
+    "IdempotencyKey",
+    "ScheduleStats",
+    "AnalyticsRefresh",
 ]
 
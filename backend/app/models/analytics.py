@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class ScheduleStats(Base):
+    """
+    Per-departure rollup of bookings, seats and revenue.
+    Rebuilt set-based by app.services.analytics; never written by request handlers.
+    """
+
+    __tablename__ = "schedule_stats"
+
+    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), primary_key=True)
+    travel_date = Column(Date, nullable=False, index=True)
+    route_id = Column(Integer, nullable=False, index=True)
+    operator_id = Column(Integer, nullable=False, index=True)
+    schedule_status = Column(String(20), nullable=False)
+    distance_km = Column(Integer, nullable=False)
+    seats_offered = Column(Integer, nullable=False)
+    seats_sold = Column(Integer, nullable=False)  # Passengers on paid bookings
+    bookings = Column(Integer, nullable=False)
+    cancelled_bookings = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ScheduleStats schedule_id={self.bus_schedule_id} sold={self.seats_sold}/{self.seats_offered}>"
+
+
+class AnalyticsRefresh(Base):
+    """Log of rollup refreshes; the latest start time is the next incremental watermark."""
+
+    __tablename__ = "analytics_refreshes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    mode = Column(String(20), nullable=False)  # full, incremental
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=False)
+    schedules = Column(Integer, nullable=False)  # Rows rebuilt
+
+    def __repr__(self):
+        return f"<AnalyticsRefresh {self.mode} at={self.started_at} schedules={self.schedules}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -8,17 +8,21 @@ class Booking(Base):
     """Booking model for user ticket reservations."""
     
     __tablename__ = "bookings"
+    __table_args__ = (
+        # A user's bookings, newest first
+        Index("ix_bookings_user_booked_at", "user_id", "booked_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     booking_code = Column(String(10), unique=True, nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id"), nullable=False)
+    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id"), nullable=False, index=True)
     total_amount = Column(Float, nullable=False)
     status = Column(String(20), default="confirmed")  # pending, confirmed, cancelled, completed
     payment_method = Column(String(20), nullable=False)  # wallet, card, upi
     booking_source = Column(String(20), default="app")  # app, agent
-    booked_at = Column(DateTime(timezone=True), server_default=func.now())
-    cancelled_at = Column(DateTime(timezone=True), nullable=True)
+    booked_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    cancelled_at = Column(DateTime(timezone=True), nullable=True, index=True)
 
     # Relationships
     user = relationship("User", back_populates="bookings")
@@ -35,7 +39,7 @@ class BookingPassenger(Base):
     __tablename__ = "booking_passengers"
 
     id = Column(Integer, primary_key=True, index=True)
-    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
     seat_id = Column(Integer, ForeignKey("seats.id"), nullable=False)
     passenger_name = Column(String(100), nullable=False)
     passenger_age = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Date, Time, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Date, Time, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -94,16 +94,21 @@ class BusSchedule(Base):
     """Bus schedule for a specific date and route."""
     
     __tablename__ = "bus_schedules"
+    __table_args__ = (
+        # Search and the fare calendar: a route's departures on a day, in departure order
+        Index("ix_bus_schedules_route_date_departure", "route_id", "travel_date", "departure_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    bus_id = Column(Integer, ForeignKey("buses.id"), nullable=False)
+    bus_id = Column(Integer, ForeignKey("buses.id"), nullable=False, index=True)
     route_id = Column(Integer, ForeignKey("routes.id"), nullable=False)
-    travel_date = Column(Date, nullable=False)
+    travel_date = Column(Date, nullable=False, index=True)
     departure_time = Column(Time, nullable=False)
     arrival_time = Column(Time, nullable=False)
     base_price = Column(Float, nullable=False)
     available_seats = Column(Integer, nullable=False)
     status = Column(String(20), default="scheduled")  # scheduled, departed, completed, cancelled
+    version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped whenever seats or details change
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -124,7 +129,7 @@ class Seat(Base):
     __tablename__ = "seats"
 
     id = Column(Integer, primary_key=True, index=True)
-    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False)
+    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False, index=True)
     seat_number = Column(String(5), nullable=False)
     seat_type = Column(String(20), nullable=False)  # sleeper, semi-sleeper, seater
     price = Column(Float, nullable=False)
@@ -150,7 +155,7 @@ class BoardingPoint(Base):
     __tablename__ = "boarding_points"
 
     id = Column(Integer, primary_key=True, index=True)
-    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False)
+    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     address = Column(String(300), nullable=True)
     landmark = Column(String(200), nullable=True)
@@ -170,7 +175,7 @@ class DroppingPoint(Base):
     __tablename__ = "dropping_points"
 
     id = Column(Integer, primary_key=True, index=True)
-    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False)
+    bus_schedule_id = Column(Integer, ForeignKey("bus_schedules.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     address = Column(String(300), nullable=True)
     landmark = Column(String(200), nullable=True)
@@ -182,3 +187,23 @@ class DroppingPoint(Base):
 
     def __repr__(self):
         return f"<DroppingPoint {self.name}>"
+
+
+class RouteDailyFare(Base):
+    """
+    Per route and travel date: the lowest fare among departures with seats
+    left, and how many departures and seats remain.
+    Maintained by app.services.fares; read by the fare calendar.
+    """
+    
+    __tablename__ = "route_daily_fares"
+
+    route_id = Column(Integer, ForeignKey("routes.id", ondelete="CASCADE"), primary_key=True)
+    travel_date = Column(Date, primary_key=True)
+    min_price = Column(Float, nullable=True)  # None when every departure is full
+    departures = Column(Integer, nullable=False, default=0)  # Scheduled departures
+    available_seats = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<RouteDailyFare route={self.route_id} date={self.travel_date} min={self.min_price}>"
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of a request sent with an Idempotency-Key header.
+    A row is claimed ('in_progress') before the request runs and completed
+    with the response in the same transaction as the request's own writes.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    scope = Column(String(50), nullable=False)  # e.g. 'bookings.create'
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), default="in_progress", nullable=False)  # in_progress, completed
+    response_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey user_id={self.user_id} key={self.key} status={self.status}>"
@@ -1,43 +1,102 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
 
 
 class Wallet(Base):
-    """Wallet model for storing user balance."""
+    """
+    Wallet model for storing user balance.
+    The balance is kept in integer paise and only changed through
+    app.services.ledger, which applies atomic UPDATEs.
+    """
     
     __tablename__ = "wallets"
+    __table_args__ = (
+        CheckConstraint("balance_paise >= 0", name="ck_wallets_balance_non_negative"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
-    balance = Column(Float, default=0.0)
+    balance_paise = Column(BigInteger, default=0, nullable=False)
+    transaction_count = Column(Integer, default=0, nullable=False)  # Maintained by the ledger
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="wallet")
     transactions = relationship("Transaction", back_populates="wallet", cascade="all, delete-orphan")
+    snapshots = relationship("WalletSnapshot", back_populates="wallet", cascade="all, delete-orphan")
+
+    @property
+    def balance(self) -> float:
+        """Balance in rupees (read-only; use the ledger to change it)."""
+        return (self.balance_paise or 0) / 100
 
     def __repr__(self):
         return f"<Wallet user_id={self.user_id} balance={self.balance}>"
 
 
 class Transaction(Base):
-    """Transaction model for wallet credit/debit history."""
+    """Transaction model for wallet credit/debit history (append-only)."""
     
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
     wallet_id = Column(Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
     type = Column(String(10), nullable=False)  # 'credit' or 'debit'
-    amount = Column(Float, nullable=False)
+    amount_paise = Column(BigInteger, nullable=False)
     description = Column(String(255))
     reference_id = Column(Integer, nullable=True)  # booking_id if related
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side at full precision so (created_at, id) cursors compare exactly on every backend
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
 
     # Relationships
     wallet = relationship("Wallet", back_populates="transactions")
 
+    @property
+    def amount(self) -> float:
+        """Amount in rupees."""
+        return self.amount_paise / 100
+
     def __repr__(self):
         return f"<Transaction {self.type} {self.amount}>"
+
+
+class WalletSnapshot(Base):
+    """
+    Per-wallet monthly balance summary, maintained by the ledger alongside
+    every Transaction so statements never have to scan the full history.
+    A month with no activity has no row; its balance is the previous closing.
+    """
+
+    __tablename__ = "wallet_snapshots"
+    __table_args__ = (
+        UniqueConstraint("wallet_id", "period_start", name="uq_wallet_snapshots_wallet_period"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    wallet_id = Column(Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)  # First day of the month (UTC)
+    opening_paise = Column(BigInteger, nullable=False)
+    credits_paise = Column(BigInteger, default=0, nullable=False)
+    debits_paise = Column(BigInteger, default=0, nullable=False)
+    closing_paise = Column(BigInteger, nullable=False)
+    transaction_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    wallet = relationship("Wallet", back_populates="snapshots")
+
+    def __repr__(self):
+        return f"<WalletSnapshot wallet_id={self.wallet_id} period={self.period_start} closing={self.closing_paise}>"
+
+
+# Keyset pagination of a wallet's history, newest first
+Index(
+    "ix_transactions_wallet_created_id",
+    Transaction.wallet_id,
+    Transaction.created_at.desc(),
+    Transaction.id
+)
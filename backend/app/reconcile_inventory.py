@@ -0,0 +1,40 @@
+"""
+Reconcile seat inventory.
+Finds upcoming departures whose available_seats counter disagrees with their
+seat rows, or whose seats are still held by cancelled bookings, and reports
+the drift. With --fix, orphaned seats are released and the counters
+recomputed. Meant to run periodically (e.g. from cron).
+
+Run with: python -m app.reconcile_inventory [--fix] [--from-date YYYY-MM-DD]
+"""
+
+import argparse
+import sys
+from datetime import date
+
+from app.database import SessionLocal
+from app.services.inventory import reconcile_inventory
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check departures' seat counters against their seats")
+    parser.add_argument("--fix", action="store_true", help="Release orphaned seats and recompute counters")
+    parser.add_argument("--from-date", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    print("🔄 Reconciling seat inventory...")
+    db = SessionLocal()
+    try:
+        drifted = reconcile_inventory(db, fix=args.fix, from_date=args.from_date)
+    finally:
+        db.close()
+
+    for row in drifted:
+        print(
+            f"❌ Schedule {row['schedule_id']} ({row['travel_date']}): counter {row['available_seats']}, "
+            f"{row['free_seats']} free seats, {row['orphaned_seats']} held by no booking"
+        )
+    if args.fix and drifted:
+        print(f"🛠️ Repaired {len(drifted)} departures")
+    print(f"✅ {len(drifted)} departures drifted")
+    sys.exit(1 if drifted and not args.fix else 0)
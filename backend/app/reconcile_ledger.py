@@ -0,0 +1,57 @@
+"""
+Verify wallet snapshots against the raw transaction ledger.
+Replays each wallet's transactions, compares the monthly totals and balances
+with its WalletSnapshot rows and the wallet balance, and reports mismatches.
+With --fix, mismatched wallets get their snapshots rebuilt from the ledger
+(also how snapshots are backfilled for history that predates them).
+
+Run with: python -m app.reconcile_ledger [--fix] [--wallet-id ID]
+"""
+
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.models.wallet import Wallet
+from app.services.statements import verify_snapshots, rebuild_snapshots
+
+
+def reconcile_ledger(fix: bool = False, wallet_id: int = None) -> int:
+    print("🔄 Reconciling wallet snapshots with the ledger...")
+    db = SessionLocal()
+    mismatched = 0
+    try:
+        query = db.query(Wallet.id).order_by(Wallet.id)
+        if wallet_id is not None:
+            query = query.filter(Wallet.id == wallet_id)
+        wallet_ids = [row.id for row in query]
+
+        for current_id in wallet_ids:
+            problems = verify_snapshots(db, current_id)
+            db.rollback()
+            if not problems:
+                continue
+
+            mismatched += 1
+            print(f"❌ Wallet {current_id}:")
+            for problem in problems:
+                print(f"   - {problem}")
+            if fix:
+                rebuild_snapshots(db, current_id)
+                db.commit()
+                print(f"🛠️ Rebuilt snapshots for wallet {current_id}")
+
+        print(f"✅ Checked {len(wallet_ids)} wallets, {mismatched} mismatched")
+        return mismatched
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify wallet snapshots against the ledger")
+    parser.add_argument("--fix", action="store_true", help="Rebuild snapshots for mismatched wallets")
+    parser.add_argument("--wallet-id", type=int, default=None)
+    args = parser.parse_args()
+
+    mismatched = reconcile_ledger(fix=args.fix, wallet_id=args.wallet_id)
+    sys.exit(1 if mismatched and not args.fix else 0)
@@ -5,6 +5,7 @@ Run with: python -m app.reset_db
 
 from .database import engine, Base, SessionLocal
 from .models import *  # Import all models to register them
+from .migrations import migrate, schema_version
 from .seed_data import seed_database
 
 
@@ -12,10 +13,11 @@ def reset_database():
     """Drop all tables and recreate them."""
     print("⚠️  Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
+    schema_version.drop(bind=engine, checkfirst=True)
     print("✅ Tables dropped")
     
     print("🔧 Creating tables...")
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
     print("✅ Tables created")
     
     # Now seed
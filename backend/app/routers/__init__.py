@@ -5,6 +5,8 @@ from .bookings import router as bookings_router
 from .wallet import router as wallet_router
 from .agent import router as agent_router
 from .admin import router as admin_router
+from .analytics import router as analytics_router
+from .realtime import router as realtime_router
 
 __all__ = [
     "auth_router",
@@ -13,4 +15,6 @@ __all__ = [
     "wallet_router",
     "agent_router",
     "admin_router",
+    "analytics_router",
+    "realtime_router",
 ]
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 from ..database import get_db
 from ..models.user import User
 from ..models.bus import Bus, Route, BusSchedule, Seat, Operator, City
 from ..models.booking import Booking
-from ..models.wallet import Wallet, Transaction
+from ..models.wallet import Wallet
 from ..schemas.user import UserResponse
 from ..utils.dependencies import get_current_user
+from ..utils.http_client import get_http_client
+from ..services.statements import build_statement, verify_snapshots
+from ..services.stats import get_dashboard_stats
+from ..services.cancellation import (
+    BookingNotFound, BookingNotCancellable, cancel_booking, cancel_schedules, cancel_departures
+)
+from ..services.inventory import bump_versions, inventory_drift, reconcile_inventory
+from ..services.schedule_cache import forget_static_details
+from ..services.search import invalidate_index
+from ..services.export import DATASETS, FORMATS, ExportUnavailable, check_format, stream_export
 from pydantic import BaseModel
 from datetime import date, time
 
@@ -43,18 +54,16 @@ def check_admin(user: User = Depends(get_current_user)):
     return user
 
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
-    total_users = db.query(User).count()
-    total_buses = db.query(Bus).count()
-    total_routes = db.query(Route).count()
-    total_bookings = db.query(Booking).count()
-    
-    return {
-        "users": total_users,
-        "buses": total_buses,
-        "routes": total_routes,
-        "bookings": total_bookings
-    }
+def get_stats(refresh: bool = False, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    stats = get_dashboard_stats()
+    if refresh:
+        stats.refresh(db)
+    return stats.get(db)
+
+@router.get("/metrics/http")
+def get_http_metrics(current_user: User = Depends(check_admin)):
+    """Latency and error counters for outbound HTTP calls (Groq etc.)."""
+    return get_http_client().metrics()
 
 @router.get("/operators")
 def get_operators(db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
@@ -66,6 +75,7 @@ def create_city(city: CityCreate, db: Session = Depends(get_db), current_user: U
     db_city = City(**city.dict())
     db.add(db_city)
     db.commit()
+    invalidate_index()
     db.refresh(db_city)
     return db_city
 
@@ -90,6 +100,8 @@ def update_bus(bus_id: int, bus: BusCreate, db: Session = Depends(get_db), curre
     
     for key, value in bus.dict().items():
         setattr(db_bus, key, value)
+    # Departures embed the bus details
+    forget_static_details(db, bump_versions(db, bus_id=bus_id))
     
     db.commit()
     db.refresh(db_bus)
@@ -115,6 +127,7 @@ def create_route(route: RouteCreate, db: Session = Depends(get_db), current_user
     db_route = Route(**route.dict())
     db.add(db_route)
     db.commit()
+    invalidate_index()
     db.refresh(db_route)
     return db_route
 
@@ -126,6 +139,7 @@ def delete_route(route_id: int, db: Session = Depends(get_db), current_user: Use
     
     db.delete(db_route)
     db.commit()
+    invalidate_index()
     return {"message": "Route deleted successfully"}
 
 # Ticket Management
@@ -133,16 +147,75 @@ def delete_route(route_id: int, db: Session = Depends(get_db), current_user: Use
 def get_bookings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
     return db.query(Booking).offset(skip).limit(limit).all()
 
+@router.get("/export/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: User = Depends(check_admin)
+):
+    """
+    Stream a whole dataset (bookings, passengers, schedules, transactions) as
+    CSV, Parquet or Arrow IPC, optionally limited to a date range.
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset. Choose from: {', '.join(DATASETS)}")
+    try:
+        check_format(format)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    media_type, extension = FORMATS[format]
+    return StreamingResponse(
+        stream_export(dataset, format, start_date, end_date),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
+
 @router.put("/bookings/{booking_id}/cancel")
 def cancel_booking_admin(booking_id: int, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if not booking:
+    try:
+        booking = cancel_booking(
+            db,
+            booking_id,
+            refund_description="Refund: Cancelled by operator (Booking #{code})"
+        )
+    except BookingNotFound:
         raise HTTPException(status_code=404, detail="Booking not found")
-    
-    booking.status = "cancelled"
-    # Logic to refund should be here usually
+    except BookingNotCancellable as e:
+        raise HTTPException(status_code=400, detail=str(e))
     db.commit()
-    return {"message": "Booking cancelled by admin"}
+    return {"message": "Booking cancelled by admin", "booking_code": booking.booking_code}
+
+# Seat inventory
+@router.get("/inventory/drift")
+def get_inventory_drift(from_date: Optional[date] = None, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    drifted = inventory_drift(db, from_date)
+    return {"drifted": len(drifted), "schedules": drifted}
+
+@router.post("/inventory/reconcile")
+def reconcile_seat_inventory(from_date: Optional[date] = None, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    drifted = reconcile_inventory(db, fix=True, from_date=from_date)
+    return {"repaired": len(drifted), "schedules": drifted}
+
+# Wallet support
+@router.get("/wallets/{user_id}/statement")
+def get_wallet_statement(user_id: int, start_date: date, end_date: date, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    return build_statement(db, wallet, start_date, end_date)
+
+@router.get("/wallets/{user_id}/reconcile")
+def reconcile_wallet_snapshots(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    problems = verify_snapshots(db, wallet.id)
+    return {"wallet_id": wallet.id, "consistent": not problems, "problems": problems}
 
 # Schedule Management
 class ScheduleCreate(BaseModel):
@@ -255,42 +328,28 @@ def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db), cur
     db.refresh(db_schedule)
     return db_schedule
 
+class DepartureCancel(BaseModel):
+    travel_date: date
+    route_id: Optional[int] = None
+    bus_id: Optional[int] = None
+
+@router.post("/schedules/cancel")
+def cancel_departures_for_day(request: DepartureCancel, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    """Cancel every scheduled departure on a day (optionally one route or bus), refunding all bookings."""
+    return cancel_departures(db, request.travel_date, route_id=request.route_id, bus_id=request.bus_id)
+
 @router.delete("/schedules/{schedule_id}")
 def delete_schedule(schedule_id: int, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
     schedule = db.query(BusSchedule).filter(BusSchedule.id == schedule_id).first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
-    
-    # Process refunds for confirmed bookings
-    bookings = db.query(Booking).filter(
-        Booking.bus_schedule_id == schedule_id,
-        Booking.status == "confirmed"
-    ).all()
-
-    for booking in bookings:
-        # Only refund if paid by wallet (or implement other refund logic if needed)
-        # For now assuming wallet is the primary refundable method in this system
-        # or simplified to wallet refund for all for this task if appropriate, 
-        # but safely checking payment method is better.
-        # Actually, user said "refund", implying we should give money back.
-        # If payment_method is 'wallet', we refund to wallet.
-        if booking.payment_method == "wallet":
-            wallet = db.query(Wallet).filter(Wallet.user_id == booking.user_id).first()
-            if wallet:
-                wallet.balance += booking.total_amount
-                transaction = Transaction(
-                    wallet_id=wallet.id,
-                    type="credit",
-                    amount=booking.total_amount,
-                    description=f"Refund: Schedule Cancelled (Booking #{booking.booking_code})",
-                    reference_id=booking.id
-                )
-                db.add(transaction)
-    
-    # Delete all bookings associated with this schedule to satisfy foreign key constraints
-    # We do this after processing refunds
-    db.query(Booking).filter(Booking.bus_schedule_id == schedule_id).delete()
-    
-    db.delete(schedule)
-    db.commit()
-    return {"message": "Schedule deleted and refunds processed successfully"}
+    if schedule.status == "cancelled":
+        raise HTTPException(status_code=400, detail="Schedule is already cancelled")
+
+    # Bookings keep pointing at the departure, so it is cancelled rather than deleted
+    result = cancel_schedules(db, [schedule_id])
+    return {
+        "message": "Schedule cancelled and refunds processed successfully",
+        "bookings_cancelled": result["bookings"],
+        "refunds": result["refunds"],
+    }
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import AsyncIterator, Callable, Optional, List, Union
 import uuid
-import os
+from ..config import get_settings
 from ..database import get_db
 from ..models.user import User
 from ..models.chat import ChatSession, ChatMessage
 from ..utils.dependencies import get_current_user
+from ..utils.cache import TTLCache
+from ..utils.db_timing import DBTimer, track_db_time
+from ..utils.audio import (
+    AudioConversionError, AudioTooLarge,
+    downmix_16k_mono, ffmpeg_available, iter_upload, limit_stream, replay_upload
+)
+from ..utils.transcription_cache import cache_key, get_transcription_cache, hashing_stream, new_hasher
 
 router = APIRouter(prefix="/agent", tags=["AI Agent"])
 
@@ -32,60 +40,87 @@ class ChatHistoryResponse(BaseModel):
     created_at: str
 
 
+# Number of previous messages handed to the agent as context
+CHAT_HISTORY_WINDOW = 10
+
+# (user_id, session_id) -> chat_sessions.id; is_active is re-checked by every history read
+_session_cache = TTLCache(maxsize=10000, ttl=60.0)
+
+
+def _find_session_pk(db: Session, user_id: int, session_id: str) -> int:
+    """Resolve an active session to its primary key, via the session cache."""
+    session_pk = _session_cache.get((user_id, session_id))
+    if session_pk is not None:
+        return session_pk
+    
+    row = db.query(ChatSession.id).filter(
+        ChatSession.session_id == session_id,
+        ChatSession.user_id == user_id,
+        ChatSession.is_active == True
+    ).first()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found or expired"
+        )
+    
+    _session_cache.set((user_id, session_id), row.id)
+    return row.id
+
+
+def _recent_messages(db: Session, session_pk: int) -> List[dict]:
+    """The last CHAT_HISTORY_WINDOW messages, oldest first; none once the session has ended."""
+    recent = db.query(ChatMessage.role, ChatMessage.content).join(
+        ChatSession, ChatSession.id == ChatMessage.session_id
+    ).filter(
+        ChatMessage.session_id == session_pk,
+        ChatSession.is_active == True
+    ).order_by(ChatMessage.id.desc()).limit(CHAT_HISTORY_WINDOW).all()
+    return [{"role": m.role, "content": m.content} for m in reversed(recent)]
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(
     request: ChatRequest,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Chat with the AI agent for bus booking.
     Agent can search buses, book tickets, check wallet, etc.
+    Both messages of a turn are written in a single transaction after the
+    agent answers; DB time spent on chat persistence is reported in Server-Timing.
     """
-    # Get or create session
-    if request.session_id:
-        session = db.query(ChatSession).filter(
-            ChatSession.session_id == request.session_id,
-            ChatSession.user_id == current_user.id,
-            ChatSession.is_active == True
-        ).first()
-        
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Chat session not found or expired"
-            )
-    else:
-        # Create new session
-        session = ChatSession(
-            user_id=current_user.id,
-            session_id=str(uuid.uuid4())
-        )
-        db.add(session)
-        db.commit()
-        db.refresh(session)
-    
-    # Save user message
-    user_message = ChatMessage(
-        session_id=session.id,
-        role="user",
-        content=request.message
-    )
-    db.add(user_message)
-    db.commit()
+    user_id = current_user.id
+    db_timer = DBTimer()
     
-    # Get chat history for context
-    history_messages = db.query(ChatMessage).filter(
-        ChatMessage.session_id == session.id
-    ).order_by(ChatMessage.created_at).all()
+    with track_db_time(db_timer):
+        if request.session_id:
+            session_id = request.session_id
+            session_pk = _find_session_pk(db, user_id, session_id)
+            chat_history = _recent_messages(db, session_pk)
+            if not chat_history:
+                # Sessions are written with their first messages, so the
+                # cached session was ended (possibly by another worker)
+                _session_cache.pop((user_id, session_id))
+                session_pk = _find_session_pk(db, user_id, session_id)
+                chat_history = _recent_messages(db, session_pk)
+        else:
+            # New sessions are only written together with their first messages
+            session_id = str(uuid.uuid4())
+            session_pk = None
+            chat_history = []
+        
+        # End the read transaction so no connection is held during the LLM call
+        db.rollback()
     
-    chat_history = [
-        {"role": m.role, "content": m.content}
-        for m in history_messages[:-1]  # Exclude the just-added user message
-    ]
+    # Check if the model provider is available (imported lazily to keep the
+    # LangChain stack off the startup path)
+    from ..agent.providers import get_provider
     
-    # Check if GROQ_API_KEY is available
-    if not os.getenv("GROQ_API_KEY"):
+    if not get_provider().is_configured():
         response_text = "⚠️ AI Agent is not configured. Please set GROQ_API_KEY environment variable."
     else:
         try:
@@ -93,27 +128,37 @@ async def chat_with_agent(
             from ..agent import get_agent
             
             agent = get_agent()
-            response_text = agent.chat(
+            # The agent and its tools block, so keep them off the event loop
+            response_text = await run_in_threadpool(
+                agent.chat,
                 message=request.message,
-                user_id=current_user.id,
-                session_id=session.session_id,
+                user_id=user_id,
+                session_id=session_id,
                 chat_history=chat_history
             )
         except Exception as e:
             print(f"Agent error: {str(e)}")
             response_text = f"I encountered an error processing your request. Please try again. Error: {str(e)}"
     
-    # Save assistant response
-    assistant_message = ChatMessage(
-        session_id=session.id,
-        role="assistant",
-        content=response_text
-    )
-    db.add(assistant_message)
-    db.commit()
+    with track_db_time(db_timer):
+        if session_pk is None:
+            session = ChatSession(user_id=user_id, session_id=session_id)
+            db.add(session)
+            db.flush()
+            session_pk = session.id
+        
+        # Save the user message and the assistant response in one transaction
+        db.add_all([
+            ChatMessage(session_id=session_pk, role="user", content=request.message),
+            ChatMessage(session_id=session_pk, role="assistant", content=response_text),
+        ])
+        db.commit()
+    
+    _session_cache.set((user_id, session_id), session_pk)
+    response.headers["Server-Timing"] = db_timer.server_timing()
     
     return ChatResponse(
-        session_id=session.session_id,
+        session_id=session_id,
         message=response_text
     )
 
@@ -159,7 +204,7 @@ async def get_chat_history(
     
     messages = db.query(ChatMessage).filter(
         ChatMessage.session_id == session.id
-    ).order_by(ChatMessage.created_at).all()
+    ).order_by(ChatMessage.created_at, ChatMessage.id).all()
     
     return [
         ChatHistoryResponse(
@@ -193,6 +238,7 @@ async def end_chat_session(
     session.is_active = False
     session.ended_at = datetime.utcnow()
     db.commit()
+    _session_cache.pop((current_user.id, session_id))
     
     return {"message": "Session ended successfully"}
 
@@ -203,138 +249,141 @@ class TranscriptionResponse(BaseModel):
     language: Optional[str] = None
 
 
-@router.post("/transcribe", response_model=TranscriptionResponse)
-async def transcribe_audio(
-    audio_file: bytes,
-    current_user: User = Depends(get_current_user)
-):
+async def _transcribe(
+    filename: str,
+    source: Union[AsyncIterator[bytes], Callable[[], AsyncIterator[bytes]]],
+    content_type: str
+) -> dict:
     """
-    Transcribe audio using Groq's Whisper model.
-    Supports multiple languages including English, Hindi, Kannada, and Telugu.
+    Stream audio chunks through the configured provider, mapping its errors to HTTP.
+    The stream is size-bounded and optionally downmixed to 16kHz mono first.
+    source is a one-shot chunk stream, or a callable returning a fresh one
+    (which lets the provider retry the upload).
     """
-    import httpx
-    import base64
-    import tempfile
+    from ..agent.providers import get_provider, ProviderError, ProviderNotConfigured, ProviderTimeout
     
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    if not groq_api_key:
+    settings = get_settings()
+    downmix = settings.audio_resample_16k_mono and ffmpeg_available()
+    if downmix:
+        filename = filename.rsplit(".", 1)[0] + ".flac"
+        content_type = "audio/flac"
+
+    def prepare(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        chunks = limit_stream(chunks, settings.max_audio_upload_bytes)
+        return downmix_16k_mono(chunks) if downmix else chunks
+
+    content = (lambda: prepare(source())) if callable(source) else prepare(source)
+    try:
+        result = await get_provider().transcribe(filename, content, content_type)
+    except AudioTooLarge as e:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Transcription service not configured. GROQ_API_KEY not set."
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
         )
-    
-    try:
-        # Create a temporary file for the audio
-        with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as tmp_file:
-            tmp_file.write(audio_file)
-            tmp_file_path = tmp_file.name
-        
-        # Call Groq's Whisper API
-        async with httpx.AsyncClient() as client:
-            with open(tmp_file_path, "rb") as f:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/audio/transcriptions",
-                    headers={
-                        "Authorization": f"Bearer {groq_api_key}",
-                    },
-                    files={
-                        "file": ("audio.m4a", f, "audio/m4a"),
-                    },
-                    data={
-                        "model": "whisper-large-v3",
-                        "response_format": "json",
-                    },
-                    timeout=60.0
-                )
-        
-        # Clean up temp file
-        import os as os_module
-        os_module.unlink(tmp_file_path)
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Transcription failed: {response.text}"
-            )
-        
-        result = response.json()
-        return TranscriptionResponse(
-            text=result.get("text", ""),
-            language=result.get("language")
+    except AudioConversionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
         )
-        
-    except httpx.TimeoutException:
+    except ProviderNotConfigured as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except ProviderTimeout as e:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail="Transcription timed out. Please try again."
+            detail=str(e)
+        )
+    except ProviderError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Transcription error: {str(e)}"
         )
+    
+    return {"text": result.get("text", ""), "language": result.get("language")}
+
+
+def _provider_name() -> str:
+    from ..agent.providers import get_provider
+    
+    return get_provider().name
 
 
-from fastapi import File, UploadFile
+@router.post("/transcribe", response_model=TranscriptionResponse)
+async def transcribe_audio(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Transcribe a raw audio request body using the configured Whisper provider.
+    The body is streamed to the transcriber as it arrives. Clients retrying a
+    voice note can send its SHA-256 as X-Audio-SHA256 to skip the upload.
+    Supports multiple languages including English, Hindi, Kannada, and Telugu.
+    """
+    content_type = request.headers.get("content-type") or "audio/m4a"
+    if content_type.startswith("multipart/"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send the raw audio body here, or use /agent/transcribe-upload for form uploads"
+        )
+    
+    cache = get_transcription_cache()
+    provider_name = _provider_name()
+    client_digest = request.headers.get("x-audio-sha256")
+    if client_digest:
+        cached = cache.get(cache_key(provider_name, client_digest.lower()))
+        if cached is not None:
+            response.headers["X-Cache"] = "HIT"
+            return TranscriptionResponse(**cached)
+    
+    # Hash what actually arrives; the client's digest is only used for lookups
+    hasher = new_hasher()
+    result = await _transcribe("audio.m4a", hashing_stream(request.stream(), hasher), content_type)
+    cache.put(cache_key(provider_name, hasher.hexdigest()), result)
+    
+    response.headers["X-Cache"] = "MISS"
+    return TranscriptionResponse(**result)
+
 
 @router.post("/transcribe-upload", response_model=TranscriptionResponse)
 async def transcribe_audio_upload(
+    response: Response,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Transcribe uploaded audio file using Groq's Whisper model.
+    Transcribe uploaded audio file using the configured Whisper provider.
+    The upload is spooled by the multipart parser, hashed for the result cache,
+    and streamed on in chunks on a miss (replayed from the spool if the
+    upstream call is retried).
     Supports multiple languages including English, Hindi, Kannada, and Telugu.
     """
-    import httpx
+    hasher = new_hasher()
+    async for chunk in iter_upload(file):
+        hasher.update(chunk)
+    key = cache_key(_provider_name(), hasher.hexdigest())
     
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    if not groq_api_key:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Transcription service not configured. GROQ_API_KEY not set."
-        )
+    cache = get_transcription_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        response.headers["X-Cache"] = "HIT"
+        return TranscriptionResponse(**cached)
     
-    try:
-        # Read the uploaded file
-        audio_content = await file.read()
-        
-        # Call Groq's Whisper API
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.groq.com/openai/v1/audio/transcriptions",
-                headers={
-                    "Authorization": f"Bearer {groq_api_key}",
-                },
-                files={
-                    "file": (file.filename or "audio.m4a", audio_content, file.content_type or "audio/m4a"),
-                },
-                data={
-                    "model": "whisper-large-v3",
-                    "response_format": "json",
-                },
-                timeout=60.0
-            )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Transcription failed: {response.text}"
-            )
-        
-        result = response.json()
-        return TranscriptionResponse(
-            text=result.get("text", ""),
-            language=result.get("language")
-        )
-        
-    except httpx.TimeoutException:
-        raise HTTPException(
-            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail="Transcription timed out. Please try again."
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Transcription error: {str(e)}"
-        )
+    result = await _transcribe(
+        file.filename or "audio.m4a",
+        lambda: replay_upload(file),
+        file.content_type or "audio/m4a"
+    )
+    cache.put(key, result)
+    
+    response.headers["X-Cache"] = "MISS"
+    return TranscriptionResponse(**result)
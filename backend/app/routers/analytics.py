@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date, timedelta
+from ..config import get_settings
+from ..database import get_db
+from ..models.user import User
+from ..services.analytics import GROUPINGS, ensure_fresh, refresh_rollups, summarize
+from .admin import check_admin
+
+router = APIRouter(prefix="/admin/analytics", tags=["Analytics"])
+
+GROUP_BY_PATTERN = f"^({'|'.join(GROUPINGS)})$"
+
+
+def _report(db: Session, group_by: str, start_date: Optional[date], end_date: Optional[date],
+            route_id: Optional[int], operator_id: Optional[int], fields: tuple) -> dict:
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=30)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    ensure_fresh(db, get_settings().analytics_refresh_seconds)
+    rows = summarize(db, group_by, start_date, end_date, route_id=route_id, operator_id=operator_id)
+    keep = (group_by, "label", "departures") + fields
+    return {
+        "group_by": group_by,
+        "start_date": start_date,
+        "end_date": end_date,
+        "rows": [{name: row[name] for name in keep} for row in rows],
+    }
+
+
+@router.get("/load-factor")
+def get_load_factor(
+    group_by: str = Query("route", pattern=GROUP_BY_PATTERN),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    route_id: Optional[int] = None,
+    operator_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin)
+):
+    """Seats sold / seats offered per route, operator or travel day."""
+    return _report(db, group_by, start_date, end_date, route_id, operator_id,
+                   ("seats_offered", "seats_sold", "load_factor"))
+
+
+@router.get("/revenue")
+def get_revenue(
+    group_by: str = Query("route", pattern=GROUP_BY_PATTERN),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    route_id: Optional[int] = None,
+    operator_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin)
+):
+    """Revenue per offered and per sold seat-km."""
+    return _report(db, group_by, start_date, end_date, route_id, operator_id,
+                   ("revenue", "seat_km_offered", "revenue_per_seat_km", "revenue_per_sold_seat_km"))
+
+
+@router.get("/cancellations")
+def get_cancellations(
+    group_by: str = Query("route", pattern=GROUP_BY_PATTERN),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    route_id: Optional[int] = None,
+    operator_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin)
+):
+    """Share of bookings that were cancelled."""
+    return _report(db, group_by, start_date, end_date, route_id, operator_id,
+                   ("bookings", "cancelled_bookings", "cancellation_rate"))
+
+
+@router.post("/refresh")
+def refresh_analytics(full: bool = False, db: Session = Depends(get_db), current_user: User = Depends(check_admin)):
+    refresh = refresh_rollups(db, full=full)
+    return {
+        "mode": refresh.mode,
+        "schedules": refresh.schedules,
+        "started_at": refresh.started_at,
+        "finished_at": refresh.finished_at,
+    }
@@ -46,7 +46,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.refresh(user)
     
     # Create wallet for user
-    wallet = Wallet(user_id=user.id, balance=0.0)
+    wallet = Wallet(user_id=user.id, balance_paise=0)
     db.add(wallet)
     db.commit()
     
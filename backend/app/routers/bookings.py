@@ -4,18 +4,20 @@ from sqlalchemy import func
 from typing import List
 import random
 import string
-from datetime import datetime
 from ..database import get_db
 from ..models.user import User
 from ..models.bus import BusSchedule, Seat, BoardingPoint, DroppingPoint
 from ..models.booking import Booking, BookingPassenger
-from ..models.wallet import Wallet, Transaction
+from ..models.wallet import Wallet
 from ..schemas.booking import (
     BookingCreate, BookingResponse, BookingListResponse, 
     BookingPassengerResponse, BookingDetailResponse,
     BoardingPointInfo, DroppingPointInfo
 )
-from ..utils.dependencies import get_current_user
+from ..utils.dependencies import get_current_user, idempotency, replay_response
+from ..services import cancellation, inventory, ledger
+from ..services.idempotency import IdempotencyClaim
+from ..services.ledger import InsufficientBalance, to_paise
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
@@ -31,9 +33,13 @@ def generate_booking_code() -> str:
 async def create_booking(
     booking_data: BookingCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    claim: IdempotencyClaim = Depends(idempotency("bookings.create"))
 ):
-    """Create a new booking."""
+    """Create a new booking. Send an Idempotency-Key header to make retries safe."""
+    if claim.is_replay:
+        return replay_response(claim)
+    
     # Get bus schedule
     schedule = db.query(BusSchedule).filter(
         BusSchedule.id == booking_data.bus_schedule_id
@@ -72,29 +78,28 @@ async def create_booking(
             detail=f"Seats {', '.join(unavailable_seats)} are not available"
         )
     
-    # Calculate total amount
-    total_amount = sum(seat.price for seat in seats)
+    # Take the seats only if they are still free; a concurrent booking of the same seat loses here
+    taken = inventory.take_seats(db, schedule.id, seat_ids)
+    if len(taken) != len(seat_ids):
+        db.rollback()
+        lost = [s.seat_number for s in seats if s.id not in taken]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Seats {', '.join(lost)} are not available"
+        )
+    
+    # Calculate total amount in paise so seat prices add up exactly
+    total_paise = sum(to_paise(seat.price) for seat in seats)
+    total_amount = total_paise / 100
     
-    # If wallet payment, check balance
+    # If wallet payment, make sure the user has a wallet
     if booking_data.payment_method == "wallet":
         wallet = db.query(Wallet).filter(Wallet.user_id == current_user.id).first()
-        if not wallet or wallet.balance < total_amount:
+        if not wallet:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient wallet balance"
             )
-        
-        # Deduct from wallet
-        wallet.balance -= total_amount
-        
-        # Create transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type="debit",
-            amount=total_amount,
-            description=f"Booking payment"
-        )
-        db.add(transaction)
     
     # Create booking
     booking = Booking(
@@ -109,16 +114,20 @@ async def create_booking(
     db.add(booking)
     db.flush()  # Get booking ID
     
-    # Update transaction reference
+    # Deduct from wallet atomically; fails if the balance is too low
     if booking_data.payment_method == "wallet":
-        transaction.reference_id = booking.id
+        try:
+            ledger.debit(db, wallet.id, total_paise, "Booking payment", reference_id=booking.id)
+        except InsufficientBalance:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient wallet balance"
+            )
     
-    # Create passengers and mark seats as unavailable
+    # Create passengers (their seats were taken above)
     seat_map = {s.id: s for s in seats}
     for passenger in booking_data.passengers:
-        seat = seat_map[passenger.seat_id]
-        seat.is_available = False
-        
         booking_passenger = BookingPassenger(
             booking_id=booking.id,
             seat_id=passenger.seat_id,
@@ -128,10 +137,10 @@ async def create_booking(
         )
         db.add(booking_passenger)
     
-    # Update available seats count
-    schedule.available_seats -= len(seats)
+    # Update the seat count and notify seat map subscribers
+    inventory.adjust_available(db, schedule.id, taken=seat_ids)
     
-    db.commit()
+    db.flush()
     db.refresh(booking)
     
     # Build response with seat numbers
@@ -147,7 +156,7 @@ async def create_booking(
             passenger_gender=bp.passenger_gender
         ))
     
-    return BookingResponse(
+    response = BookingResponse(
         id=booking.id,
         booking_code=booking.booking_code,
         total_amount=booking.total_amount,
@@ -159,6 +168,12 @@ async def create_booking(
         bus_schedule_id=booking.bus_schedule_id,
         passengers=passengers_response
     )
+    
+    # Stored with the booking so a retry can never book or charge twice
+    claim.complete(db, response, status.HTTP_201_CREATED)
+    db.commit()
+    
+    return response
 
 
 @router.get("", response_model=BookingListResponse)
@@ -376,69 +391,26 @@ async def get_booking_details(
 async def cancel_booking(
     booking_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    claim: IdempotencyClaim = Depends(idempotency("bookings.cancel"))
 ):
-    """Cancel a booking and refund to wallet."""
-    booking = db.query(Booking).options(
-        joinedload(Booking.passengers)
-    ).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    """Cancel a booking and refund to wallet. Send an Idempotency-Key header to make retries safe."""
+    if claim.is_replay:
+        return replay_response(claim)
     
-    if not booking:
+    try:
+        booking = cancellation.cancel_booking(db, booking_id, user_id=current_user.id)
+    except cancellation.BookingNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Booking not found"
         )
-    
-    if booking.status == "cancelled":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Booking is already cancelled"
-        )
-    
-    if booking.status == "completed":
+    except cancellation.BookingNotCancellable as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot cancel a completed booking"
+            detail=str(e)
         )
     
-    # Mark booking as cancelled
-    booking.status = "cancelled"
-    booking.cancelled_at = datetime.utcnow()
-    
-    # Release seats and get schedule
-    schedule = db.query(BusSchedule).filter(
-        BusSchedule.id == booking.bus_schedule_id
-    ).first()
-    
-    for passenger in booking.passengers:
-        seat = db.query(Seat).filter(Seat.id == passenger.seat_id).first()
-        if seat:
-            seat.is_available = True
-    
-    if schedule:
-        schedule.available_seats += len(booking.passengers)
-    
-    # Refund to wallet if paid by wallet
-    if booking.payment_method == "wallet":
-        wallet = db.query(Wallet).filter(Wallet.user_id == current_user.id).first()
-        if wallet:
-            wallet.balance += booking.total_amount
-            
-            transaction = Transaction(
-                wallet_id=wallet.id,
-                type="credit",
-                amount=booking.total_amount,
-                description=f"Refund for cancelled booking #{booking.booking_code}",
-                reference_id=booking.id
-            )
-            db.add(transaction)
-    
-    db.commit()
-    db.refresh(booking)
-    
     passengers_response = []
     for bp in booking.passengers:
         seat = db.query(Seat).filter(Seat.id == bp.seat_id).first()
@@ -451,7 +423,7 @@ async def cancel_booking(
             passenger_gender=bp.passenger_gender
         ))
     
-    return BookingResponse(
+    response = BookingResponse(
         id=booking.id,
         booking_code=booking.booking_code,
         total_amount=booking.total_amount,
@@ -463,3 +435,8 @@ async def cancel_booking(
         bus_schedule_id=booking.bus_schedule_id,
         passengers=passengers_response
     )
+    
+    claim.complete(db, response)
+    db.commit()
+    
+    return response
@@ -1,20 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
-from typing import List, Optional
-from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, select
+from typing import List, Literal, Optional
+from datetime import date, timedelta
+from ..config import get_settings
 from ..database import get_db
-from ..models.bus import City, Route, Operator, Bus, BusSchedule, Seat
+from ..models.bus import City, BusSchedule, Seat, BoardingPoint, DroppingPoint
 from ..schemas.bus import (
     CityResponse, 
     BusScheduleResponse, 
     BusSearchRequest,
+    BusSearchFilters,
+    BusSearchPage,
     SeatResponse,
-    BusScheduleDetailResponse
+    BoardingPointResponse,
+    DroppingPointResponse,
+    BusScheduleDetailResponse,
+    FareCalendarDay,
+    JourneyResponse
 )
+from ..utils.serialization import columns
+from ..utils.conditional import make_etag, etag_matches, etag_headers, not_modified
+from ..services.schedule_cache import static_detail, merge_live
+from ..services import journeys as journeys_service
+from ..services.fares import fare_calendar
+from ..services.search import CityEntry, departures, faceted_search, get_index, schedule_dict, schedule_query
 
 router = APIRouter(prefix="/buses", tags=["Buses"])
 
+def _seat_rows(db: Session, schedule_id: int) -> List[dict]:
+    rows = db.execute(
+        select(*columns(SeatResponse, Seat)).where(
+            Seat.bus_schedule_id == schedule_id
+        ).order_by(Seat.deck, Seat.row_number, Seat.column_number)
+    ).mappings()
+    return [dict(row) for row in rows]
+
+
+def _schedule_version(db: Session, schedule_id: int) -> int:
+    """The departure's version, raising 404 if it does not exist."""
+    version = db.query(BusSchedule.version).filter(BusSchedule.id == schedule_id).scalar()
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bus schedule not found"
+        )
+    return version
+
+
+def _schedule_detail(db: Session, schedule_id: int) -> Optional[dict]:
+    """BusScheduleDetailResponse-shaped dict, or None if the departure does not exist."""
+    row = db.execute(
+        schedule_query().where(BusSchedule.id == schedule_id)
+    ).mappings().first()
+    if not row:
+        return None
+
+    # Separate queries instead of one join across three collections
+    detail = schedule_dict(row)
+    detail["seats"] = _seat_rows(db, schedule_id)
+    for key, model, schema in (
+        ("boarding_points", BoardingPoint, BoardingPointResponse),
+        ("dropping_points", DroppingPoint, DroppingPointResponse),
+    ):
+        points = db.execute(
+            select(*columns(schema, model)).where(model.bus_schedule_id == schedule_id).order_by(model.id)
+        ).mappings()
+        detail[key] = [dict(point) for point in points]
+    return detail
+
+
+def _find_city(db: Session, query: str) -> CityEntry:
+    """City by code or name, raising 404 if there is none."""
+    city = get_index(db).find_city(query)
+    
+    if not city:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"City '{query}' not found"
+        )
+    return city
+
+
+def _find_route(db: Session, from_city: str, to_city: str) -> int:
+    """Id of the active direct route between two cities (code or name), raising 404 if there is none."""
+    origin = _find_city(db, from_city)
+    destination = _find_city(db, to_city)
+    route_id = get_index(db).find_route(origin.id, destination.id)
+    
+    if not route_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No route found from {origin.name} to {destination.name}"
+        )
+    return route_id
+
 
 @router.get("/cities", response_model=List[CityResponse])
 async def get_cities(
@@ -36,8 +118,8 @@ async def get_cities(
     if popular_only:
         query = query.filter(City.is_popular == True)
     
-    cities = query.order_by(City.name).limit(20).all()
-    return [CityResponse.model_validate(city) for city in cities]
+    cities = query.with_entities(*columns(CityResponse, City)).order_by(City.name).limit(20)
+    return ORJSONResponse([dict(row._mapping) for row in cities])
 
 
 @router.post("/search", response_model=List[BusScheduleResponse])
@@ -46,96 +128,126 @@ async def search_buses(
     db: Session = Depends(get_db)
 ):
     """Search for buses between cities on a specific date."""
-    # Find from city
-    from_city = db.query(City).filter(
-        or_(
-            City.code.ilike(search_data.from_city),
-            City.name.ilike(f"%{search_data.from_city}%")
-        )
-    ).first()
-    
-    if not from_city:
+    route_id = _find_route(db, search_data.from_city, search_data.to_city)
+    return ORJSONResponse(departures(db, route_id, search_data.travel_date))
+
+
+@router.post("/search/faceted", response_model=BusSearchPage)
+async def search_buses_faceted(
+    search_data: BusSearchFilters,
+    db: Session = Depends(get_db)
+):
+    """
+    Search with server-side filters (bus type, operator, amenities, departure
+    window, price, seats), sorting and paging. Facet counts for the filter UI
+    come from the same departures.
+    """
+    route_id = _find_route(db, search_data.from_city, search_data.to_city)
+    return ORJSONResponse(faceted_search(departures(db, route_id, search_data.travel_date), search_data))
+
+
+@router.get("/fare-calendar", response_model=List[FareCalendarDay])
+async def get_fare_calendar(
+    from_city: str = Query(..., description="City code or name"),
+    to_city: str = Query(..., description="City code or name"),
+    start_date: Optional[date] = Query(None, description="First day (default today)"),
+    days: int = Query(30, ge=1, le=60),
+    db: Session = Depends(get_db)
+):
+    """Lowest fare and seats left per day on a direct route, for picking the cheapest date."""
+    route_id = _find_route(db, from_city, to_city)
+    start_date = max(start_date or date.today(), date.today())
+    return ORJSONResponse(fare_calendar(db, route_id, start_date, days))
+
+
+@router.get("/journeys", response_model=List[JourneyResponse])
+async def plan_journeys(
+    from_city: str = Query(..., description="City code or name"),
+    to_city: str = Query(..., description="City code or name"),
+    travel_date: date = Query(...),
+    passengers: int = Query(1, ge=1, le=6),
+    max_transfers: int = Query(2, ge=0, le=3),
+    sort_by: Literal["arrival", "price", "transfers"] = Query("arrival"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Direct and connecting journeys between two cities, including pairs with
+    no direct route. Returns the journeys not beaten on arrival, price and
+    transfers together, ordered by sort_by.
+    """
+    origin = _find_city(db, from_city)
+    destination = _find_city(db, to_city)
+    if origin.id == destination.id:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"City '{search_data.from_city}' not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Origin and destination must differ"
         )
     
-    # Find to city
-    to_city = db.query(City).filter(
-        or_(
-            City.code.ilike(search_data.to_city),
-            City.name.ilike(f"%{search_data.to_city}%")
-        )
-    ).first()
-    
-    if not to_city:
+    window_days = get_settings().journey_window_days
+    if not date.today() <= travel_date < date.today() + timedelta(days=window_days):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"City '{search_data.to_city}' not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Journeys can be planned for the next {window_days} days"
         )
     
-    # Find route
-    route = db.query(Route).filter(
-        Route.from_city_id == from_city.id,
-        Route.to_city_id == to_city.id,
-        Route.is_active == True
+    # Building or refreshing the timetable loads a window of departures; keep it off the event loop
+    journeys = await run_in_threadpool(
+        journeys_service.plan_journeys, origin.id, destination.id, travel_date,
+        passengers=passengers, max_transfers=max_transfers, sort_by=sort_by, limit=limit
+    )
+    return ORJSONResponse(journeys)
+
+
+@router.get(
+    "/{schedule_id}",
+    response_model=BusScheduleDetailResponse,
+    responses={304: {"description": "Not modified since the ETag sent in If-None-Match"}}
+)
+async def get_bus_schedule(schedule_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get bus schedule details with seats and boarding/dropping points. Supports If-None-Match."""
+    # Read the live fields before the seats: a write in between only makes the ETag older
+    live = db.execute(
+        select(BusSchedule.version, BusSchedule.available_seats, BusSchedule.status).where(
+            BusSchedule.id == schedule_id
+        )
     ).first()
-    
-    if not route:
+    if not live:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No route found from {from_city.name} to {to_city.name}"
+            detail="Bus schedule not found"
         )
     
-    # Find bus schedules
-    schedules = db.query(BusSchedule).options(
-        joinedload(BusSchedule.bus).joinedload(Bus.operator),
-        joinedload(BusSchedule.route).joinedload(Route.from_city),
-        joinedload(BusSchedule.route).joinedload(Route.to_city)
-    ).filter(
-        BusSchedule.route_id == route.id,
-        BusSchedule.travel_date == search_data.travel_date,
-        BusSchedule.status == "scheduled",
-        BusSchedule.available_seats > 0
-    ).order_by(BusSchedule.departure_time).all()
-    
-    return [BusScheduleResponse.model_validate(schedule) for schedule in schedules]
-
-
-@router.get("/{schedule_id}", response_model=BusScheduleDetailResponse)
-async def get_bus_schedule(schedule_id: int, db: Session = Depends(get_db)):
-    """Get bus schedule details with seats and boarding/dropping points."""
-    schedule = db.query(BusSchedule).options(
-        joinedload(BusSchedule.bus).joinedload(Bus.operator),
-        joinedload(BusSchedule.route).joinedload(Route.from_city),
-        joinedload(BusSchedule.route).joinedload(Route.to_city),
-        joinedload(BusSchedule.seats),
-        joinedload(BusSchedule.boarding_points),
-        joinedload(BusSchedule.dropping_points)
-    ).filter(BusSchedule.id == schedule_id).first()
+    etag = make_etag("schedule", schedule_id, live.version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    if not schedule:
+    # Bus, route, points and seat layout come from the cache; only availability is read here
+    static = static_detail(schedule_id, lambda: _schedule_detail(db, schedule_id))
+    if not static:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bus schedule not found"
         )
+    availability = dict(db.execute(
+        select(Seat.id, Seat.is_available).where(Seat.bus_schedule_id == schedule_id)
+    ).all())
     
-    return BusScheduleDetailResponse.model_validate(schedule)
+    detail = merge_live(
+        static, {"available_seats": live.available_seats, "status": live.status}, availability
+    )
+    return ORJSONResponse(detail, headers=etag_headers(etag))
 
 
-@router.get("/{schedule_id}/seats", response_model=List[SeatResponse])
-async def get_seats(schedule_id: int, db: Session = Depends(get_db)):
-    """Get seat availability for a bus schedule."""
-    schedule = db.query(BusSchedule).filter(BusSchedule.id == schedule_id).first()
-    
-    if not schedule:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bus schedule not found"
-        )
-    
-    seats = db.query(Seat).filter(
-        Seat.bus_schedule_id == schedule_id
-    ).order_by(Seat.deck, Seat.row_number, Seat.column_number).all()
+@router.get(
+    "/{schedule_id}/seats",
+    response_model=List[SeatResponse],
+    responses={304: {"description": "Not modified since the ETag sent in If-None-Match"}}
+)
+async def get_seats(schedule_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get seat availability for a bus schedule. Supports If-None-Match."""
+    etag = make_etag("seats", schedule_id, _schedule_version(db, schedule_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    return [SeatResponse.model_validate(seat) for seat in seats]
+    return ORJSONResponse(_seat_rows(db, schedule_id), headers=etag_headers(etag))
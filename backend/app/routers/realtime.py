@@ -0,0 +1,78 @@
+import asyncio
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models.bus import BusSchedule, Seat
+from ..services.seat_events import get_broker
+
+router = APIRouter(tags=["Realtime"])
+
+
+def _snapshot(schedule_id: int) -> Optional[dict]:
+    """Current seat state of a departure, or None if it does not exist."""
+    db = SessionLocal()
+    try:
+        schedule = db.query(
+            BusSchedule.version, BusSchedule.available_seats, BusSchedule.status
+        ).filter(BusSchedule.id == schedule_id).first()
+        if not schedule:
+            return None
+        seats = db.query(Seat.id, Seat.is_available).filter(Seat.bus_schedule_id == schedule_id).all()
+        return {
+            "type": "snapshot",
+            "schedule_id": schedule_id,
+            "version": schedule.version,
+            "available_seats": schedule.available_seats,
+            "status": schedule.status,
+            "available": [seat_id for seat_id, available in seats if available],
+            "taken": [seat_id for seat_id, available in seats if not available],
+        }
+    finally:
+        db.close()
+
+
+@router.websocket("/ws/schedules/{schedule_id}")
+async def seat_map_updates(websocket: WebSocket, schedule_id: int):
+    """
+    Live seat map of a departure. Sends a snapshot on connect, then one
+    "seats" message per committed change with the seat ids taken and
+    released, the new available_seats and the departure's version (skip
+    messages whose version is not newer than the snapshot). On "resync",
+    or if a version is skipped, re-read GET /buses/{id}/seats.
+    """
+    await websocket.accept()
+    broker = get_broker()
+    # Subscribe before reading the snapshot so no change falls in between
+    subscription = broker.subscribe(schedule_id)
+    tasks = []
+    try:
+        snapshot = await run_in_threadpool(_snapshot, schedule_id)
+        if snapshot is None:
+            await websocket.close(code=4404, reason="Bus schedule not found")
+            return
+        await websocket.send_text(orjson.dumps(snapshot).decode())
+
+        # Clients only listen; reading is how a disconnect is noticed
+        receiver = asyncio.create_task(websocket.receive())
+        getter = asyncio.create_task(subscription.get())
+        tasks = [receiver, getter]
+        while True:
+            done, _ = await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.create_task(websocket.receive())
+            if getter in done:
+                await websocket.send_text(getter.result())
+                getter = asyncio.create_task(subscription.get())
+            tasks = [receiver, getter]
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()
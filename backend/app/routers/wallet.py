@@ -1,11 +1,20 @@
+import base64
+from datetime import date, datetime, time, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from ..database import get_db
 from ..models.user import User
 from ..models.wallet import Wallet, Transaction
-from ..schemas.wallet import WalletResponse, WalletAddMoney, TransactionResponse, TransactionListResponse
-from ..utils.dependencies import get_current_user
+from ..schemas.wallet import (
+    WalletResponse, WalletAddMoney, TransactionResponse, TransactionListResponse, WalletStatementResponse
+)
+from ..utils.dependencies import get_current_user, idempotency, replay_response
+from ..services import ledger
+from ..services.ledger import get_or_create_wallet, to_paise
+from ..services.statements import build_statement
+from ..services.idempotency import IdempotencyClaim
 
 router = APIRouter(prefix="/wallet", tags=["Wallet"])
 
@@ -20,8 +29,7 @@ async def get_wallet(
     
     if not wallet:
         # Create wallet if doesn't exist
-        wallet = Wallet(user_id=current_user.id, balance=0.0)
-        db.add(wallet)
+        wallet = get_or_create_wallet(db, current_user.id)
         db.commit()
         db.refresh(wallet)
     
@@ -32,56 +40,118 @@ async def get_wallet(
 async def add_money(
     data: WalletAddMoney,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    claim: IdempotencyClaim = Depends(idempotency("wallet.add"))
 ):
-    """Add money to wallet (mock payment)."""
-    wallet = db.query(Wallet).filter(Wallet.user_id == current_user.id).first()
+    """Add money to wallet (mock payment). Send an Idempotency-Key header to make retries safe."""
+    if claim.is_replay:
+        return replay_response(claim)
     
-    if not wallet:
-        wallet = Wallet(user_id=current_user.id, balance=0.0)
-        db.add(wallet)
-        db.flush()
+    wallet = get_or_create_wallet(db, current_user.id)
     
     # Add money (in real app, this would involve payment gateway)
-    wallet.balance += data.amount
+    ledger.credit(db, wallet.id, to_paise(data.amount), "Added money to wallet")
     
-    # Create transaction record
-    transaction = Transaction(
-        wallet_id=wallet.id,
-        type="credit",
-        amount=data.amount,
-        description="Added money to wallet"
-    )
-    db.add(transaction)
+    db.flush()
+    db.refresh(wallet)
+    response = WalletResponse.model_validate(wallet)
     
+    # Stored with the credit so a retry can never credit twice
+    claim.complete(db, response)
     db.commit()
-    db.refresh(wallet)
     
-    return WalletResponse.model_validate(wallet)
+    return response
+
+
+def encode_cursor(transaction: Transaction) -> str:
+    """Opaque cursor pointing just past a transaction in (created_at, id) order."""
+    raw = f"{transaction.created_at.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(transaction_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
 @router.get("/transactions", response_model=TransactionListResponse)
 async def get_transactions(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Legacy paging; prefer cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    type: Optional[str] = Query(None, pattern="^(credit|debit)$"),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    include_total: bool = Query(False, description="Count matches when filters are applied"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get wallet transaction history."""
+    """
+    Get wallet transaction history, newest first.
+    Pages are keyset-paginated on (created_at, id): pass next_cursor back as
+    cursor to continue. The unfiltered total comes from the wallet's ledger
+    counter, so no COUNT(*) is run unless include_total is set with filters.
+    """
     wallet = db.query(Wallet).filter(Wallet.user_id == current_user.id).first()
     
     if not wallet:
         return TransactionListResponse(transactions=[], total=0)
     
-    # Get total count
-    total = db.query(Transaction).filter(Transaction.wallet_id == wallet.id).count()
+    query = db.query(Transaction).filter(Transaction.wallet_id == wallet.id)
+    filtered = bool(type or from_date or to_date)
+    if type:
+        query = query.filter(Transaction.type == type)
+    if from_date:
+        query = query.filter(Transaction.created_at >= datetime.combine(from_date, time.min))
+    if to_date:
+        query = query.filter(Transaction.created_at < datetime.combine(to_date + timedelta(days=1), time.min))
+    
+    if not filtered:
+        total = wallet.transaction_count
+    elif include_total:
+        total = query.count()
+    else:
+        total = None
+    
+    query = query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    if cursor:
+        query = query.filter(tuple_(Transaction.created_at, Transaction.id) < decode_cursor(cursor))
+    elif offset:
+        query = query.offset(offset)
     
-    # Get transactions with pagination
-    transactions = db.query(Transaction).filter(
-        Transaction.wallet_id == wallet.id
-    ).order_by(Transaction.created_at.desc()).offset(offset).limit(limit).all()
+    # Fetch one extra row to know whether another page exists
+    transactions = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(transactions[limit - 1]) if len(transactions) > limit else None
     
     return TransactionListResponse(
-        transactions=[TransactionResponse.model_validate(t) for t in transactions],
-        total=total
+        transactions=[TransactionResponse.model_validate(t) for t in transactions[:limit]],
+        total=total,
+        next_cursor=next_cursor
     )
+
+
+@router.get("/statement", response_model=WalletStatementResponse)
+async def get_statement(
+    start_date: date,
+    end_date: date,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get opening/closing balance and totals for a date range (inclusive).
+    Use /wallet/transactions with from_date/to_date for the line items.
+    """
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be on or before end_date"
+        )
+    
+    wallet = get_or_create_wallet(db, current_user.id)
+    return build_statement(db, wallet, start_date, end_date)
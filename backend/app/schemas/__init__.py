@@ -8,9 +8,13 @@ from .bus import (
     BusScheduleResponse,
     BusScheduleDetailResponse,
     BusSearchRequest,
+    BusSearchFilters,
+    BusSearchPage,
     SeatResponse,
     BoardingPointResponse,
-    DroppingPointResponse
+    DroppingPointResponse,
+    JourneyResponse,
+    FareCalendarDay
 )
 from .booking import (
     BookingCreate,
@@ -38,7 +42,11 @@ __all__ = [
     "BusResponse",
     "BusScheduleResponse",
     "BusSearchRequest",
+    "BusSearchFilters",
+    "BusSearchPage",
     "SeatResponse",
+    "JourneyResponse",
+    "FareCalendarDay",
     # Booking
     "BookingCreate",
     "BookingResponse",
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import date, time, datetime
 
 
@@ -137,3 +137,80 @@ class BusSearchRequest(BaseModel):
     from_city: str = Field(..., description="City code or name")
     to_city: str = Field(..., description="City code or name")
     travel_date: date
+
+
+class BusSearchFilters(BusSearchRequest):
+    """Schema for bus search with filters, sorting and paging."""
+    bus_types: List[str] = []
+    operator_ids: List[int] = []
+    amenities: List[str] = Field([], description="Departures must offer all of these")
+    departure_windows: List[Literal["early_morning", "morning", "afternoon", "evening"]] = []
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_seats: int = Field(1, ge=1)
+    sort_by: Literal["departure", "price", "rating", "duration", "seats"] = "departure"
+    sort_order: Literal["asc", "desc"] = "asc"
+    page: int = Field(1, ge=1)
+    page_size: int = Field(20, ge=1, le=50)
+
+
+class FacetCount(BaseModel):
+    """Schema for one value of a search facet."""
+    value: str
+    label: str
+    count: int
+
+
+class PriceRange(BaseModel):
+    """Schema for the price range of search results."""
+    min: float
+    max: float
+
+
+class SearchFacets(BaseModel):
+    """Schema for search facets; each is counted with the other filters applied."""
+    bus_types: List[FacetCount]
+    operators: List[FacetCount]
+    amenities: List[FacetCount]
+    departure_windows: List[FacetCount]
+    price_range: Optional[PriceRange]
+
+
+class BusSearchPage(BaseModel):
+    """Schema for a page of filtered search results with facets."""
+    total: int
+    page: int
+    page_size: int
+    results: List[BusScheduleResponse]
+    facets: SearchFacets
+
+class FareCalendarDay(BaseModel):
+    """Schema for one day of a route's fare calendar."""
+    date: date
+    min_price: Optional[float]  # None when there are no seats left that day
+    departures: int
+    available_seats: int
+
+
+class JourneyLegResponse(BaseModel):
+    """Schema for one bus of a connecting journey."""
+    schedule_id: int
+    route_id: int
+    from_city: CityResponse
+    to_city: CityResponse
+    departure: datetime
+    arrival: datetime
+    price: float
+    available_seats: int
+    operator_name: str
+    bus_type: str
+
+
+class JourneyResponse(BaseModel):
+    """Schema for a direct or connecting journey."""
+    departure: datetime
+    arrival: datetime
+    duration_minutes: int
+    total_price: float
+    transfers: int
+    legs: List[JourneyLegResponse]
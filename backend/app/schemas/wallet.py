@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class WalletResponse(BaseModel):
@@ -34,4 +34,17 @@ class TransactionResponse(BaseModel):
 class TransactionListResponse(BaseModel):
     """Schema for list of transactions.""" 
     transactions: List[TransactionResponse]
-    total: int
+    total: Optional[int] = None  # Omitted for filtered pages unless include_total is set
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page
+
+
+class WalletStatementResponse(BaseModel):
+    """Schema for a wallet statement over a date range."""
+    wallet_id: int
+    start_date: date
+    end_date: date
+    opening_balance: float
+    closing_balance: float
+    total_credits: float
+    total_debits: float
+    transaction_count: int
@@ -8,7 +8,8 @@ from datetime import date, time, timedelta
 import random
 from sqlalchemy.orm import Session
 from .database import SessionLocal, init_db
-from .models.bus import Operator, City, Route, Bus, BusSchedule, Seat, BoardingPoint, DroppingPoint
+from .models.bus import Operator, City, Route, Bus, BusSchedule, Seat, BoardingPoint, DroppingPoint, RouteDailyFare
+from .services.fares import rebuild_daily_fares
 
 
 def create_operators(db: Session):
@@ -498,6 +499,9 @@ def seed_database():
         print("\n📍 Creating boarding/dropping points...")
         create_boarding_dropping_bulk(db)
         
+        print("\n💰 Building fare calendar...")
+        rebuild_daily_fares(db)
+        
         print("\n" + "=" * 60)
         print("✅ DATABASE SEEDING COMPLETE!")
         print("=" * 60)
@@ -512,6 +516,7 @@ def seed_database():
         print(f"   Seats: {db.query(Seat).count()}")
         print(f"   Boarding Points: {db.query(BoardingPoint).count()}")
         print(f"   Dropping Points: {db.query(DroppingPoint).count()}")
+        print(f"   Fare Days: {db.query(RouteDailyFare).count()}")
         
     except Exception as e:
         db.rollback()
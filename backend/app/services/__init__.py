@@ -0,0 +1,45 @@
+# Services package
+from .ledger import (
+    InsufficientBalance,
+    to_paise,
+    get_or_create_wallet,
+    credit,
+    debit,
+    credit_many,
+    reconcile_wallet,
+)
+from .statements import build_statement, verify_snapshots, rebuild_snapshots
+from .stats import get_dashboard_stats
+from .cancellation import BookingNotFound, BookingNotCancellable, cancel_booking, cancel_schedules, cancel_departures
+from .inventory import inventory_drift, reconcile_inventory
+from .fares import fare_calendar, refresh_fare_days, rebuild_daily_fares
+from .idempotency import IdempotencyClaim, IdempotencyKeyReused, IdempotencyInProgress, claim, claim_async
+
+__all__ = [
+    "InsufficientBalance",
+    "to_paise",
+    "get_or_create_wallet",
+    "credit",
+    "debit",
+    "credit_many",
+    "reconcile_wallet",
+    "build_statement",
+    "verify_snapshots",
+    "rebuild_snapshots",
+    "get_dashboard_stats",
+    "BookingNotFound",
+    "BookingNotCancellable",
+    "cancel_booking",
+    "cancel_schedules",
+    "cancel_departures",
+    "inventory_drift",
+    "reconcile_inventory",
+    "fare_calendar",
+    "refresh_fare_days",
+    "rebuild_daily_fares",
+    "IdempotencyClaim",
+    "IdempotencyKeyReused",
+    "IdempotencyInProgress",
+    "claim",
+    "claim_async",
+]
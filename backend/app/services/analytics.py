@@ -0,0 +1,246 @@
+"""
+Operations analytics.
+Bookings, passengers, schedules and routes are rolled up into one
+ScheduleStats row per departure with set-based INSERT ... SELECT statements.
+Incremental refreshes only rebuild departures whose bookings were created or
+cancelled since the previous refresh, plus departures that have no rollup
+row yet or whose status, seats offered or route distance differ from it.
+Reports then
+aggregate the small rollup table instead of the raw booking history.
+"""
+
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import case, delete, func, insert, or_, select, union
+from sqlalchemy.orm import Session, aliased
+
+from ..models.analytics import ScheduleStats, AnalyticsRefresh
+from ..models.booking import Booking, BookingPassenger
+from ..models.bus import Bus, BusSchedule, City, Operator, Route
+from .stats import PAID_STATUSES
+
+# Re-scan this far behind the last refresh to catch transactions that were
+# still open (with earlier timestamps) when it ran
+REFRESH_OVERLAP = timedelta(minutes=5)
+ID_BATCH = 1000
+
+GROUPINGS = ("route", "operator", "day")
+
+_refresh_lock = threading.Lock()
+
+
+def _rollup_query(schedule_ids: Optional[List[int]] = None):
+    """SELECT producing ScheduleStats rows, optionally for some departures only."""
+    booking_totals = select(
+        Booking.bus_schedule_id.label("bus_schedule_id"),
+        func.count(Booking.id).label("bookings"),
+        func.sum(case((Booking.status == "cancelled", 1), else_=0)).label("cancelled_bookings"),
+        func.sum(case((Booking.status.in_(PAID_STATUSES), Booking.total_amount), else_=0)).label("revenue"),
+    ).group_by(Booking.bus_schedule_id)
+
+    seats_sold = select(
+        Booking.bus_schedule_id.label("bus_schedule_id"),
+        func.count(BookingPassenger.id).label("seats_sold"),
+    ).join(
+        BookingPassenger, BookingPassenger.booking_id == Booking.id
+    ).where(
+        Booking.status.in_(PAID_STATUSES)
+    ).group_by(Booking.bus_schedule_id)
+
+    if schedule_ids is not None:
+        booking_totals = booking_totals.where(Booking.bus_schedule_id.in_(schedule_ids))
+        seats_sold = seats_sold.where(Booking.bus_schedule_id.in_(schedule_ids))
+
+    booking_totals = booking_totals.subquery()
+    seats_sold = seats_sold.subquery()
+
+    query = select(
+        BusSchedule.id,
+        BusSchedule.travel_date,
+        BusSchedule.route_id,
+        Bus.operator_id,
+        func.coalesce(BusSchedule.status, "scheduled"),
+        Route.distance_km,
+        Bus.total_seats,
+        func.coalesce(seats_sold.c.seats_sold, 0),
+        func.coalesce(booking_totals.c.bookings, 0),
+        func.coalesce(booking_totals.c.cancelled_bookings, 0),
+        func.coalesce(booking_totals.c.revenue, 0),
+        func.now(),
+    ).join(
+        Bus, Bus.id == BusSchedule.bus_id
+    ).join(
+        Route, Route.id == BusSchedule.route_id
+    ).outerjoin(
+        booking_totals, booking_totals.c.bus_schedule_id == BusSchedule.id
+    ).outerjoin(
+        seats_sold, seats_sold.c.bus_schedule_id == BusSchedule.id
+    )
+    if schedule_ids is not None:
+        query = query.where(BusSchedule.id.in_(schedule_ids))
+    return query
+
+
+_ROLLUP_COLUMNS = [
+    "bus_schedule_id", "travel_date", "route_id", "operator_id", "schedule_status", "distance_km",
+    "seats_offered", "seats_sold", "bookings", "cancelled_bookings", "revenue", "refreshed_at",
+]
+
+
+def _changed_schedule_ids(db: Session, since: datetime) -> List[int]:
+    # Departures without a rollup row, or whose status, bus size or route
+    # distance no longer match it (cancellations, bus and route edits leave
+    # no booking timestamps behind)
+    drifted = select(BusSchedule.id).join(
+        Bus, Bus.id == BusSchedule.bus_id
+    ).join(
+        Route, Route.id == BusSchedule.route_id
+    ).outerjoin(
+        ScheduleStats, ScheduleStats.bus_schedule_id == BusSchedule.id
+    ).where(or_(
+        ScheduleStats.bus_schedule_id.is_(None),
+        ScheduleStats.schedule_status != func.coalesce(BusSchedule.status, "scheduled"),
+        ScheduleStats.seats_offered != Bus.total_seats,
+        ScheduleStats.distance_km != Route.distance_km,
+    ))
+    changed = union(
+        select(Booking.bus_schedule_id).where(or_(Booking.booked_at >= since, Booking.cancelled_at >= since)),
+        drifted,
+    )
+    return [row[0] for row in db.execute(changed)]
+
+
+def refresh_rollups(db: Session, full: bool = False) -> AnalyticsRefresh:
+    """
+    Rebuild ScheduleStats rows, either all of them or only the departures
+    touched since the previous refresh. Commits.
+    """
+    with _refresh_lock:
+        started_at = datetime.now(timezone.utc)
+        last = db.query(AnalyticsRefresh).order_by(AnalyticsRefresh.started_at.desc()).first()
+        columns = [ScheduleStats.__table__.c[name] for name in _ROLLUP_COLUMNS]
+
+        if full or last is None:
+            db.execute(delete(ScheduleStats))
+            db.execute(insert(ScheduleStats).from_select(columns, _rollup_query()))
+            schedules = db.query(func.count(ScheduleStats.bus_schedule_id)).scalar()
+            mode = "full"
+        else:
+            since = last.started_at - REFRESH_OVERLAP
+            schedule_ids = _changed_schedule_ids(db, since)
+            for i in range(0, len(schedule_ids), ID_BATCH):
+                batch = schedule_ids[i:i + ID_BATCH]
+                db.execute(delete(ScheduleStats).where(ScheduleStats.bus_schedule_id.in_(batch)))
+                db.execute(insert(ScheduleStats).from_select(columns, _rollup_query(batch)))
+            schedules = len(schedule_ids)
+            mode = "incremental"
+
+        refresh = AnalyticsRefresh(
+            mode=mode,
+            started_at=started_at,
+            finished_at=datetime.now(timezone.utc),
+            schedules=schedules
+        )
+        db.add(refresh)
+        db.commit()
+        return refresh
+
+
+def ensure_fresh(db: Session, max_age_seconds: float) -> Optional[AnalyticsRefresh]:
+    """Run an incremental refresh if the last one is older than max_age_seconds."""
+    last_started = db.query(func.max(AnalyticsRefresh.started_at)).scalar()
+    if last_started is not None:
+        if last_started.tzinfo is None:
+            last_started = last_started.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - last_started < timedelta(seconds=max_age_seconds):
+            return None
+    return refresh_rollups(db)
+
+
+def summarize(
+    db: Session,
+    group_by: str,
+    start_date: date,
+    end_date: date,
+    route_id: Optional[int] = None,
+    operator_id: Optional[int] = None
+) -> List[dict]:
+    """
+    Load factor, revenue per seat-km and cancellation rate per route,
+    operator or travel day, for departures between start_date and end_date.
+    """
+    if group_by not in GROUPINGS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUPINGS)}")
+
+    key = {
+        "route": ScheduleStats.route_id,
+        "operator": ScheduleStats.operator_id,
+        "day": ScheduleStats.travel_date,
+    }[group_by]
+    # Cancelled departures offer no seats
+    running = ScheduleStats.schedule_status != "cancelled"
+    seats_offered = case((running, ScheduleStats.seats_offered), else_=0)
+
+    query = db.query(
+        key.label("key"),
+        func.count(ScheduleStats.bus_schedule_id).label("departures"),
+        func.sum(seats_offered).label("seats_offered"),
+        func.sum(ScheduleStats.seats_sold).label("seats_sold"),
+        func.sum(seats_offered * ScheduleStats.distance_km).label("seat_km_offered"),
+        func.sum(ScheduleStats.seats_sold * ScheduleStats.distance_km).label("seat_km_sold"),
+        func.sum(ScheduleStats.revenue).label("revenue"),
+        func.sum(ScheduleStats.bookings).label("bookings"),
+        func.sum(ScheduleStats.cancelled_bookings).label("cancelled_bookings"),
+    ).filter(
+        ScheduleStats.travel_date >= start_date,
+        ScheduleStats.travel_date <= end_date
+    )
+    if route_id is not None:
+        query = query.filter(ScheduleStats.route_id == route_id)
+    if operator_id is not None:
+        query = query.filter(ScheduleStats.operator_id == operator_id)
+    rows = query.group_by(key).order_by(key).all()
+
+    labels = _labels(db, group_by, [row.key for row in rows])
+    return [
+        {
+            group_by: str(row.key) if group_by == "day" else row.key,
+            "label": labels.get(row.key, str(row.key)),
+            "departures": row.departures,
+            "seats_offered": int(row.seats_offered or 0),
+            "seats_sold": int(row.seats_sold or 0),
+            "load_factor": _ratio(row.seats_sold, row.seats_offered),
+            "revenue": round(float(row.revenue or 0), 2),
+            "seat_km_offered": int(row.seat_km_offered or 0),
+            "revenue_per_seat_km": _ratio(row.revenue, row.seat_km_offered),
+            "revenue_per_sold_seat_km": _ratio(row.revenue, row.seat_km_sold),
+            "bookings": int(row.bookings or 0),
+            "cancelled_bookings": int(row.cancelled_bookings or 0),
+            "cancellation_rate": _ratio(row.cancelled_bookings, row.bookings),
+        }
+        for row in rows
+    ]
+
+
+def _ratio(numerator, denominator) -> Optional[float]:
+    if not denominator:
+        return None
+    return round(float(numerator or 0) / float(denominator), 4)
+
+
+def _labels(db: Session, group_by: str, keys: list) -> dict:
+    if not keys or group_by == "day":
+        return {}
+    if group_by == "operator":
+        return dict(db.query(Operator.id, Operator.name).filter(Operator.id.in_(keys)).all())
+
+    from_city = aliased(City)
+    to_city = aliased(City)
+    rows = db.query(Route.id, from_city.name, to_city.name).join(
+        from_city, from_city.id == Route.from_city_id
+    ).join(
+        to_city, to_city.id == Route.to_city_id
+    ).filter(Route.id.in_(keys)).all()
+    return {route_id: f"{origin} → {destination}" for route_id, origin, destination in rows}
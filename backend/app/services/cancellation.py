@@ -0,0 +1,212 @@
+"""
+Booking and departure cancellation.
+Single bookings (cancelled by the passenger or by an admin) are claimed with a
+conditional UPDATE, their seats released with one UPDATE and the departure's
+seat counter bumped in the database, then refunded through the ledger.
+Cancelling departures is done set-based rather than booking by booking: the
+confirmed bookings are claimed with one conditional UPDATE (so a booking the
+passenger cancels at the same moment is refunded exactly once), wallets are
+refunded through ledger.credit_many, seats are released and seat counts reset
+with one statement each. A whole day of departures goes through in a handful
+of statements per ID_BATCH bookings.
+"""
+
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, cast, func, literal, select, update
+from sqlalchemy.orm import Session
+
+from ..models.booking import Booking, BookingPassenger
+from ..models.bus import BusSchedule, Seat
+from ..models.wallet import Wallet
+from . import ledger
+from .inventory import adjust_available, record_schedule_updates, release_seats
+from .stats import PAID_STATUSES, get_dashboard_stats, record_booking_revenue
+
+ID_BATCH = 1000
+
+# Bookings that still hold their seats and can be cancelled
+CANCELLABLE_STATUSES = ("pending", "confirmed")
+
+REFUND_DESCRIPTION = "Refund: Schedule Cancelled (Booking #"
+
+
+class BookingNotFound(Exception):
+    """Raised when the booking does not exist (or is not the user's)."""
+
+
+class BookingNotCancellable(Exception):
+    """Raised when the booking is already cancelled or completed."""
+
+
+def cancel_booking(
+    db: Session,
+    booking_id: int,
+    user_id: Optional[int] = None,
+    refund_description: str = "Refund for cancelled booking #{code}"
+) -> Booking:
+    """
+    Cancel one booking: release its seats, give them back to the departure's
+    seat counter and refund a wallet payment. Pass user_id to only cancel
+    that user's booking. The caller commits.
+    """
+    criteria = [Booking.id == booking_id]
+    if user_id is not None:
+        criteria.append(Booking.user_id == user_id)
+
+    current = db.query(Booking.status).filter(*criteria).scalar()
+    if current is None:
+        raise BookingNotFound(booking_id)
+    if current == "completed":
+        raise BookingNotCancellable("Cannot cancel a completed booking")
+    if current not in CANCELLABLE_STATUSES:
+        raise BookingNotCancellable("Booking is already cancelled")
+
+    # Only one of two concurrent cancellations gets the row back
+    claimed = db.execute(
+        update(Booking)
+        .where(*criteria, Booking.status == current)
+        .values(status="cancelled", cancelled_at=datetime.now(timezone.utc))
+        .returning(Booking.booking_code, Booking.user_id, Booking.bus_schedule_id,
+                   Booking.total_amount, Booking.payment_method, Booking.booked_at)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if claimed is None:
+        raise BookingNotCancellable("Booking is already cancelled")
+
+    released = release_seats(
+        db, Seat.id.in_(select(BookingPassenger.seat_id).where(BookingPassenger.booking_id == booking_id))
+    )
+    adjust_available(db, claimed.bus_schedule_id, released=released.get(claimed.bus_schedule_id, ()))
+
+    if claimed.payment_method == "wallet":
+        wallet = db.query(Wallet).filter(Wallet.user_id == claimed.user_id).first()
+        if wallet:
+            ledger.credit(
+                db,
+                wallet.id,
+                ledger.to_paise(claimed.total_amount),
+                refund_description.format(code=claimed.booking_code),
+                reference_id=booking_id
+            )
+
+    if current in PAID_STATUSES:
+        record_booking_revenue(db, claimed.total_amount, claimed.booked_at, -1)
+
+    return db.query(Booking).populate_existing().filter(Booking.id == booking_id).one()
+
+
+def _refund_postings(booking_ids: List[int]):
+    """One wallet credit per wallet-paid booking, as ledger.credit_many expects."""
+    return select(
+        Wallet.id.label("wallet_id"),
+        cast(func.round(Booking.total_amount * 100), BigInteger).label("amount_paise"),
+        (literal(REFUND_DESCRIPTION) + Booking.booking_code + literal(")")).label("description"),
+        Booking.id.label("reference_id")
+    ).join(
+        Wallet, Wallet.user_id == Booking.user_id
+    ).where(
+        Booking.id.in_(booking_ids),
+        Booking.payment_method == "wallet",
+        Booking.total_amount > 0
+    )
+
+
+def cancel_schedules(db: Session, schedule_ids: List[int]) -> dict:
+    """
+    Cancel departures: cancel their confirmed bookings, refund wallet
+    payments, release the seats and mark the departures cancelled.
+    Commits. Returns totals plus the affected bookings so callers can notify
+    passengers.
+    """
+    if not schedule_ids:
+        return {"schedules": 0, "bookings": 0, "refunds": 0, "refunded": 0.0, "affected": []}
+
+    now = datetime.now(timezone.utc)
+    affected = []
+    refunds = 0
+
+    for i in range(0, len(schedule_ids), ID_BATCH):
+        batch = schedule_ids[i:i + ID_BATCH]
+        db.execute(
+            update(BusSchedule)
+            .where(BusSchedule.id.in_(batch))
+            .values(status="cancelled")
+            .execution_options(synchronize_session=False)
+        )
+        # Claim the bookings first: only rows this UPDATE flips get refunded
+        claimed = db.execute(
+            update(Booking)
+            .where(Booking.bus_schedule_id.in_(batch), Booking.status.in_(CANCELLABLE_STATUSES))
+            .values(status="cancelled", cancelled_at=now)
+            .returning(Booking.id, Booking.booking_code, Booking.user_id, Booking.bus_schedule_id,
+                       Booking.total_amount, Booking.payment_method)
+            .execution_options(synchronize_session=False)
+        ).all()
+        affected.extend(claimed)
+
+    booking_ids = [row.id for row in affected]
+    for i in range(0, len(booking_ids), ID_BATCH):
+        refunds += ledger.credit_many(db, _refund_postings(booking_ids[i:i + ID_BATCH]))
+
+    for i in range(0, len(schedule_ids), ID_BATCH):
+        batch = schedule_ids[i:i + ID_BATCH]
+        released = release_seats(db, Seat.bus_schedule_id.in_(batch))
+        rows = db.execute(
+            update(BusSchedule)
+            .where(BusSchedule.id.in_(batch))
+            .values(
+                available_seats=select(func.count(Seat.id)).where(
+                    Seat.bus_schedule_id == BusSchedule.id,
+                    Seat.is_available.is_(True)
+                ).scalar_subquery(),
+                version=BusSchedule.version + 1
+            )
+            .returning(BusSchedule.id, BusSchedule.available_seats, BusSchedule.version, BusSchedule.status)
+            .execution_options(synchronize_session=False)
+        ).all()
+        record_schedule_updates(db, rows, released)
+
+    db.commit()
+    # The bulk updates bypass the incremental dashboard counters
+    get_dashboard_stats().invalidate()
+
+    refunded = sum(row.total_amount for row in affected if row.payment_method == "wallet")
+    print(f"✅ Cancelled {len(schedule_ids)} departures, {len(affected)} bookings, {refunds} wallet refunds")
+    return {
+        "schedules": len(schedule_ids),
+        "bookings": len(affected),
+        "refunds": refunds,
+        "refunded": round(refunded, 2),
+        "affected": [
+            {
+                "booking_id": row.id,
+                "booking_code": row.booking_code,
+                "user_id": row.user_id,
+                "bus_schedule_id": row.bus_schedule_id,
+                "amount": row.total_amount,
+                "refunded_to_wallet": row.payment_method == "wallet",
+            }
+            for row in affected
+        ],
+    }
+
+
+def cancel_departures(
+    db: Session,
+    travel_date: date,
+    route_id: Optional[int] = None,
+    bus_id: Optional[int] = None
+) -> dict:
+    """Cancel every scheduled departure on a day, optionally for one route or bus."""
+    query = db.query(BusSchedule.id).filter(
+        BusSchedule.travel_date == travel_date,
+        BusSchedule.status == "scheduled"
+    )
+    if route_id is not None:
+        query = query.filter(BusSchedule.route_id == route_id)
+    if bus_id is not None:
+        query = query.filter(BusSchedule.bus_id == bus_id)
+    schedule_ids = [row.id for row in query.order_by(BusSchedule.id)]
+    return cancel_schedules(db, schedule_ids)
@@ -0,0 +1,225 @@
+"""
+Fare calendar.
+RouteDailyFare holds, per route and travel date, the lowest fare among
+departures with seats left and the departures and seats remaining, computed
+by one grouped query over bus_schedules. The calendar reads a route's days
+from it instead of searching every date.
+
+Writes only mark days stale: departures added or deleted through the ORM,
+and every seat or status change queued for the seat map
+(record_seat_change), add their route-day to the session. Once the session
+commits, a background worker recomputes those days in its own short
+transaction and upserts them, so bookings neither wait on a fare row lock
+nor pay for the aggregate. The calendar can therefore trail a booking by a
+moment; a day lost to a crash is repaired by its next change or by
+rebuild_daily_fares. The stale days are also left in
+session.info["changed_route_days"] for the search cache.
+"""
+
+import threading
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, select, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.bus import BusSchedule, RouteDailyFare
+
+KEY_BATCH = 500
+
+_VALUES = ("min_price", "departures", "available_seats")
+
+
+def _daily_query():
+    """min fare, departures and seats per (route_id, travel_date) over scheduled departures."""
+    bookable = BusSchedule.available_seats > 0
+    return select(
+        BusSchedule.route_id,
+        BusSchedule.travel_date,
+        func.min(case((bookable, BusSchedule.base_price))).label("min_price"),
+        func.count(BusSchedule.id).label("departures"),
+        func.coalesce(func.sum(case((bookable, BusSchedule.available_seats), else_=0)), 0).label("available_seats"),
+    ).where(
+        BusSchedule.status == "scheduled"
+    ).group_by(BusSchedule.route_id, BusSchedule.travel_date)
+
+
+def _upsert(db: Session, rows: List[dict]):
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(RouteDailyFare).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["route_id", "travel_date"],
+        set_={
+            **{name: statement.excluded[name] for name in _VALUES},
+            "updated_at": func.now(),
+        }
+    ))
+
+
+def refresh_fare_days(db: Session, days: Iterable[Tuple[int, date]]):
+    """Recompute and upsert the RouteDailyFare rows for (route_id, travel_date) pairs. The caller commits."""
+    days = sorted(set(days))
+    postgres = db.get_bind().dialect.name == "postgresql"
+    for offset in range(0, len(days), KEY_BATCH):
+        batch = days[offset:offset + KEY_BATCH]
+        if postgres:
+            # Serialize recomputes of a day (held until this short transaction
+            # ends) so each aggregate below sees the previous one's commit
+            for route_id, travel_date in batch:
+                db.execute(
+                    text("SELECT pg_advisory_xact_lock(:route_id, :day)"),
+                    {"route_id": route_id, "day": travel_date.toordinal()}
+                )
+
+        computed = {
+            (row.route_id, row.travel_date): row
+            for row in db.execute(
+                _daily_query().where(tuple_(BusSchedule.route_id, BusSchedule.travel_date).in_(batch))
+            )
+        }
+        rows = []
+        for route_id, travel_date in batch:
+            row = computed.get((route_id, travel_date))
+            rows.append({
+                "route_id": route_id,
+                "travel_date": travel_date,
+                "min_price": row.min_price if row else None,
+                "departures": row.departures if row else 0,
+                "available_seats": int(row.available_seats) if row else 0,
+            })
+        _upsert(db, rows)
+
+
+def rebuild_daily_fares(db: Session, from_date: Optional[date] = None) -> int:
+    """Rebuild every RouteDailyFare row (from from_date on, if given) set-based. Commits."""
+    existing = delete(RouteDailyFare)
+    query = _daily_query()
+    if from_date is not None:
+        existing = existing.where(RouteDailyFare.travel_date >= from_date)
+        query = query.where(BusSchedule.travel_date >= from_date)
+    db.execute(existing)
+    db.execute(insert(RouteDailyFare).from_select(
+        ["route_id", "travel_date", *_VALUES], query
+    ))
+    db.commit()
+    return db.query(func.count(RouteDailyFare.route_id)).scalar()
+
+
+def fare_calendar(db: Session, route_id: int, start_date: date, days: int) -> List[dict]:
+    """One entry per day in [start_date, start_date + days), including days without departures."""
+    end_date = start_date + timedelta(days=days)
+    rows = {
+        row.travel_date: row
+        for row in db.execute(
+            select(RouteDailyFare.travel_date, *(getattr(RouteDailyFare, name) for name in _VALUES)).where(
+                RouteDailyFare.route_id == route_id,
+                RouteDailyFare.travel_date >= start_date,
+                RouteDailyFare.travel_date < end_date
+            )
+        )
+    }
+    calendar = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        row = rows.get(day)
+        calendar.append({
+            "date": day,
+            "min_price": row.min_price if row else None,
+            "departures": row.departures if row else 0,
+            "available_seats": row.available_seats if row else 0,
+        })
+    return calendar
+
+
+_queued: Set[Tuple[int, date]] = set()
+_queue_lock = threading.Lock()
+_wakeup = threading.Event()
+_idle = threading.Event()
+_idle.set()
+_worker: Optional[threading.Thread] = None
+
+
+def queue_fare_days(days: Iterable[Tuple[int, date]]):
+    """Recompute these route-days on the background worker."""
+    global _worker
+    with _queue_lock:
+        _queued.update(days)
+        _idle.clear()
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="fare-days", daemon=True)
+            _worker.start()
+    _wakeup.set()
+
+
+def wait_for_fare_days(timeout: float = 10.0) -> bool:
+    """Block until queued route-days are written (for scripts and benchmarks)."""
+    return _idle.wait(timeout)
+
+
+def _run_worker():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        with _queue_lock:
+            days = set(_queued)
+            _queued.clear()
+        if days:
+            db = SessionLocal()
+            try:
+                refresh_fare_days(db, days)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Fare calendar refresh failed for {len(days)} route-days: {e}")
+            finally:
+                db.close()
+        with _queue_lock:
+            if not _queued:
+                _idle.set()
+            else:
+                _wakeup.set()
+
+
+def _stale_days(session: Session) -> Set[Tuple[int, date]]:
+    return session.info.setdefault("stale_fare_days", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_schedules(session: Session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, BusSchedule):
+            _stale_days(session).add((obj.route_id, obj.travel_date))
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_stale_days(session: Session):
+    session.flush()
+    days = session.info.pop("stale_fare_days", set())
+    schedule_ids = {message["schedule_id"] for message in session.info.get("seat_events", ())}
+    if schedule_ids:
+        ids = sorted(schedule_ids)
+        for offset in range(0, len(ids), KEY_BATCH):
+            days.update(tuple(row) for row in session.execute(
+                select(BusSchedule.route_id, BusSchedule.travel_date)
+                .where(BusSchedule.id.in_(ids[offset:offset + KEY_BATCH]))
+                .distinct()
+            ))
+    if days:
+        session.info["fare_days_to_refresh"] = days
+        # Read after commit by the search cache
+        session.info["changed_route_days"] = days
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_after_commit(session: Session):
+    days = session.info.pop("fare_days_to_refresh", None)
+    if days:
+        queue_fare_days(days)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_days(session: Session):
+    session.info.pop("stale_fare_days", None)
+    session.info.pop("fare_days_to_refresh", None)
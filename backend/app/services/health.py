@@ -0,0 +1,173 @@
+"""
+Liveness and readiness probes.
+liveness() touches nothing: answering at all shows the process and its
+event loop are up. readiness() checks what serving depends on: a database
+round trip (SELECT 1) and connection-pool saturation, the model provider
+(Groq's model list; the fake provider is local and always up), how far
+behind the background work is (search warm-up, dashboard stats refresh,
+seat-event listener, journey timetable) and event-loop lag.
+
+A report is cached for HEALTH_CACHE_SECONDS and only one probe computes it
+at a time, so load balancers polling every worker add at most one query per
+interval. Only the database and the search warm-up decide readiness; the
+other checks can mark a ready worker degraded (search and booking still
+work without the agent).
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from ..agent.providers import get_provider
+from ..config import get_settings
+from ..database import engine
+from .journeys import timetable_status
+from .search import warmup_status
+from .seat_events import broker_status
+from .stats import get_dashboard_stats
+
+POOL_BUSY_RATIO = 0.9
+LOOP_LAG_DEGRADED_MS = 100
+
+_started_at = time.monotonic()
+_report: Optional[dict] = None
+_report_at = 0.0
+_report_lock = asyncio.Lock()
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def liveness() -> dict:
+    return {"status": "alive", "uptime_seconds": round(time.monotonic() - _started_at, 1)}
+
+
+def _pool() -> dict:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"status": "ok", "pool": type(pool).__name__}
+    in_use = pool.checkedout()
+    max_overflow = pool._max_overflow
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    saturation = round(in_use / capacity, 2) if capacity else 0.0
+    return {
+        "status": "degraded" if saturation >= POOL_BUSY_RATIO else "ok",
+        "in_use": in_use,
+        "idle": pool.checkedin(),
+        "capacity": capacity,
+        "saturation": saturation,
+    }
+
+
+def _ping_database() -> float:
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return _elapsed_ms(start)
+
+
+async def _database(timeout: float) -> dict:
+    try:
+        latency_ms = await asyncio.wait_for(run_in_threadpool(_ping_database), timeout)
+    except asyncio.TimeoutError:
+        return {"status": "down", "detail": f"no answer within {timeout:g} s"}
+    except Exception as e:
+        return {"status": "down", "detail": f"{type(e).__name__}: {e}"}
+    slow = latency_ms > get_settings().health_db_slow_ms
+    return {"status": "degraded" if slow else "ok", "latency_ms": latency_ms}
+
+
+async def _provider(timeout: float) -> dict:
+    try:
+        provider = get_provider()
+    except ValueError as e:
+        return {"status": "down", "detail": str(e)}
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(provider.check(), timeout)
+    except asyncio.TimeoutError:
+        result = {"status": "down", "detail": f"no answer within {timeout:g} s"}
+    return {**result, "provider": provider.name, "latency_ms": _elapsed_ms(start)}
+
+
+def _background() -> dict:
+    warmup = warmup_status()
+    running_for = None
+    if warmup["status"] == "running" and warmup["started_at"]:
+        started_at = datetime.fromisoformat(warmup["started_at"])
+        running_for = round((datetime.now(timezone.utc) - started_at).total_seconds(), 1)
+    search_warmup = {
+        "status": {"complete": "ok", "failed": "degraded"}.get(warmup["status"], "starting"),
+        "state": warmup["status"],
+        "running_for_seconds": running_for,
+        "error": warmup["error"],
+    }
+
+    stats = get_dashboard_stats().status()
+    lagging = (stats["refreshing_for_seconds"] or 0) > stats["refresh_seconds"]
+    return {
+        "search_warmup": search_warmup,
+        "dashboard_stats": {"status": "degraded" if lagging else "ok", **stats},
+        "seat_events": broker_status(),
+        "journey_timetable": timetable_status(),
+    }
+
+
+async def _event_loop() -> dict:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.sleep(0)
+    lag_ms = round((loop.time() - start) * 1000, 1)
+    return {"status": "degraded" if lag_ms > LOOP_LAG_DEGRADED_MS else "ok", "lag_ms": lag_ms}
+
+
+async def _check() -> dict:
+    settings = get_settings()
+    timeout = settings.health_check_timeout_seconds
+    # Read the pool before the database check takes a connection from it
+    pool = _pool()
+    database, provider, event_loop = await asyncio.gather(
+        _database(timeout), _provider(timeout), _event_loop()
+    )
+    background = _background()
+
+    ready = database["status"] != "down" and background["search_warmup"]["status"] != "starting"
+    statuses = [database["status"], pool["status"], provider["status"], event_loop["status"]]
+    statuses += [task["status"] for task in background.values()]
+    if not ready:
+        status = "starting" if database["status"] != "down" else "down"
+    else:
+        status = "ok" if all(s == "ok" for s in statuses) else "degraded"
+
+    return {
+        "status": status,
+        "ready": ready,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "uptime_seconds": round(time.monotonic() - _started_at, 1),
+        "checks": {
+            "database": database,
+            "pool": pool,
+            "provider": provider,
+            "event_loop": event_loop,
+            "background": background,
+        },
+    }
+
+
+async def readiness() -> dict:
+    """The latest readiness report, recomputed when older than HEALTH_CACHE_SECONDS."""
+    global _report, _report_at
+    max_age = get_settings().health_cache_seconds
+    if _report is not None and time.monotonic() - _report_at < max_age:
+        return _report
+    async with _report_lock:
+        if _report is None or time.monotonic() - _report_at >= max_age:
+            _report = await _check()
+            _report_at = time.monotonic()
+        return _report
@@ -0,0 +1,218 @@
+"""
+Idempotency keys for retried writes.
+The first request with a key claims a row; the handler then records its
+response in the same transaction as its own writes, so a retry either finds
+the finished response (and replays it) or an unfinished claim (and waits for
+it). Claims whose transaction never committed are taken over after
+LOCK_TIMEOUT, and all keys expire after KEY_TTL.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.idempotency import IdempotencyKey
+
+KEY_TTL = timedelta(hours=24)
+LOCK_TIMEOUT = timedelta(seconds=60)
+WAIT_SECONDS = 10.0
+POLL_SECONDS = 0.05
+PURGE_EVERY = 500
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is sent again with a different request."""
+
+
+class IdempotencyInProgress(Exception):
+    """Raised when a request with the same key is still running after waiting."""
+
+
+class IdempotencyClaim:
+    """A claimed key, or a finished response to replay."""
+
+    def __init__(self, record_id: Optional[int] = None, replay_code: Optional[int] = None, replay_body: Any = None):
+        self.record_id = record_id
+        self.replay_code = replay_code
+        self.replay_body = replay_body
+        self.completed = replay_code is not None
+
+    @property
+    def is_replay(self) -> bool:
+        return self.replay_code is not None
+
+    def complete(self, db: Session, body: Any, status_code: int = 200):
+        """Record the response in the caller's transaction. The caller commits."""
+        if self.record_id is None:
+            return
+        if hasattr(body, "model_dump"):
+            body = body.model_dump(mode="json")
+        db.query(IdempotencyKey).filter(IdempotencyKey.id == self.record_id).update({
+            IdempotencyKey.status: "completed",
+            IdempotencyKey.response_code: status_code,
+            IdempotencyKey.response_body: body,
+        }, synchronize_session=False)
+        # Only a committed response counts; until then release() may still drop the claim
+        db.info.setdefault("idempotency_claims", []).append(self)
+
+    def complete_now(self, body: Any, status_code: int):
+        """Record a response in its own transaction (e.g. an error after the caller rolled back)."""
+        if self.record_id is None:
+            return
+        db = SessionLocal()
+        try:
+            self.complete(db, body, status_code)
+            db.commit()
+        finally:
+            db.close()
+
+    def release(self):
+        """Drop an unfinished claim so the request can be retried."""
+        if self.record_id is None or self.completed:
+            return
+        db = SessionLocal()
+        try:
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.id == self.record_id,
+                IdempotencyKey.status == "in_progress"
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def request_fingerprint(scope: str, payload: Any) -> str:
+    """Stable hash of what a key was first used for."""
+    raw = json.dumps([scope, payload], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+_claims = 0
+_claims_lock = threading.Lock()
+
+
+def _try_claim(user_id: int, key: str, scope: str, fingerprint: str) -> Optional[IdempotencyClaim]:
+    """One claim attempt; returns None while another request holds the key."""
+    global _claims
+    db = SessionLocal()
+    try:
+        while True:
+            now = datetime.now(timezone.utc)
+            db.add(IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                scope=scope,
+                request_hash=fingerprint,
+                locked_at=now,
+                expires_at=now + KEY_TTL
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+            else:
+                record = db.query(IdempotencyKey.id).filter(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key
+                ).one()
+                with _claims_lock:
+                    _claims += 1
+                    purge = _claims % PURGE_EVERY == 0
+                if purge:
+                    purge_expired(db)
+                return IdempotencyClaim(record.id)
+
+            record = db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key
+            ).first()
+            if record is None:
+                continue
+            if _as_utc(record.expires_at) <= now:
+                db.query(IdempotencyKey).filter(
+                    IdempotencyKey.id == record.id,
+                    IdempotencyKey.expires_at <= now
+                ).delete(synchronize_session=False)
+                db.commit()
+                continue
+            if record.request_hash != fingerprint:
+                raise IdempotencyKeyReused("Idempotency-Key was already used for a different request")
+            if record.status == "completed":
+                return IdempotencyClaim(record.id, record.response_code, record.response_body)
+
+            # Unfinished: the holder's transaction either commits the response
+            # or rolls back, so a claim idle past LOCK_TIMEOUT is safe to take over
+            taken = db.query(IdempotencyKey).filter(
+                IdempotencyKey.id == record.id,
+                IdempotencyKey.status == "in_progress",
+                IdempotencyKey.locked_at < now - LOCK_TIMEOUT
+            ).update({IdempotencyKey.locked_at: now}, synchronize_session=False)
+            db.commit()
+            return IdempotencyClaim(record.id) if taken else None
+    finally:
+        db.close()
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def claim(user_id: int, key: Optional[str], scope: str, payload: Any, wait: float = WAIT_SECONDS) -> IdempotencyClaim:
+    """Claim a key, waiting up to `wait` seconds for a concurrent duplicate to finish."""
+    if not key:
+        return IdempotencyClaim()
+    fingerprint = request_fingerprint(scope, payload)
+    deadline = time.monotonic() + wait
+    while True:
+        result = _try_claim(user_id, key, scope, fingerprint)
+        if result is not None:
+            return result
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress("A request with this Idempotency-Key is still being processed")
+        time.sleep(POLL_SECONDS)
+
+
+async def claim_async(user_id: int, key: Optional[str], scope: str, payload: Any, wait: float = WAIT_SECONDS) -> IdempotencyClaim:
+    """claim() for request handlers; queries run in the threadpool and waits do not block the event loop."""
+    if not key:
+        return IdempotencyClaim()
+    fingerprint = request_fingerprint(scope, payload)
+    deadline = time.monotonic() + wait
+    while True:
+        result = await run_in_threadpool(_try_claim, user_id, key, scope, fingerprint)
+        if result is not None:
+            return result
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress("A request with this Idempotency-Key is still being processed")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_completed(session: Session):
+    for claim in session.info.pop("idempotency_claims", ()):
+        claim.completed = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_completions(session: Session):
+    session.info.pop("idempotency_claims", None)
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired keys."""
+    deleted = db.query(IdempotencyKey).filter(
+        IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,196 @@
+"""
+Seat inventory reconciliation.
+A departure's available_seats counter is a cache of its seat rows, and a
+seat row is only legitimately unavailable while an active booking holds it.
+This module finds departures where either has drifted (seats held by
+cancelled bookings, counters that disagree with the seats) and, when asked,
+repairs them set-based.
+"""
+
+from datetime import date
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from ..models.booking import Booking, BookingPassenger
+from ..models.bus import BusSchedule, Seat
+from .seat_events import record_seat_change
+
+# Bookings whose seats stay taken
+HOLDING_STATUSES = ("pending", "confirmed", "completed")
+
+
+def adjust_available(db: Session, schedule_id: int, taken: Iterable[int] = (), released: Iterable[int] = ()) -> int:
+    """
+    Apply seats taken or released by a booking to the departure's counter in
+    the database, bump its version and queue the seat map update. The caller
+    commits. Returns the new available_seats.
+    """
+    taken, released = list(taken), list(released)
+    available_seats, version = db.execute(
+        update(BusSchedule)
+        .where(BusSchedule.id == schedule_id)
+        .values(
+            available_seats=BusSchedule.available_seats - len(taken) + len(released),
+            version=BusSchedule.version + 1
+        )
+        .returning(BusSchedule.available_seats, BusSchedule.version)
+        .execution_options(synchronize_session=False)
+    ).one()
+    record_seat_change(db, schedule_id, version, available_seats, taken=taken, released=released)
+    return available_seats
+
+
+def record_schedule_updates(db: Session, rows, released_by_schedule: Optional[dict] = None):
+    """Queue seat map updates for (id, available_seats, version, status) rows from an UPDATE ... RETURNING."""
+    released_by_schedule = released_by_schedule or {}
+    for schedule_id, available_seats, version, schedule_status in rows:
+        record_seat_change(
+            db, schedule_id, version, available_seats,
+            released=released_by_schedule.get(schedule_id, ()), status=schedule_status
+        )
+
+
+def take_seats(db: Session, schedule_id: int, seat_ids: Iterable[int]) -> List[int]:
+    """
+    Mark a departure's seats taken if they are still available, in one
+    conditional UPDATE, and return the ids actually taken. A concurrent
+    booking of the same seat gets a short list and must fail.
+    """
+    return list(db.execute(
+        update(Seat)
+        .where(Seat.id.in_(list(seat_ids)), Seat.bus_schedule_id == schedule_id, Seat.is_available.is_(True))
+        .values(is_available=False)
+        .returning(Seat.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+
+
+def release_seats(db: Session, *criteria) -> dict:
+    """Mark matching taken seats available; returns the released seat ids per departure."""
+    released = {}
+    rows = db.execute(
+        update(Seat)
+        .where(Seat.is_available.is_(False), *criteria)
+        .values(is_available=True)
+        .returning(Seat.id, Seat.bus_schedule_id)
+        .execution_options(synchronize_session=False)
+    )
+    for seat_id, schedule_id in rows:
+        released.setdefault(schedule_id, []).append(seat_id)
+    return released
+
+
+_RETURNING = (BusSchedule.id, BusSchedule.available_seats, BusSchedule.version, BusSchedule.status)
+
+
+def bump_versions(db: Session, schedule_ids: Iterable[int] = (), bus_id: Optional[int] = None) -> List[int]:
+    """
+    Mark departures as changed so cached detail/seat responses (ETags) go
+    stale and seat map subscribers see the new version. Call in the same
+    transaction as the write. Returns the ids of the departures bumped.
+    """
+    schedule_ids = list(schedule_ids)
+    if not schedule_ids and bus_id is None:
+        return []
+    criteria = BusSchedule.bus_id == bus_id if bus_id is not None else BusSchedule.id.in_(schedule_ids)
+    rows = db.execute(
+        update(BusSchedule)
+        .where(criteria)
+        .values(version=BusSchedule.version + 1)
+        .returning(*_RETURNING)
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_schedule_updates(db, rows)
+    return [row.id for row in rows]
+
+
+def _held_by_booking():
+    return exists().where(
+        BookingPassenger.seat_id == Seat.id,
+        BookingPassenger.booking_id == Booking.id,
+        Booking.status.in_(HOLDING_STATUSES)
+    )
+
+
+def inventory_drift(db: Session, from_date: Optional[date] = None, schedule_ids: Optional[List[int]] = None) -> List[dict]:
+    """
+    Scheduled departures (from from_date, default today) whose seat counter
+    or seat rows disagree with their bookings.
+    """
+    from_date = from_date or date.today()
+    in_scope = and_(BusSchedule.status == "scheduled", BusSchedule.travel_date >= from_date)
+    if schedule_ids is not None:
+        in_scope = and_(in_scope, BusSchedule.id.in_(schedule_ids))
+
+    free_seats = select(
+        Seat.bus_schedule_id,
+        func.count(Seat.id).label("free"),
+    ).where(Seat.is_available.is_(True)).group_by(Seat.bus_schedule_id).subquery()
+
+    orphaned = select(
+        Seat.bus_schedule_id,
+        func.count(Seat.id).label("orphaned"),
+    ).where(Seat.is_available.is_(False), ~_held_by_booking()).group_by(Seat.bus_schedule_id).subquery()
+
+    free = func.coalesce(free_seats.c.free, 0)
+    leaked = func.coalesce(orphaned.c.orphaned, 0)
+    rows = db.execute(
+        select(
+            BusSchedule.id,
+            BusSchedule.travel_date,
+            BusSchedule.available_seats,
+            free,
+            leaked,
+        ).outerjoin(
+            free_seats, free_seats.c.bus_schedule_id == BusSchedule.id
+        ).outerjoin(
+            orphaned, orphaned.c.bus_schedule_id == BusSchedule.id
+        ).where(
+            in_scope,
+            (BusSchedule.available_seats != free) | (leaked > 0)
+        ).order_by(BusSchedule.id)
+    ).all()
+
+    return [
+        {
+            "schedule_id": schedule_id,
+            "travel_date": str(travel_date),
+            "available_seats": available,
+            "free_seats": free_count,
+            "orphaned_seats": leaked_count,
+            # What the counter should read once orphaned seats are released
+            "drift": free_count + leaked_count - available,
+        }
+        for schedule_id, travel_date, available, free_count, leaked_count in rows
+    ]
+
+
+def reconcile_inventory(db: Session, fix: bool = False, from_date: Optional[date] = None) -> List[dict]:
+    """
+    Report inventory drift and, with fix=True, release orphaned seats and
+    recompute available_seats from the seat rows. Commits when fixing.
+    """
+    drifted = inventory_drift(db, from_date)
+    if not fix or not drifted:
+        return drifted
+
+    schedule_ids = [row["schedule_id"] for row in drifted]
+    released = release_seats(db, Seat.bus_schedule_id.in_(schedule_ids), ~_held_by_booking())
+    rows = db.execute(
+        update(BusSchedule)
+        .where(BusSchedule.id.in_(schedule_ids))
+        .values(
+            available_seats=select(func.count(Seat.id)).where(
+                Seat.bus_schedule_id == BusSchedule.id,
+                Seat.is_available.is_(True)
+            ).scalar_subquery(),
+            version=BusSchedule.version + 1
+        )
+        .returning(*_RETURNING)
+        .execution_options(synchronize_session=False)
+    ).all()
+    record_schedule_updates(db, rows, released)
+    db.commit()
+    return drifted
@@ -0,0 +1,317 @@
+"""
+Connecting-bus journey planner.
+Departures in the next JOURNEY_WINDOW_DAYS are held in memory as a
+timetable of connections (one per departure: from city, to city, departure
+and arrival datetime, fare, free seats) sorted by departure. A query scans
+the connections once in departure order, RAPTOR-style in rounds of legs:
+for each city and number of legs so far it keeps the cheapest way of being
+there and ready to board (arrived at least JOURNEY_MIN_CONNECTION_MINUTES
+earlier). Every connection reaching the destination is a candidate, and the
+candidates that no other beats on arrival, fare and transfers together are
+returned, ordered for the requested criterion (earliest arrival, cheapest
+or fewest transfers).
+
+The timetable is refreshed incrementally: every JOURNEY_REFRESH_SECONDS
+the (id, version) of the departures in the window are compared with the
+loaded ones and only new or changed departures are re-read. Seat counts
+can therefore lag by up to that interval; booking still checks the seats.
+"""
+
+import bisect
+import heapq
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models.bus import City, Route, Operator, Bus, BusSchedule
+
+# Latest arrival considered, counted from the start of the travel date
+MAX_JOURNEY_HOURS = 48
+
+SORT_KEYS = {
+    "arrival": lambda j: (j["arrival"], j["total_price"], j["transfers"]),
+    "price": lambda j: (j["total_price"], j["arrival"], j["transfers"]),
+    "transfers": lambda j: (j["transfers"], j["arrival"], j["total_price"]),
+}
+
+
+class Connection(NamedTuple):
+    schedule_id: int
+    route_id: int
+    from_city_id: int
+    to_city_id: int
+    departure: datetime
+    arrival: datetime
+    price: float
+    available_seats: int
+    operator_name: str
+    bus_type: str
+
+
+class Timetable:
+    """Snapshot of the scheduled connections departing in [start, end)."""
+
+    def __init__(self, start: date, end: date, connections: Dict[int, Connection], versions: Dict[int, int], cities: Dict[int, dict]):
+        self.start = start
+        self.end = end
+        self.connections = connections
+        self.versions = versions
+        self.cities = cities
+        self.ordered = sorted(connections.values(), key=lambda c: c.departure)
+        self.departures = [c.departure for c in self.ordered]
+        self.loaded_at = time.monotonic()
+
+    def plan(
+        self,
+        origin: int,
+        destination: int,
+        depart_after: datetime,
+        depart_before: Optional[datetime] = None,
+        passengers: int = 1,
+        max_transfers: int = 2,
+        min_connection: Optional[timedelta] = None
+    ) -> List[dict]:
+        """
+        Pareto-optimal journeys (arrival, fare, transfers) from origin to
+        destination whose first leg leaves in [depart_after, depart_before).
+        """
+        if min_connection is None:
+            min_connection = timedelta(minutes=get_settings().journey_min_connection_minutes)
+        max_legs = max_transfers + 1
+        latest = datetime.combine(depart_after.date(), datetime.min.time()) + timedelta(hours=MAX_JOURNEY_HOURS)
+
+        # Per (city, legs): arrivals not yet ready to board, and the cheapest ready one
+        pending: Dict[tuple, list] = {}
+        ready: Dict[tuple, tuple] = {}
+        # Per (connection index, legs): (fare so far, previous (connection index, legs))
+        labels: Dict[tuple, tuple] = {}
+        candidates = []
+
+        first = bisect.bisect_left(self.departures, depart_after)
+        for index in range(first, len(self.ordered)):
+            connection = self.ordered[index]
+            if connection.departure > latest:
+                break
+            if connection.available_seats < passengers or connection.arrival > latest:
+                continue
+            city = connection.from_city_id
+            if city == destination:
+                continue
+
+            for legs in range(max_legs):
+                if legs == 0:
+                    if city != origin or (depart_before and connection.departure >= depart_before):
+                        continue
+                    best = (0.0, None)
+                else:
+                    key = (city, legs)
+                    queue = pending.get(key)
+                    while queue and queue[0][0] <= connection.departure:
+                        _, fare, previous = heapq.heappop(queue)
+                        if key not in ready or fare < ready[key][0]:
+                            ready[key] = (fare, previous)
+                    if key not in ready:
+                        continue
+                    best = ready[key]
+
+                fare = best[0] + connection.price
+                labels[(index, legs + 1)] = (fare, best[1])
+                if connection.to_city_id == destination:
+                    candidates.append((index, legs + 1, fare))
+                elif connection.to_city_id != origin and legs + 1 < max_legs:
+                    heapq.heappush(
+                        pending.setdefault((connection.to_city_id, legs + 1), []),
+                        (connection.arrival + min_connection, fare, (index, legs + 1))
+                    )
+
+        journeys = [self._journey(labels, index, legs, fare) for index, legs, fare in candidates]
+        return _pareto(journeys)
+
+    def _journey(self, labels: dict, index: int, legs: int, fare: float) -> dict:
+        chain = []
+        step = (index, legs)
+        while step is not None:
+            chain.append(self.ordered[step[0]])
+            step = labels[step][1]
+        chain.reverse()
+        return {
+            "departure": chain[0].departure,
+            "arrival": chain[-1].arrival,
+            "duration_minutes": int((chain[-1].arrival - chain[0].departure).total_seconds() // 60),
+            "total_price": round(fare, 2),
+            "transfers": len(chain) - 1,
+            "legs": [
+                {
+                    "schedule_id": c.schedule_id,
+                    "route_id": c.route_id,
+                    "from_city": self.cities[c.from_city_id],
+                    "to_city": self.cities[c.to_city_id],
+                    "departure": c.departure,
+                    "arrival": c.arrival,
+                    "price": c.price,
+                    "available_seats": c.available_seats,
+                    "operator_name": c.operator_name,
+                    "bus_type": c.bus_type,
+                }
+                for c in chain
+            ],
+        }
+
+
+def _pareto(journeys: List[dict]) -> List[dict]:
+    """Drop journeys that another one matches or beats on arrival, fare and transfers."""
+    kept = []
+    for journey in sorted(journeys, key=SORT_KEYS["arrival"]):
+        if not any(
+            other["total_price"] <= journey["total_price"] and other["transfers"] <= journey["transfers"]
+            for other in kept
+        ):
+            kept.append(journey)
+    return kept
+
+
+def _connections(db: Session, *criteria) -> Dict[int, Connection]:
+    rows = db.execute(
+        select(
+            BusSchedule.id, BusSchedule.route_id, Route.from_city_id, Route.to_city_id,
+            BusSchedule.travel_date, BusSchedule.departure_time, Route.duration_minutes,
+            BusSchedule.base_price, BusSchedule.available_seats, Operator.name, Bus.bus_type
+        ).join(
+            Route, Route.id == BusSchedule.route_id
+        ).join(
+            Bus, Bus.id == BusSchedule.bus_id
+        ).join(
+            Operator, Operator.id == Bus.operator_id
+        ).where(
+            BusSchedule.status == "scheduled", Route.is_active == True, *criteria
+        )
+    )
+    connections = {}
+    for (schedule_id, route_id, from_city_id, to_city_id, travel_date, departure_time,
+         duration_minutes, price, available_seats, operator_name, bus_type) in rows:
+        departure = datetime.combine(travel_date, departure_time)
+        connections[schedule_id] = Connection(
+            schedule_id, route_id, from_city_id, to_city_id, departure,
+            departure + timedelta(minutes=duration_minutes), price, available_seats, operator_name, bus_type
+        )
+    return connections
+
+
+def _cities(db: Session) -> Dict[int, dict]:
+    rows = db.execute(select(City.id, City.name, City.state, City.code, City.is_popular)).mappings()
+    return {row["id"]: dict(row) for row in rows}
+
+
+def _in_window(start: date, end: date):
+    return (BusSchedule.travel_date >= start, BusSchedule.travel_date < end)
+
+
+def build_timetable(db: Session, start: Optional[date] = None, days: Optional[int] = None) -> Timetable:
+    """Load every scheduled departure in the window."""
+    start = start or date.today()
+    end = start + timedelta(days=days or get_settings().journey_window_days)
+    window = _in_window(start, end)
+    versions = dict(db.execute(
+        select(BusSchedule.id, BusSchedule.version).where(BusSchedule.status == "scheduled", *window)
+    ).all())
+    return Timetable(start, end, _connections(db, *window), versions, _cities(db))
+
+
+def refresh_timetable(db: Session, timetable: Timetable, start: Optional[date] = None) -> Timetable:
+    """
+    A timetable for the window starting at start (default today), re-reading
+    only departures that are new or whose version changed since timetable was
+    loaded. Returns the same object if nothing changed.
+    """
+    start = start or date.today()
+    end = start + (timetable.end - timetable.start)
+    versions = dict(db.execute(
+        select(BusSchedule.id, BusSchedule.version).where(BusSchedule.status == "scheduled", *_in_window(start, end))
+    ).all())
+    changed = [
+        schedule_id for schedule_id, version in versions.items()
+        if timetable.versions.get(schedule_id) != version
+    ]
+    if start == timetable.start and not changed and versions.keys() == timetable.versions.keys():
+        timetable.loaded_at = time.monotonic()
+        return timetable
+
+    connections = {
+        schedule_id: connection for schedule_id, connection in timetable.connections.items()
+        if schedule_id in versions
+    }
+    cities = timetable.cities
+    if changed:
+        for offset in range(0, len(changed), 1000):
+            connections.update(_connections(db, BusSchedule.id.in_(changed[offset:offset + 1000])))
+        missing = {c.from_city_id for c in connections.values()} | {c.to_city_id for c in connections.values()}
+        if not missing <= cities.keys():
+            cities = _cities(db)
+    # A departure cancelled between the two reads is left out rather than kept stale
+    versions = {schedule_id: versions[schedule_id] for schedule_id in connections}
+    return Timetable(start, end, connections, versions, cities)
+
+
+_timetable: Optional[Timetable] = None
+_timetable_lock = threading.Lock()
+
+
+def get_timetable() -> Timetable:
+    """The process-wide timetable, loaded on first use and refreshed when older than the refresh interval."""
+    global _timetable
+    settings = get_settings()
+    timetable = _timetable
+    if timetable is not None and time.monotonic() - timetable.loaded_at < settings.journey_refresh_seconds:
+        return timetable
+    with _timetable_lock:
+        if _timetable is not None and time.monotonic() - _timetable.loaded_at < settings.journey_refresh_seconds:
+            return _timetable
+        db = SessionLocal()
+        try:
+            if _timetable is None:
+                _timetable = build_timetable(db)
+            else:
+                _timetable = refresh_timetable(db, _timetable)
+        finally:
+            db.close()
+        return _timetable
+
+
+def timetable_status() -> dict:
+    """Age of the loaded timetable (for health probes); does not load it."""
+    timetable = _timetable
+    if timetable is None:
+        return {"status": "ok", "detail": "not loaded"}
+    return {
+        "status": "ok",
+        "age_seconds": round(time.monotonic() - timetable.loaded_at, 1),
+        "departures": len(timetable.connections),
+    }
+
+
+def plan_journeys(
+    origin: int,
+    destination: int,
+    travel_date: date,
+    passengers: int = 1,
+    max_transfers: int = 2,
+    sort_by: str = "arrival",
+    limit: int = 10
+) -> List[dict]:
+    """Journeys leaving on travel_date (not before now), best first by sort_by."""
+    timetable = get_timetable()
+    day_start = datetime.combine(travel_date, datetime.min.time())
+    journeys = timetable.plan(
+        origin, destination,
+        depart_after=max(day_start, datetime.now()),
+        depart_before=day_start + timedelta(days=1),
+        passengers=passengers,
+        max_transfers=max_transfers
+    )
+    return sorted(journeys, key=SORT_KEYS[sort_by])[:limit]
@@ -0,0 +1,247 @@
+"""
+Wallet ledger.
+Every balance change is a single conditional UPDATE on integer paise
+(balance_paise = balance_paise + delta WHERE balance_paise + delta >= 0) plus an
+appended Transaction row, both in the caller's transaction. There is no
+read-modify-write in Python, so concurrent bookings, top-ups and refunds
+cannot lose updates or drive a wallet negative. The same transaction also
+rolls the change into the wallet's monthly WalletSnapshot.
+"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from sqlalchemy import insert, update, select, exists, literal, func, case, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.wallet import Wallet, Transaction, WalletSnapshot
+
+
+class InsufficientBalance(Exception):
+    """Raised when a debit would take a wallet below zero."""
+
+    def __init__(self, wallet_id: int, amount_paise: int):
+        super().__init__(f"Insufficient wallet balance for debit of ₹{amount_paise / 100:.2f}")
+        self.wallet_id = wallet_id
+        self.amount_paise = amount_paise
+
+
+def to_paise(amount) -> int:
+    """Convert a rupee amount (float, str or Decimal) to integer paise."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def get_or_create_wallet(db: Session, user_id: int) -> Wallet:
+    """Get the user's wallet, creating an empty one if needed (race-safe)."""
+    wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
+    if wallet:
+        return wallet
+
+    try:
+        with db.begin_nested():
+            wallet = Wallet(user_id=user_id, balance_paise=0, transaction_count=0)
+            db.add(wallet)
+    except IntegrityError:
+        # Created concurrently by another request
+        wallet = db.query(Wallet).filter(Wallet.user_id == user_id).one()
+    return wallet
+
+
+def period_start(moment: datetime) -> date:
+    """First day of the snapshot period (UTC calendar month) containing a moment."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date().replace(day=1)
+
+
+def _post(
+    db: Session,
+    wallet_id: int,
+    delta_paise: int,
+    description: str,
+    reference_id: Optional[int] = None
+) -> Transaction:
+    balance_paise = db.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.balance_paise + delta_paise >= 0)
+        .values(
+            balance_paise=Wallet.balance_paise + delta_paise,
+            transaction_count=Wallet.transaction_count + 1,
+            updated_at=func.now()
+        )
+        .returning(Wallet.balance_paise)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if balance_paise is None:
+        raise InsufficientBalance(wallet_id, -delta_paise)
+
+    now = datetime.now(timezone.utc)
+    _roll_into_snapshot(db, wallet_id, period_start(now), delta_paise, balance_paise)
+
+    transaction = Transaction(
+        wallet_id=wallet_id,
+        type="credit" if delta_paise >= 0 else "debit",
+        amount_paise=abs(delta_paise),
+        description=description,
+        reference_id=reference_id,
+        created_at=now
+    )
+    db.add(transaction)
+    return transaction
+
+
+def _roll_into_snapshot(db: Session, wallet_id: int, period: date, delta_paise: int, balance_paise: int):
+    """
+    Apply one posting to the wallet's snapshot for `period`.
+    The wallet UPDATE above holds the wallet's row lock until commit, so
+    postings to one wallet are serialized and the closing balance can be
+    written as an absolute value.
+    """
+    credit_paise = max(delta_paise, 0)
+    debit_paise = max(-delta_paise, 0)
+
+    result = db.execute(
+        update(WalletSnapshot)
+        .where(WalletSnapshot.wallet_id == wallet_id, WalletSnapshot.period_start == period)
+        .values(
+            credits_paise=WalletSnapshot.credits_paise + credit_paise,
+            debits_paise=WalletSnapshot.debits_paise + debit_paise,
+            closing_paise=balance_paise,
+            transaction_count=WalletSnapshot.transaction_count + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(WalletSnapshot).values(
+            wallet_id=wallet_id,
+            period_start=period,
+            opening_paise=balance_paise - delta_paise,
+            credits_paise=credit_paise,
+            debits_paise=debit_paise,
+            closing_paise=balance_paise,
+            transaction_count=1
+        ))
+
+
+def credit(
+    db: Session,
+    wallet_id: int,
+    amount_paise: int,
+    description: str,
+    reference_id: Optional[int] = None
+) -> Transaction:
+    """Add money to a wallet. The caller commits."""
+    if amount_paise <= 0:
+        raise ValueError("Credit amount must be positive")
+    return _post(db, wallet_id, amount_paise, description, reference_id)
+
+
+def debit(
+    db: Session,
+    wallet_id: int,
+    amount_paise: int,
+    description: str,
+    reference_id: Optional[int] = None
+) -> Transaction:
+    """Take money from a wallet, raising InsufficientBalance if it would go negative. The caller commits."""
+    if amount_paise <= 0:
+        raise ValueError("Debit amount must be positive")
+    return _post(db, wallet_id, -amount_paise, description, reference_id)
+
+
+def credit_many(db: Session, postings) -> int:
+    """
+    Set-based credits. `postings` is a SELECT with wallet_id, amount_paise,
+    description and reference_id columns (one row per Transaction). All
+    wallets are updated with one UPDATE, the transactions appended with one
+    INSERT ... SELECT and the monthly snapshots rolled forward the same way.
+    The caller commits. Returns the number of transactions written.
+    """
+    postings = postings.subquery()
+    totals = select(
+        postings.c.wallet_id,
+        func.sum(postings.c.amount_paise).label("amount_paise"),
+        func.count().label("postings")
+    ).group_by(postings.c.wallet_id).subquery()
+    wallet_ids = select(totals.c.wallet_id)
+
+    def per_wallet(column, wallet_id):
+        return select(column).where(totals.c.wallet_id == wallet_id).scalar_subquery()
+
+    result = db.execute(
+        update(Wallet)
+        .where(Wallet.id.in_(wallet_ids))
+        .values(
+            balance_paise=Wallet.balance_paise + per_wallet(totals.c.amount_paise, Wallet.id),
+            transaction_count=Wallet.transaction_count + per_wallet(totals.c.postings, Wallet.id),
+            updated_at=func.now()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    written = db.execute(insert(Transaction).from_select(
+        ["wallet_id", "type", "amount_paise", "description", "reference_id", "created_at"],
+        select(
+            postings.c.wallet_id,
+            literal("credit"),
+            postings.c.amount_paise,
+            postings.c.description,
+            postings.c.reference_id,
+            literal(now, Transaction.created_at.type)
+        )
+    )).rowcount
+
+    # Same rules as _roll_into_snapshot; the wallet rows stay locked until commit
+    period = period_start(now)
+    db.execute(
+        update(WalletSnapshot)
+        .where(WalletSnapshot.period_start == period, WalletSnapshot.wallet_id.in_(wallet_ids))
+        .values(
+            credits_paise=WalletSnapshot.credits_paise + per_wallet(totals.c.amount_paise, WalletSnapshot.wallet_id),
+            closing_paise=select(Wallet.balance_paise).where(Wallet.id == WalletSnapshot.wallet_id).scalar_subquery(),
+            transaction_count=WalletSnapshot.transaction_count + per_wallet(totals.c.postings, WalletSnapshot.wallet_id)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    has_snapshot = exists().where(WalletSnapshot.wallet_id == Wallet.id, WalletSnapshot.period_start == period)
+    amount = per_wallet(totals.c.amount_paise, Wallet.id)
+    db.execute(insert(WalletSnapshot).from_select(
+        ["wallet_id", "period_start", "opening_paise", "credits_paise", "debits_paise", "closing_paise", "transaction_count"],
+        select(
+            Wallet.id,
+            literal(period, WalletSnapshot.period_start.type),
+            Wallet.balance_paise - amount,
+            amount,
+            literal(0),
+            Wallet.balance_paise,
+            per_wallet(totals.c.postings, Wallet.id)
+        ).where(Wallet.id.in_(wallet_ids), ~has_snapshot)
+    ))
+    return written
+
+
+def reconcile_wallet(db: Session, wallet_id: int) -> dict:
+    """Compare a wallet's balance with the sum of its transactions."""
+    ledger_total = db.query(
+        func.coalesce(func.sum(
+            case((Transaction.type == "credit", Transaction.amount_paise), else_=-Transaction.amount_paise)
+        ), 0)
+    ).filter(Transaction.wallet_id == wallet_id).scalar()
+    balance = db.query(Wallet.balance_paise).filter(Wallet.id == wallet_id).scalar()
+
+    return {
+        "wallet_id": wallet_id,
+        "balance_paise": balance,
+        "ledger_paise": int(ledger_total),
+        "consistent": balance == int(ledger_total),
+    }
+
+
+@event.listens_for(Transaction, "before_update")
+def _transactions_are_append_only(mapper, connection, target):
+    raise ValueError("Wallet transactions are append-only and cannot be modified")
@@ -0,0 +1,95 @@
+"""
+Cache of the static half of a departure's detail.
+The bus, operator, route, boarding/dropping points and seat geometry of a
+departure do not change once it is created; only seat availability, the
+available_seats counter and the status do. The static half is built once
+per departure, cached for SCHEDULE_STATIC_CACHE_SECONDS (in Redis when
+SHARED_CACHE_REDIS_URL is set, so every worker shares it) and merged with
+the live fields on each request.
+
+Writes that do change the static half (editing a bus) call
+forget_static_details in their transaction; the entries are dropped once
+it commits.
+"""
+
+import threading
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..utils.cache import shared_cache
+
+# Fields of BusScheduleDetailResponse that are read live on every request
+LIVE_FIELDS = ("available_seats", "status")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_static_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = shared_cache(
+                    "schedule-static", maxsize=2048, ttl=get_settings().schedule_static_cache_seconds
+                )
+    return _cache
+
+
+def static_detail(schedule_id: int, build: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """
+    The cached static half for a departure, calling build() on a miss.
+    build returns a full detail dict (or None if the departure does not
+    exist); its live fields and seat availability are dropped before caching.
+    """
+    cache = get_static_cache()
+    static = cache.get(schedule_id)
+    if static is None:
+        detail = build()
+        if detail is None:
+            return None
+        static = {key: value for key, value in detail.items() if key not in LIVE_FIELDS}
+        static["seats"] = [
+            {key: value for key, value in seat.items() if key != "is_available"}
+            for seat in detail["seats"]
+        ]
+        cache.set(schedule_id, static)
+    return static
+
+
+def merge_live(static: dict, live: dict, seat_availability: dict) -> dict:
+    """Full detail dict from the static half, the live schedule fields and {seat_id: is_available}."""
+    return {
+        **static,
+        **live,
+        "seats": [
+            {**seat, "is_available": seat_availability.get(seat["id"], False)}
+            for seat in static["seats"]
+        ],
+    }
+
+
+def forget_static_details(db: Session, schedule_ids: Iterable[int]):
+    """Drop departures' cached static halves once the session commits."""
+    db.info.setdefault("stale_schedule_details", set()).update(schedule_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_stale(session: Session):
+    schedule_ids = session.info.pop("stale_schedule_details", None)
+    if not schedule_ids:
+        return
+    cache = get_static_cache()
+    for schedule_id in schedule_ids:
+        try:
+            cache.pop(schedule_id)
+        except Exception as e:
+            print(f"Schedule cache invalidation failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _keep_cached(session: Session):
+    session.info.pop("stale_schedule_details", None)
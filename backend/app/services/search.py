@@ -0,0 +1,382 @@
+"""
+Bus search: cached lookups, filtering, sorting and facets.
+A corridor has at most a few hundred departures a day, so a search loads
+them once (one query) and everything else runs over those rows: filters,
+facet counts, sort and the requested page. Facet counts are disjunctive,
+as in most travel sites: each facet is counted with every other filter
+applied but not its own, so ticking one bus type still shows how many
+departures the other bus types would add.
+
+Each worker keeps the city and active-route index (SEARCH_INDEX_SECONDS)
+and recent route-day departure lists (SEARCH_CACHE_SECONDS) in memory. A
+route-day is dropped as soon as a transaction in this worker that changes
+its departures commits (the days fares.py marks stale); other workers see
+the change when their entry expires. On startup warm_search_cache preloads
+the index and the next SEARCH_WARMUP_DAYS of departures on routes between
+popular cities in the background, then reloads them every half
+SEARCH_CACHE_SECONDS so they stay cached; warmup_status() reports progress.
+"""
+
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, aliased
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models.bus import City, Route, Operator, Bus, BusSchedule
+from ..schemas.bus import CityResponse, OperatorResponse, RouteResponse, BusResponse, BusScheduleResponse
+from ..utils.cache import TTLCache
+from ..utils.serialization import columns, pick
+
+FromCity = aliased(City)
+ToCity = aliased(City)
+
+
+def schedule_query():
+    """One row per departure with its bus, operator and route flattened in."""
+    return select(
+        *columns(BusScheduleResponse, BusSchedule),
+        *columns(BusResponse, Bus, "bus_"),
+        *columns(OperatorResponse, Operator, "operator_"),
+        *columns(RouteResponse, Route, "route_"),
+        *columns(CityResponse, FromCity, "from_"),
+        *columns(CityResponse, ToCity, "to_"),
+    ).join(
+        Bus, Bus.id == BusSchedule.bus_id
+    ).join(
+        Operator, Operator.id == Bus.operator_id
+    ).join(
+        Route, Route.id == BusSchedule.route_id
+    ).join(
+        FromCity, FromCity.id == Route.from_city_id
+    ).join(
+        ToCity, ToCity.id == Route.to_city_id
+    )
+
+
+def schedule_dict(row) -> dict:
+    """BusScheduleResponse-shaped dict from a schedule_query() row."""
+    return {
+        **pick(row, BusScheduleResponse, BusSchedule),
+        "bus": {
+            **pick(row, BusResponse, Bus, "bus_"),
+            "operator": pick(row, OperatorResponse, Operator, "operator_"),
+        },
+        "route": {
+            **pick(row, RouteResponse, Route, "route_"),
+            "from_city": pick(row, CityResponse, FromCity, "from_"),
+            "to_city": pick(row, CityResponse, ToCity, "to_"),
+        },
+    }
+
+
+def _bookable():
+    return (BusSchedule.status == "scheduled", BusSchedule.available_seats > 0)
+
+
+class CityEntry(NamedTuple):
+    id: int
+    name: str
+    code: str
+    is_popular: bool
+
+
+class SearchIndex:
+    """Cities (by id) and active direct routes, as search resolves them."""
+
+    def __init__(self, db: Session):
+        self.cities = [
+            CityEntry(*row) for row in db.execute(
+                select(City.id, City.name, City.code, City.is_popular).order_by(City.id)
+            )
+        ]
+        self.routes: Dict[tuple, int] = {}
+        for route_id, from_city_id, to_city_id in db.execute(
+            select(Route.id, Route.from_city_id, Route.to_city_id).where(Route.is_active == True).order_by(Route.id)
+        ):
+            self.routes.setdefault((from_city_id, to_city_id), route_id)
+        self.loaded_at = time.monotonic()
+
+    def find_city(self, query: str) -> Optional[CityEntry]:
+        """First city whose code equals, or name contains, query (case-insensitive)."""
+        query = query.lower()
+        for city in self.cities:
+            if city.code.lower() == query or query in city.name.lower():
+                return city
+        return None
+
+    def find_route(self, from_city_id: int, to_city_id: int) -> Optional[int]:
+        return self.routes.get((from_city_id, to_city_id))
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+_departures: Optional[TTLCache] = None
+
+
+def get_index(db: Session) -> SearchIndex:
+    """The worker's search index, reloaded when older than SEARCH_INDEX_SECONDS."""
+    global _index
+    max_age = get_settings().search_index_seconds
+    index = _index
+    if index is None or time.monotonic() - index.loaded_at >= max_age:
+        with _index_lock:
+            if _index is None or time.monotonic() - _index.loaded_at >= max_age:
+                _index = SearchIndex(db)
+            index = _index
+    return index
+
+
+def invalidate_index():
+    """Reload the index on next use (after cities or routes change)."""
+    global _index
+    _index = None
+
+
+def _departure_cache() -> TTLCache:
+    global _departures
+    if _departures is None:
+        _departures = TTLCache(maxsize=4096, ttl=get_settings().search_cache_seconds)
+    return _departures
+
+
+def departures(db: Session, route_id: int, travel_date: date) -> List[dict]:
+    """Bookable departures on a route and day, by departure time. Do not modify the result."""
+    cache = _departure_cache()
+    key = (route_id, travel_date)
+    cached = cache.get(key)
+    if cached is None:
+        rows = db.execute(
+            schedule_query().where(
+                BusSchedule.route_id == route_id,
+                BusSchedule.travel_date == travel_date,
+                *_bookable()
+            ).order_by(BusSchedule.departure_time)
+        ).mappings()
+        cached = [schedule_dict(row) for row in rows]
+        cache.set(key, cached)
+    return cached
+
+
+_warmup = {
+    "status": "pending", "started_at": None, "finished_at": None, "refreshed_at": None,
+    "routes": 0, "route_days": 0, "error": None,
+}
+
+
+def warmup_status() -> dict:
+    return dict(_warmup)
+
+
+def _load_popular_days(db: Session, days: int) -> tuple:
+    """Put the next days of departures on routes between popular cities into the cache."""
+    index = get_index(db)
+    popular = {city.id for city in index.cities if city.is_popular}
+    route_ids = [
+        route_id for (from_city_id, to_city_id), route_id in index.routes.items()
+        if from_city_id in popular and to_city_id in popular
+    ]
+    first_day = date.today()
+    loaded: Dict[tuple, List[dict]] = {
+        (route_id, first_day + timedelta(days=offset)): []
+        for route_id in route_ids for offset in range(days)
+    }
+    if route_ids and days > 0:
+        rows = db.execute(
+            schedule_query().where(
+                BusSchedule.route_id.in_(route_ids),
+                BusSchedule.travel_date >= first_day,
+                BusSchedule.travel_date < first_day + timedelta(days=days),
+                *_bookable()
+            ).order_by(BusSchedule.departure_time)
+        ).mappings()
+        for row in rows:
+            loaded[(row["route_id"], row["travel_date"])].append(schedule_dict(row))
+    cache = _departure_cache()
+    for key, value in loaded.items():
+        cache.set(key, value)
+    return len(route_ids), len(loaded)
+
+
+def warm_search_cache(days: Optional[int] = None):
+    """Load the index and the next days of departures on popular routes into the cache."""
+    days = get_settings().search_warmup_days if days is None else days
+    _warmup.update(status="running", started_at=datetime.now(timezone.utc).isoformat(), error=None)
+    db = SessionLocal()
+    try:
+        invalidate_index()
+        routes, route_days = _load_popular_days(db, days)
+        _warmup.update(
+            status="complete", routes=routes, route_days=route_days,
+            refreshed_at=datetime.now(timezone.utc).isoformat()
+        )
+        print(f"✅ Search cache warmed: {routes} routes, {route_days} route-days")
+    except Exception as e:
+        _warmup.update(status="failed", error=str(e))
+        print(f"❌ Search cache warm-up failed: {e}")
+    finally:
+        _warmup["finished_at"] = datetime.now(timezone.utc).isoformat()
+        db.close()
+
+
+def _keep_warm(days: int):
+    """
+    Reload the popular route-days every half SEARCH_CACHE_SECONDS so they
+    never expire: entries keep the short TTL that bounds how stale other
+    workers' writes can look, but the first searches after start-up and
+    every one after that are still served from memory.
+    """
+    interval = get_settings().search_cache_seconds / 2
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            routes, route_days = _load_popular_days(db, days)
+            _warmup.update(
+                status="complete", routes=routes, route_days=route_days, error=None,
+                refreshed_at=datetime.now(timezone.utc).isoformat()
+            )
+        except Exception as e:
+            _warmup.update(status="failed", error=str(e))
+            print(f"❌ Search cache refresh failed: {e}")
+        finally:
+            db.close()
+
+
+def _warm_and_keep_warm():
+    days = get_settings().search_warmup_days
+    warm_search_cache(days)
+    if days > 0:
+        _keep_warm(days)
+
+
+def start_warmup() -> threading.Thread:
+    """Warm the search cache on a background thread, which then keeps it warm."""
+    thread = threading.Thread(target=_warm_and_keep_warm, name="search-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_changed_days(session: Session):
+    days = session.info.pop("changed_route_days", None)
+    if days and _departures is not None:
+        for key in days:
+            _departures.pop(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _keep_cached_days(session: Session):
+    session.info.pop("changed_route_days", None)
+
+
+# (value, label, first hour, hour after last)
+DEPARTURE_WINDOWS = (
+    ("early_morning", "Before 6 AM", 0, 6),
+    ("morning", "6 AM - 12 PM", 6, 12),
+    ("afternoon", "12 PM - 6 PM", 12, 18),
+    ("evening", "After 6 PM", 18, 24),
+)
+
+SORT_KEYS: Dict[str, Callable[[dict], tuple]] = {
+    "departure": lambda d: (d["departure_time"],),
+    "price": lambda d: (d["base_price"], d["departure_time"]),
+    "rating": lambda d: (d["bus"]["operator"]["rating"] or 0, d["departure_time"]),
+    "duration": lambda d: (d["route"]["duration_minutes"], d["departure_time"]),
+    "seats": lambda d: (d["available_seats"], d["departure_time"]),
+}
+
+
+def departure_window(departure_time: dtime) -> str:
+    for value, _, start, end in DEPARTURE_WINDOWS:
+        if start <= departure_time.hour < end:
+            return value
+    return DEPARTURE_WINDOWS[-1][0]
+
+
+def _predicates(filters) -> Dict[str, Callable[[dict], bool]]:
+    """One predicate per filter dimension."""
+    bus_types = {value.lower() for value in filters.bus_types}
+    operator_ids = set(filters.operator_ids)
+    amenities = set(filters.amenities)
+    windows = set(filters.departure_windows)
+    return {
+        "bus_types": lambda d: not bus_types or d["bus"]["bus_type"].lower() in bus_types,
+        "operators": lambda d: not operator_ids or d["bus"]["operator"]["id"] in operator_ids,
+        "amenities": lambda d: amenities <= set(d["bus"]["amenities"] or ()),
+        "departure_windows": lambda d: not windows or departure_window(d["departure_time"]) in windows,
+        "seats": lambda d: d["available_seats"] >= filters.min_seats,
+        "price": lambda d: (
+            (filters.min_price is None or d["base_price"] >= filters.min_price)
+            and (filters.max_price is None or d["base_price"] <= filters.max_price)
+        ),
+    }
+
+
+def _counts(values: Iterable[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def _facets(departures: List[dict], predicates: Dict[str, Callable[[dict], bool]]) -> dict:
+    def matching_except(dimension: str) -> List[dict]:
+        checks = [check for name, check in predicates.items() if name != dimension]
+        return [d for d in departures if all(check(d) for check in checks)]
+
+    bus_types = _counts(d["bus"]["bus_type"] for d in matching_except("bus_types"))
+
+    operators: Dict[int, dict] = {}
+    for d in matching_except("operators"):
+        operator = d["bus"]["operator"]
+        entry = operators.setdefault(operator["id"], {"value": str(operator["id"]), "label": operator["name"], "count": 0})
+        entry["count"] += 1
+
+    amenities = _counts(
+        amenity for d in matching_except("amenities") for amenity in set(d["bus"]["amenities"] or ())
+    )
+    windows = _counts(departure_window(d["departure_time"]) for d in matching_except("departure_windows"))
+
+    # The price slider spans every departure the other filters allow
+    prices = [d["base_price"] for d in matching_except("price")]
+
+    return {
+        "bus_types": [
+            {"value": value, "label": value, "count": count}
+            for value, count in sorted(bus_types.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "operators": sorted(operators.values(), key=lambda entry: (-entry["count"], entry["label"])),
+        "amenities": [
+            {"value": value, "label": value, "count": count}
+            for value, count in sorted(amenities.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "departure_windows": [
+            {"value": value, "label": label, "count": windows.get(value, 0)}
+            for value, label, _, _ in DEPARTURE_WINDOWS
+        ],
+        "price_range": {"min": min(prices), "max": max(prices)} if prices else None,
+    }
+
+
+def faceted_search(departures: List[dict], filters) -> dict:
+    """
+    Filter, facet, sort and page BusScheduleResponse-shaped departures.
+    filters is a BusSearchFilters.
+    """
+    predicates = _predicates(filters)
+    matching = [d for d in departures if all(check(d) for check in predicates.values())]
+    matching.sort(key=SORT_KEYS[filters.sort_by], reverse=filters.sort_order == "desc")
+
+    start = (filters.page - 1) * filters.page_size
+    return {
+        "total": len(matching),
+        "page": filters.page,
+        "page_size": filters.page_size,
+        "results": matching[start:start + filters.page_size],
+        "facets": _facets(departures, predicates),
+    }
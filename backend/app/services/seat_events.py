@@ -0,0 +1,219 @@
+"""
+Real-time seat map updates.
+Writes that change a departure's seats record a small delta on the session
+(record_seat_change). Once the transaction commits the deltas are published
+to the broker, which fans each one out to every WebSocket subscribed to that
+departure. A message is encoded to JSON once, however many subscribers get it.
+
+The in-process broker only reaches subscribers connected to the same worker.
+With several workers, set SEAT_EVENTS_REDIS_URL: deltas then go through a
+Redis channel and every worker fans them out to its own subscribers.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+
+QUEUE_SIZE = 256
+
+# Sent instead of the backlog when a subscriber falls too far behind
+RESYNC = orjson.dumps({"type": "resync"}).decode()
+
+
+class Subscription:
+    """One subscriber's queue of encoded messages, owned by its event loop."""
+
+    def __init__(self, schedule_id: int, loop: asyncio.AbstractEventLoop, maxsize: int = QUEUE_SIZE):
+        self.schedule_id = schedule_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+    def deliver(self, payload: str):
+        """Queue a message; must run on the subscription's loop."""
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog and make it refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class InMemoryBroker:
+    """Fans seat map messages out to subscribers in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, schedule_id: int) -> Subscription:
+        """Subscribe from a running event loop."""
+        subscription = Subscription(schedule_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(schedule_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.schedule_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.schedule_id]
+
+    def subscriber_count(self, schedule_id: Optional[int] = None) -> int:
+        with self._lock:
+            if schedule_id is not None:
+                return len(self._subscribers.get(schedule_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, schedule_id: int, message: dict):
+        """Publish a message; safe to call from any thread."""
+        self.fan_out(schedule_id, orjson.dumps(message).decode())
+
+    def fan_out(self, schedule_id: int, payload: str):
+        with self._lock:
+            subscribers = list(self._subscribers.get(schedule_id, ()))
+        if not subscribers:
+            return
+
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        # One hop per event loop rather than per subscriber
+        for loop, group in by_loop.items():
+            if loop is current:
+                _deliver_all(group, payload)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver_all, group, payload)
+
+    def is_listening(self) -> bool:
+        """Whether messages published by other workers are still being received."""
+        return True
+
+    def close(self):
+        pass
+
+
+def _deliver_all(subscriptions: List[Subscription], payload: str):
+    for subscription in subscriptions:
+        subscription.deliver(payload)
+
+
+class RedisBroker(InMemoryBroker):
+    """Publishes through Redis so subscribers on every worker get each message."""
+
+    CHANNEL_PREFIX = "seatmap:"
+
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SEAT_EVENTS_REDIS_URL is set but the redis package is not installed")
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        self._thread = threading.Thread(target=self._listen, daemon=True)
+        self._thread.start()
+
+    def publish(self, schedule_id: int, message: dict):
+        self._redis.publish(f"{self.CHANNEL_PREFIX}{schedule_id}", orjson.dumps(message))
+
+    def is_listening(self) -> bool:
+        return self._thread.is_alive()
+
+    def _listen(self):
+        for message in self._pubsub.listen():
+            channel = message["channel"].decode()
+            try:
+                schedule_id = int(channel[len(self.CHANNEL_PREFIX):])
+            except ValueError:
+                continue
+            self.fan_out(schedule_id, message["data"].decode())
+
+    def close(self):
+        self._pubsub.close()
+        self._redis.close()
+
+
+_broker: Optional[InMemoryBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InMemoryBroker:
+    """Get the process-wide seat map broker."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = get_settings().seat_events_redis_url
+                _broker = RedisBroker(url) if url else InMemoryBroker()
+    return _broker
+
+
+def broker_status() -> dict:
+    """Broker state for health probes; does not start the broker."""
+    broker = _broker
+    if broker is None:
+        return {"status": "ok", "detail": "not started"}
+    return {
+        "status": "ok" if broker.is_listening() else "down",
+        "backend": "redis" if isinstance(broker, RedisBroker) else "memory",
+        "subscribers": broker.subscriber_count(),
+    }
+
+
+def record_seat_change(
+    db: Session,
+    schedule_id: int,
+    version: int,
+    available_seats: int,
+    taken: Iterable[int] = (),
+    released: Iterable[int] = (),
+    status: Optional[str] = None
+):
+    """Queue a seat map delta, published only if the session commits."""
+    message = {
+        "type": "seats",
+        "schedule_id": schedule_id,
+        "version": version,
+        "available_seats": available_seats,
+        "taken": list(taken),
+        "released": list(released),
+    }
+    if status is not None:
+        message["status"] = status
+    db.info.setdefault("seat_events", []).append(message)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    messages = session.info.pop("seat_events", None)
+    if not messages:
+        return
+    broker = get_broker()
+    for message in messages:
+        try:
+            broker.publish(message["schedule_id"], message)
+        except Exception as e:
+            print(f"Seat map publish failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("seat_events", None)
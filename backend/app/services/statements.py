@@ -0,0 +1,178 @@
+"""
+Wallet statements.
+Balances and movements are answered from the monthly WalletSnapshot rows the
+ledger maintains, plus a bounded scan of Transaction rows for the partial
+months at either end of the requested range. Migration m009 backfilled
+snapshots for history recorded before they existed.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from ..models.wallet import Wallet, Transaction, WalletSnapshot
+from .ledger import period_start
+
+
+def _at_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _next_period(period: date) -> date:
+    return (period + timedelta(days=32)).replace(day=1)
+
+
+def _ledger_totals(db: Session, wallet_id: int, start: Optional[datetime], end: datetime) -> Tuple[int, int, int]:
+    """(credits, debits, count) of raw postings in [start, end), or everything before end without a start."""
+    query = db.query(
+        func.coalesce(func.sum(case((Transaction.type == "credit", Transaction.amount_paise), else_=0)), 0),
+        func.coalesce(func.sum(case((Transaction.type == "debit", Transaction.amount_paise), else_=0)), 0),
+        func.count(Transaction.id)
+    ).filter(
+        Transaction.wallet_id == wallet_id,
+        Transaction.created_at < end
+    )
+    if start is not None:
+        query = query.filter(Transaction.created_at >= start)
+    credits, debits, count = query.one()
+    return int(credits), int(debits), int(count)
+
+
+def balance_at(db: Session, wallet_id: int, moment: datetime) -> int:
+    """Wallet balance in paise just before `moment`."""
+    period = period_start(moment)
+    snapshot = db.query(WalletSnapshot).filter(
+        WalletSnapshot.wallet_id == wallet_id,
+        WalletSnapshot.period_start <= period
+    ).order_by(WalletSnapshot.period_start.desc()).first()
+
+    if snapshot is None:
+        # Usually no history yet; otherwise postings that predate their
+        # snapshots (until reconcile_ledger --fix), so sum the ledger
+        credits, debits, _ = _ledger_totals(db, wallet_id, None, moment)
+        return credits - debits
+    if snapshot.period_start < period:
+        # No activity yet this month
+        return snapshot.closing_paise
+
+    credits, debits, _ = _ledger_totals(db, wallet_id, _at_midnight(period), moment)
+    return snapshot.opening_paise + credits - debits
+
+
+def movements(db: Session, wallet_id: int, start: datetime, end: datetime) -> Tuple[int, int, int]:
+    """(credits, debits, count) in [start, end), using snapshots for whole months."""
+    first_full = period_start(start)
+    if _at_midnight(first_full) < start:
+        first_full = _next_period(first_full)
+    last_full_end = period_start(end)
+
+    if first_full >= last_full_end:
+        return _ledger_totals(db, wallet_id, start, end)
+
+    credits, debits, count = db.query(
+        func.coalesce(func.sum(WalletSnapshot.credits_paise), 0),
+        func.coalesce(func.sum(WalletSnapshot.debits_paise), 0),
+        func.coalesce(func.sum(WalletSnapshot.transaction_count), 0)
+    ).filter(
+        WalletSnapshot.wallet_id == wallet_id,
+        WalletSnapshot.period_start >= first_full,
+        WalletSnapshot.period_start < last_full_end
+    ).one()
+    totals = [int(credits), int(debits), int(count)]
+
+    for edge_start, edge_end in ((start, _at_midnight(first_full)), (_at_midnight(last_full_end), end)):
+        if edge_start < edge_end:
+            for i, value in enumerate(_ledger_totals(db, wallet_id, edge_start, edge_end)):
+                totals[i] += value
+    return tuple(totals)
+
+
+def build_statement(db: Session, wallet: Wallet, start_date: date, end_date: date) -> dict:
+    """Opening/closing balance and movements for the days start_date..end_date inclusive."""
+    start = _at_midnight(start_date)
+    end = _at_midnight(end_date + timedelta(days=1))
+    credits, debits, count = movements(db, wallet.id, start, end)
+
+    return {
+        "wallet_id": wallet.id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "opening_balance": balance_at(db, wallet.id, start) / 100,
+        "closing_balance": balance_at(db, wallet.id, end) / 100,
+        "total_credits": credits / 100,
+        "total_debits": debits / 100,
+        "transaction_count": count,
+    }
+
+
+def _periods_from_ledger(db: Session, wallet_id: int) -> Dict[date, dict]:
+    """Recompute every monthly snapshot by replaying the raw ledger in order."""
+    periods: Dict[date, dict] = {}
+    balance = 0
+    rows = db.query(
+        Transaction.created_at, Transaction.type, Transaction.amount_paise
+    ).filter(
+        Transaction.wallet_id == wallet_id
+    ).order_by(Transaction.created_at, Transaction.id).yield_per(5000)
+
+    for created_at, type_, amount_paise in rows:
+        period = period_start(created_at)
+        if period not in periods:
+            periods[period] = {
+                "opening_paise": balance,
+                "credits_paise": 0,
+                "debits_paise": 0,
+                "transaction_count": 0,
+            }
+        snapshot = periods[period]
+        if type_ == "credit":
+            snapshot["credits_paise"] += amount_paise
+            balance += amount_paise
+        else:
+            snapshot["debits_paise"] += amount_paise
+            balance -= amount_paise
+        snapshot["transaction_count"] += 1
+        snapshot["closing_paise"] = balance
+    return periods
+
+
+def verify_snapshots(db: Session, wallet_id: int) -> List[str]:
+    """Compare a wallet's snapshots with the raw ledger; returns a list of mismatches."""
+    expected = _periods_from_ledger(db, wallet_id)
+    stored = {
+        s.period_start: s
+        for s in db.query(WalletSnapshot).filter(WalletSnapshot.wallet_id == wallet_id)
+    }
+
+    problems = []
+    for period in sorted(set(expected) | set(stored)):
+        if period not in stored:
+            problems.append(f"{period}: missing snapshot")
+            continue
+        if period not in expected:
+            problems.append(f"{period}: snapshot has no transactions")
+            continue
+        for field, value in expected[period].items():
+            if getattr(stored[period], field) != value:
+                problems.append(f"{period}: {field} is {getattr(stored[period], field)}, ledger says {value}")
+
+    balance = db.query(Wallet.balance_paise).filter(Wallet.id == wallet_id).scalar()
+    latest = expected[max(expected)]["closing_paise"] if expected else 0
+    if balance != latest:
+        problems.append(f"wallet balance is {balance}, ledger says {latest}")
+    return problems
+
+
+def rebuild_snapshots(db: Session, wallet_id: int):
+    """Replace a wallet's snapshots with ones recomputed from the ledger. The caller commits."""
+    # Hold the wallet row so no posting lands mid-rebuild
+    db.query(Wallet).filter(Wallet.id == wallet_id).with_for_update().one()
+    expected = _periods_from_ledger(db, wallet_id)
+
+    db.query(WalletSnapshot).filter(WalletSnapshot.wallet_id == wallet_id).delete(synchronize_session=False)
+    db.add_all([
+        WalletSnapshot(wallet_id=wallet_id, period_start=period, **values)
+        for period, values in expected.items()
+    ])
@@ -0,0 +1,265 @@
+"""
+Admin dashboard statistics.
+The full set of numbers is computed at most once per refresh interval and
+served from memory in between. Inserts, deletes and cancellations committed
+through the ORM are folded into the cached counters as they happen, and a
+stale snapshot is refreshed in the background while the old one is served.
+Set-based UPDATE/DELETE statements bypass the ORM events; the next refresh
+picks those up.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models.user import User
+from ..models.bus import Bus, Route, BusSchedule
+from ..models.booking import Booking
+
+# Bookings that count towards revenue
+PAID_STATUSES = ("confirmed", "completed")
+
+SERIES_DAYS = 14
+OCCUPANCY_WINDOW_DAYS = 7
+
+_COUNTED = {User: "users", Bus: "buses", Route: "routes", Booking: "bookings"}
+
+
+def compute_stats(db: Session, today: Optional[date] = None) -> dict:
+    """Compute every dashboard number from the database."""
+    today = today or date.today()
+    counts = {name: db.query(func.count(model.id)).scalar() for model, name in _COUNTED.items()}
+
+    revenue = db.query(func.coalesce(func.sum(Booking.total_amount), 0)).filter(
+        Booking.status.in_(PAID_STATUSES)
+    ).scalar()
+
+    # Booked vs offered seats on departures in the coming week
+    seats_total, seats_free = db.query(
+        func.coalesce(func.sum(Bus.total_seats), 0),
+        func.coalesce(func.sum(BusSchedule.available_seats), 0)
+    ).join(Bus, Bus.id == BusSchedule.bus_id).filter(
+        BusSchedule.travel_date >= today,
+        BusSchedule.travel_date < today + timedelta(days=OCCUPANCY_WINDOW_DAYS),
+        BusSchedule.status != "cancelled"
+    ).one()
+
+    first_day = today - timedelta(days=SERIES_DAYS - 1)
+    booked_on = func.date(Booking.booked_at)
+    rows = db.query(
+        booked_on,
+        func.count(Booking.id),
+        func.coalesce(func.sum(Booking.total_amount), 0)
+    ).filter(
+        Booking.booked_at >= datetime(first_day.year, first_day.month, first_day.day),
+        Booking.status.in_(PAID_STATUSES)
+    ).group_by(booked_on).all()
+    per_day = {str(day): (count, float(amount)) for day, count, amount in rows}
+
+    return {
+        **counts,
+        "revenue": float(revenue),
+        "occupancy": {
+            "window_days": OCCUPANCY_WINDOW_DAYS,
+            "seats_total": int(seats_total),
+            "seats_booked": int(seats_total) - int(seats_free),
+        },
+        "bookings_per_day": [
+            {
+                "date": str(day),
+                "bookings": per_day.get(str(day), (0, 0.0))[0],
+                "revenue": per_day.get(str(day), (0, 0.0))[1],
+            }
+            for day in (first_day + timedelta(days=i) for i in range(SERIES_DAYS))
+        ],
+    }
+
+
+class DashboardStats:
+    """Cached dashboard snapshot plus counters applied since it was taken."""
+
+    def __init__(self, refresh_seconds: float = 60.0):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[dict] = None
+        self._taken_at = 0.0
+        self._generated_at: Optional[datetime] = None
+        self._deltas: Counter = Counter()
+        self._refreshing = False
+        self._refresh_started = 0.0
+
+    def get(self, db: Session) -> dict:
+        """Dashboard stats; computed inline only the first time."""
+        with self._lock:
+            snapshot = self._snapshot
+            stale = time.monotonic() - self._taken_at > self.refresh_seconds
+
+        if snapshot is None:
+            self.refresh(db)
+        elif stale:
+            self._refresh_in_background()
+        return self._view()
+
+    def refresh(self, db: Session):
+        """Recompute the snapshot now."""
+        # Deltas from here on are not part of the new snapshot. A commit racing
+        # the queries below may be counted twice until the next refresh.
+        with self._lock:
+            self._deltas.clear()
+        snapshot = compute_stats(db)
+        with self._lock:
+            self._snapshot = snapshot
+            self._taken_at = time.monotonic()
+            self._generated_at = datetime.now(timezone.utc)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._refresh_started = time.monotonic()
+
+        def run():
+            db = SessionLocal()
+            try:
+                self.refresh(db)
+            except Exception as e:
+                print(f"Dashboard stats refresh failed: {e}")
+            finally:
+                db.close()
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def apply(self, deltas: Counter):
+        """Fold committed changes into the cached counters."""
+        with self._lock:
+            if self._snapshot is not None:
+                self._deltas.update(deltas)
+
+    def status(self) -> dict:
+        """Snapshot age and how long a background refresh has been running (for health probes)."""
+        with self._lock:
+            return {
+                "age_seconds": (
+                    round((datetime.now(timezone.utc) - self._generated_at).total_seconds(), 1)
+                    if self._generated_at else None
+                ),
+                "refresh_seconds": self.refresh_seconds,
+                "refreshing_for_seconds": (
+                    round(time.monotonic() - self._refresh_started, 1) if self._refreshing else None
+                ),
+            }
+
+    def invalidate(self):
+        """Force a recompute on the next read."""
+        with self._lock:
+            self._taken_at = 0.0
+
+    def _view(self) -> dict:
+        with self._lock:
+            snapshot = self._snapshot
+            deltas = dict(self._deltas)
+            generated_at = self._generated_at
+            updated_at = self._generated_at + timedelta(seconds=time.monotonic() - self._taken_at)
+
+        view = {name: snapshot[name] + deltas.get(name, 0) for name in _COUNTED.values()}
+        view["revenue"] = round(snapshot["revenue"] + deltas.get("revenue_paise", 0) / 100, 2)
+
+        occupancy = dict(snapshot["occupancy"])
+        occupancy["percent"] = (
+            round(100 * occupancy["seats_booked"] / occupancy["seats_total"], 1)
+            if occupancy["seats_total"] else 0.0
+        )
+        view["occupancy"] = occupancy
+
+        series = [dict(day) for day in snapshot["bookings_per_day"]]
+        for day in series:
+            day["bookings"] += deltas.get(f"day:{day['date']}:bookings", 0)
+            day["revenue"] = round(day["revenue"] + deltas.get(f"day:{day['date']}:revenue_paise", 0) / 100, 2)
+        view["bookings_per_day"] = series
+
+        view["generated_at"] = generated_at.isoformat()
+        view["as_of"] = updated_at.isoformat()  # Counters include changes up to here
+        return view
+
+
+_stats: Optional[DashboardStats] = None
+
+
+def get_dashboard_stats() -> DashboardStats:
+    """Get the process-wide dashboard stats cache."""
+    global _stats
+    if _stats is None:
+        _stats = DashboardStats(refresh_seconds=get_settings().admin_stats_refresh_seconds)
+    return _stats
+
+
+# Incremental counters: collect changes per session, apply them on commit
+
+def _pending(session: Session) -> Counter:
+    return session.info.setdefault("dashboard_stats", Counter())
+
+
+def _booking_revenue(session: Session, booking: Booking, sign: int):
+    record_booking_revenue(session, booking.total_amount, booking.booked_at, sign)
+
+
+def record_booking_revenue(session: Session, total_amount: float, booked_at: Optional[datetime], sign: int):
+    """
+    Count a paid booking in (sign=1) or out of (sign=-1) the dashboard revenue
+    once the session commits. For status changes made with UPDATE statements,
+    which the flush hooks below cannot see.
+    """
+    pending = _pending(session)
+    amount = round((total_amount or 0) * 100) * sign
+    pending["revenue_paise"] += amount
+    booked_on = str((booked_at or datetime.now(timezone.utc)).date())
+    pending[f"day:{booked_on}:bookings"] += sign
+    pending[f"day:{booked_on}:revenue_paise"] += amount
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    for obj in session.new:
+        name = _COUNTED.get(type(obj))
+        if name:
+            _pending(session)[name] += 1
+            if isinstance(obj, Booking) and obj.status in PAID_STATUSES + (None,):
+                _booking_revenue(session, obj, 1)
+
+    for obj in session.deleted:
+        name = _COUNTED.get(type(obj))
+        if name:
+            _pending(session)[name] -= 1
+            if isinstance(obj, Booking) and obj.status in PAID_STATUSES:
+                _booking_revenue(session, obj, -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Booking):
+            history = inspect(obj).attrs.status.history
+            if history.has_changes() and history.deleted:
+                was_paid = history.deleted[0] in PAID_STATUSES
+                is_paid = obj.status in PAID_STATUSES
+                if was_paid != is_paid:
+                    _booking_revenue(session, obj, 1 if is_paid else -1)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session):
+    pending = session.info.pop("dashboard_stats", None)
+    if pending:
+        get_dashboard_stats().apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("dashboard_stats", None)
@@ -1,6 +1,7 @@
 # Utils package
 from .security import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token
 from .dependencies import get_current_user, oauth2_scheme
+from .http_client import get_http_client
 
 __all__ = [
     "verify_password",
@@ -10,4 +11,5 @@ __all__ = [
     "decode_token",
     "get_current_user",
     "oauth2_scheme",
+    "get_http_client",
 ]
@@ -0,0 +1,181 @@
+"""
+Streaming helpers for voice-note uploads.
+Audio is passed through as bounded chunks, optionally downmixed to 16kHz mono
+with ffmpeg, and re-framed as multipart/form-data for the upstream transcriber,
+so no request ever holds a whole voice note in memory.
+"""
+
+import asyncio
+import shutil
+import uuid
+from typing import AsyncIterator, Dict, Iterable
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Audio file too large. Maximum size is {max_bytes / (1024 * 1024):.1f} MB.")
+        self.max_bytes = max_bytes
+
+
+class AudioConversionError(Exception):
+    """Raised when ffmpeg cannot decode the uploaded audio."""
+
+
+async def iter_upload(file: UploadFile, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield an uploaded file in fixed-size chunks."""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def replay_upload(file: UploadFile, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield a spooled upload from the start, so each call replays the whole file."""
+    await file.seek(0)
+    async for chunk in iter_upload(file, chunk_size):
+        yield chunk
+
+
+async def limit_stream(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Pass chunks through, raising AudioTooLarge once max_bytes is exceeded."""
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise AudioTooLarge(max_bytes)
+        yield chunk
+
+
+def ffmpeg_available() -> bool:
+    """Whether server-side resampling can run on this host."""
+    return shutil.which("ffmpeg") is not None
+
+
+async def downmix_16k_mono(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Re-encode audio to 16kHz mono FLAC through an ffmpeg pipe.
+    Whisper resamples to 16kHz mono internally, so this only shrinks the
+    payload. Input must be decodable from a pipe (wav, ogg, webm, faststart m4a).
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-ac", "1", "-ar", "16000", "-f", "flac", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    async def feed():
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            if not process.stdin.is_closing():
+                process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            chunk = await process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        # Surface errors from the input side (e.g. AudioTooLarge)
+        await feeder
+        stderr = await process.stderr.read()
+        if await process.wait() != 0:
+            raise AudioConversionError(f"Could not decode audio: {stderr.decode(errors='ignore')[:200]}")
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+async def multipart_stream(
+    fields: Dict[str, str],
+    file_field: str,
+    filename: str,
+    content_type: str,
+    chunks: AsyncIterator[bytes],
+    boundary: str
+) -> AsyncIterator[bytes]:
+    """Frame form fields plus a streamed file as a multipart/form-data body."""
+    # filename and content_type come from the client; keep them inside their header
+    filename = _header_value(filename)
+    content_type = _header_value(content_type)
+    for name, value in fields.items():
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode()
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    async for chunk in chunks:
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def _header_value(value: str) -> str:
+    return "".join(c for c in value if c not in '"\\\r\n' and c.isprintable())
+
+
+def new_boundary() -> str:
+    """Random multipart boundary."""
+    return uuid.uuid4().hex
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware enforcing a hard body size limit on upload routes.
+    Multipart bodies are parsed (and spooled) before the route handler runs,
+    so the limit has to be applied while the body is being received.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        detail = str(AudioTooLarge(self.max_bytes))
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                response = JSONResponse({"detail": detail}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Re-raised by FastAPI's body parsing and rendered by the exception handler
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,92 @@
+"""
+Small caches: an in-process TTL/LRU cache, and a Redis-backed one with the
+same interface for values that should be shared by every worker.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import orjson
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisTTLCache:
+    """TTLCache interface over Redis, for JSON-serializable values shared across workers."""
+
+    def __init__(self, url: str, namespace: str, ttl: float = 60.0):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SHARED_CACHE_REDIS_URL is set but the redis package is not installed")
+        self._redis = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        data = self._redis.get(self._key(key))
+        return orjson.loads(data) if data is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        seconds = max(1, int(ttl if ttl is not None else self.ttl))
+        self._redis.set(self._key(key), orjson.dumps(value), ex=seconds)
+
+    def pop(self, key: Hashable):
+        self._redis.delete(self._key(key))
+
+
+def shared_cache(namespace: str, maxsize: int = 1024, ttl: float = 60.0):
+    """
+    A cache shared by all workers when SHARED_CACHE_REDIS_URL is set,
+    otherwise a per-process TTLCache (entries then only leave other workers
+    by expiring).
+    """
+    from ..config import get_settings
+
+    url = get_settings().shared_cache_redis_url
+    if url:
+        return RedisTTLCache(url, namespace, ttl=ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,36 @@
+"""
+Conditional GET helpers.
+Responses carry a weak ETag derived from a row version, so a client that
+sends it back in If-None-Match gets a bodyless 304 when nothing changed,
+answered from the version alone.
+"""
+
+from fastapi import Request, Response
+
+# Clients may keep the body but must revalidate before reusing it
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(kind: str, key: int, version: int) -> str:
+    return f'W/"{kind}-{key}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of the request's If-None-Match against an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    wanted = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == wanted:
+            return True
+    return False
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,75 @@
+"""
+Per-request database time accounting.
+Engine events add each statement's duration to the timer active in the current
+context (which the threadpool copies), so a handler can report how much of its
+latency was spent in the database.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class DBTimer:
+    """Accumulated statement count and time for one unit of work."""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.seconds = 0.0
+
+    @property
+    def milliseconds(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+    def server_timing(self) -> str:
+        """Value for a Server-Timing response header."""
+        return f'db;dur={self.milliseconds};desc="{self.statements} statements, {self.commits} commits"'
+
+
+_current_timer: ContextVar[Optional[DBTimer]] = ContextVar("db_timer", default=None)
+
+
+@contextmanager
+def track_db_time(timer: Optional[DBTimer] = None):
+    """
+    Collect DB time for every statement executed inside the block.
+    Pass an existing timer to accumulate several blocks into one total.
+    """
+    timer = timer or DBTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements on one connection run sequentially, so a single slot suffices
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_start", None)
+    timer = _current_timer.get()
+    if timer is not None and started is not None:
+        timer.statements += 1
+        timer.seconds += time.perf_counter() - started
+
+
+def _commit(conn):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.commits += 1
+
+
+def install_db_timing(engine: Engine):
+    """Attach the timing listeners to an engine (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "commit", _commit)
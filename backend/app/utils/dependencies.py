@@ -1,9 +1,13 @@
+import json
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models.user import User
+from ..services.idempotency import IdempotencyClaim, IdempotencyKeyReused, IdempotencyInProgress, claim_async
 from .security import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -54,3 +58,59 @@ async def get_current_user_optional(
         return await get_current_user(token, db)
     except HTTPException:
         return None
+
+
+def idempotency(scope: str):
+    """
+    Dependency honouring an Idempotency-Key header on a write endpoint.
+    Yields an IdempotencyClaim: replay it if it already holds a response,
+    otherwise call claim.complete(db, response) before committing. 4xx errors
+    are stored too; anything else frees the key for another attempt.
+    """
+    async def dependency(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None, max_length=255),
+        current_user: User = Depends(get_current_user)
+    ):
+        body = await request.body()
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = body.decode(errors="replace")
+
+        try:
+            claim = await claim_async(
+                current_user.id,
+                idempotency_key,
+                scope,
+                {"path": request.url.path, "body": payload}
+            )
+        except IdempotencyKeyReused as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        except IdempotencyInProgress as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+        try:
+            yield claim
+        except HTTPException as e:
+            if e.status_code < 500:
+                await run_in_threadpool(claim.complete_now, {"detail": e.detail}, e.status_code)
+            else:
+                await run_in_threadpool(claim.release)
+            raise
+        except Exception:
+            await run_in_threadpool(claim.release)
+            raise
+        else:
+            await run_in_threadpool(claim.release)
+
+    return dependency
+
+
+def replay_response(claim: IdempotencyClaim) -> JSONResponse:
+    """The stored response for a repeated Idempotency-Key."""
+    return JSONResponse(
+        content=claim.replay_body,
+        status_code=claim.replay_code,
+        headers={"Idempotent-Replayed": "true"}
+    )
@@ -0,0 +1,179 @@
+"""
+Shared outbound HTTP client.
+One connection-pooled HTTP/2 client per process, opened and closed by the app
+lifespan, with jittered retries on 5xx responses and per-call latency metrics.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+# Upstream statuses worth retrying; anything else is returned to the caller
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+class CallMetrics:
+    """Rolling latency and error counters for one named outbound call."""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.latencies.append(seconds)
+        if error:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {"count": self.count, "errors": self.errors, "retries": self.retries}
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+            "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+        }
+
+
+class OutboundClient:
+    """Process-wide pooled HTTP client for calls to third-party APIs."""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout: float = 60.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+        self._metrics: Dict[str, CallMetrics] = {}
+
+    async def start(self):
+        """Open the connection pool (called from the app lifespan)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(http2=True, limits=self.limits, timeout=self.timeout)
+
+    async def close(self):
+        """Close the connection pools."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Scripts and test transports may not run the lifespan, so open lazily
+        if self._client is None:
+            self._client = httpx.AsyncClient(http2=True, limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        """
+        Pooled blocking client for SDKs that make synchronous calls (e.g. the
+        Groq chat model used by the agent). Latency is recorded per host.
+        """
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                http2=True,
+                limits=self.limits,
+                timeout=self.timeout,
+                event_hooks={
+                    "request": [self._stamp_request],
+                    "response": [self._record_response],
+                }
+            )
+        return self._sync_client
+
+    def _stamp_request(self, request: httpx.Request):
+        request.extensions["started_at"] = time.perf_counter()
+
+    def _record_response(self, response: httpx.Response):
+        started_at = response.request.extensions.get("started_at")
+        if started_at is not None:
+            self._metric(response.request.url.host).record(
+                time.perf_counter() - started_at,
+                error=response.status_code >= 500
+            )
+
+    def _metric(self, name: str) -> CallMetrics:
+        if name not in self._metrics:
+            self._metrics[name] = CallMetrics()
+        return self._metrics[name]
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        name: str,
+        retry: bool = True,
+        content_factory: Optional[Callable[[], Any]] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request through the shared pool.
+        Retries 5xx responses and connection errors with full-jitter exponential
+        backoff. Timeouts are not retried since the upstream may still be working.
+        A streamed body can only be retried if it can be produced again: pass
+        content_factory (called for a fresh body before every attempt), or
+        retry=False for one-shot streams.
+        """
+        metric = self._metric(name)
+        max_retries = self.max_retries if retry else 0
+        attempt = 0
+        while True:
+            if content_factory is not None:
+                kwargs["content"] = content_factory()
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TimeoutException:
+                metric.record(time.perf_counter() - start, error=True)
+                raise
+            except httpx.TransportError:
+                metric.record(time.perf_counter() - start, error=True)
+                if attempt >= max_retries:
+                    raise
+            else:
+                failed = response.status_code in RETRY_STATUSES
+                metric.record(time.perf_counter() - start, error=failed)
+                if not failed or attempt >= max_retries:
+                    return response
+                await response.aclose()
+
+            attempt += 1
+            metric.retries += 1
+            await asyncio.sleep(random.uniform(0, self.backoff_base * (2 ** attempt)))
+
+    def metrics(self) -> dict:
+        """Latency and error snapshot per named call."""
+        return {name: m.snapshot() for name, m in self._metrics.items()}
+
+
+http_client = OutboundClient()
+
+
+def get_http_client() -> OutboundClient:
+    """Get the shared outbound HTTP client."""
+    return http_client
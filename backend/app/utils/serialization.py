@@ -0,0 +1,36 @@
+"""
+Response fast path for read-heavy endpoints.
+Handlers select exactly the columns their response schema declares and build
+plain dicts from the rows, which ORJSONResponse encodes directly. Returning a
+Response skips FastAPI's response_model validation, so a seat map is not
+validated into Pydantic models and then serialized again. The schemas still
+decide which columns are read and document the endpoint, so the payload
+keeps its shape.
+"""
+
+from functools import lru_cache
+from typing import List, Mapping, Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+
+@lru_cache(maxsize=None)
+def _scalar_fields(schema: Type[BaseModel], mapper) -> tuple:
+    column_names = set(mapper.column_attrs.keys())
+    return tuple(name for name in schema.model_fields if name in column_names)
+
+
+def scalar_fields(schema: Type[BaseModel], model) -> tuple:
+    """The schema's fields that are plain columns on the model (nested objects excluded)."""
+    return _scalar_fields(schema, inspect(model).mapper)
+
+
+def columns(schema: Type[BaseModel], model, prefix: str = "") -> List:
+    """Labelled columns for a select(); model may be an aliased class."""
+    return [getattr(model, name).label(prefix + name) for name in scalar_fields(schema, model)]
+
+
+def pick(row: Mapping, schema: Type[BaseModel], model, prefix: str = "") -> dict:
+    """The schema's scalar fields from a row selected with columns(schema, model, prefix)."""
+    return {name: row[prefix + name] for name in scalar_fields(schema, model)}
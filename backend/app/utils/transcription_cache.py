@@ -0,0 +1,142 @@
+"""
+Content-addressed cache for transcription results.
+Keyed by the SHA-256 of the audio bytes, so a retried voice note is answered
+from memory (or disk) instead of being re-sent to Whisper.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from ..config import get_settings
+
+
+class TranscriptionCache:
+    """LRU cache of {"text", "language"} results with optional on-disk persistence."""
+
+    # How often (in writes) to prune the on-disk store back to max_entries
+    PRUNE_EVERY = 100
+
+    def __init__(self, max_entries: int = 1000, persist_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key.replace(':', '_')}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Look up a result, promoting it to most recently used."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: dict):
+        """Store a result in memory and, if configured, on disk."""
+        with self._lock:
+            self._remember(key, result)
+            self._writes += 1
+            prune = self.persist_dir and self._writes % self.PRUNE_EVERY == 0
+        if self.persist_dir:
+            self._store(key, result)
+            if prune:
+                self._prune_disk()
+
+    def _remember(self, key: str, result: dict):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[dict]:
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                result = json.load(f)
+            # Touch so disk pruning also follows recency
+            os.utime(self._path(key))
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, result: dict):
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Transcription cache write failed: {e}")
+
+    def _prune_disk(self):
+        try:
+            paths = [
+                os.path.join(self.persist_dir, name)
+                for name in os.listdir(self.persist_dir)
+                if name.endswith(".json")
+            ]
+            if len(paths) <= self.max_entries:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_entries]:
+                os.remove(path)
+        except OSError as e:
+            print(f"Transcription cache prune failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+async def hashing_stream(chunks: AsyncIterator[bytes], hasher) -> AsyncIterator[bytes]:
+    """Pass chunks through while feeding them to a hashlib hasher."""
+    async for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+
+def cache_key(provider_name: str, digest: str) -> str:
+    """Results depend on the provider and resampling, so both are part of the key."""
+    resampled = "16k" if get_settings().audio_resample_16k_mono else "raw"
+    return f"{provider_name}:{resampled}:{digest}"
+
+
+def new_hasher():
+    return hashlib.sha256()
+
+
+_cache: Optional[TranscriptionCache] = None
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Get the process-wide transcription cache."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = TranscriptionCache(
+            max_entries=settings.transcription_cache_size,
+            persist_dir=settings.transcription_cache_dir or None
+        )
+    return _cache
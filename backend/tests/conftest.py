@@ -0,0 +1,71 @@
+"""
+Shared fixtures. Tests run against TEST_DATABASE_URL (default: a SQLite file
+in a temporary directory), migrated once per session and emptied after every
+test. DATABASE_URL is overridden so a developer's database is never touched.
+"""
+
+import os
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="bus-booking-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{_tmpdir}/test.db")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.migrations import migrate
+from app.models import User
+from app.utils.security import create_access_token
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    migrate(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    created = []
+
+    def make_user() -> User:
+        n = len(created) + 1
+        user = User(email=f"user{n}@example.com", phone=f"90000000{n:02d}", password_hash="x", full_name=f"User {n}")
+        db.add(user)
+        db.commit()
+        created.append(user)
+        return user
+
+    return make_user
+
+
+@pytest.fixture
+def auth_headers():
+    def auth_headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    return auth_headers
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager: the startup warm-ups are not needed here
+    return TestClient(app)
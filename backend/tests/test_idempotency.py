@@ -0,0 +1,181 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import IdempotencyKey, User, Wallet
+from app.services import idempotency
+from app.services.idempotency import IdempotencyInProgress, claim
+from app.utils.dependencies import idempotency as idempotency_dependency, replay_response
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _record(db, user_id: int, key: str):
+    db.expire_all()
+    return db.query(IdempotencyKey).filter_by(user_id=user_id, key=key).first()
+
+
+def test_completed_key_is_replayed(client, db, make_user, auth_headers):
+    user = make_user()
+    headers = {**auth_headers(user), "Idempotency-Key": "top-up-1"}
+
+    first = client.post("/wallet/add", json={"amount": 250}, headers=headers)
+    second = client.post("/wallet/add", json={"amount": 250}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert db.query(Wallet.balance_paise).filter(Wallet.user_id == user.id).scalar() == 25_000
+    assert _record(db, user.id, "top-up-1").status == "completed"
+
+
+def test_key_reused_with_a_different_body_is_rejected(client, db, make_user, auth_headers):
+    user = make_user()
+    headers = {**auth_headers(user), "Idempotency-Key": "top-up-2"}
+    assert client.post("/wallet/add", json={"amount": 100}, headers=headers).status_code == 200
+
+    response = client.post("/wallet/add", json={"amount": 900}, headers=headers)
+
+    assert response.status_code == 422
+    assert db.query(Wallet.balance_paise).filter(Wallet.user_id == user.id).scalar() == 10_000
+
+
+def test_keys_are_per_user(client, db, make_user, auth_headers):
+    alice, bob = make_user(), make_user()
+    for user in (alice, bob):
+        response = client.post(
+            "/wallet/add", json={"amount": 50}, headers={**auth_headers(user), "Idempotency-Key": "same"}
+        )
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+    assert db.query(Wallet.balance_paise).filter(Wallet.user_id == bob.id).scalar() == 5_000
+
+
+@pytest.fixture
+def outcomes():
+    """What each call to the test endpoint does, in order: an exception to raise or a response body."""
+    return []
+
+
+@pytest.fixture
+def endpoint_client(outcomes):
+    app = FastAPI()
+
+    @app.post("/charge")
+    async def charge(
+        claim: idempotency.IdempotencyClaim = Depends(idempotency_dependency("test.charge")),
+        db: Session = Depends(get_db)
+    ):
+        if claim.is_replay:
+            return replay_response(claim)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        claim.complete(db, outcome)
+        db.commit()
+        return outcome
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize("failure", [
+    HTTPException(status_code=503, detail="Upstream unavailable"),
+    RuntimeError("boom"),
+])
+def test_claim_is_released_on_server_errors(endpoint_client, outcomes, db, make_user, auth_headers, failure):
+    user = make_user()
+    headers = {**auth_headers(user), "Idempotency-Key": "charge-1"}
+    outcomes.extend([failure, {"charged": True}])
+
+    assert endpoint_client.post("/charge", json={}, headers=headers).status_code >= 500
+    assert _record(db, user.id, "charge-1") is None
+
+    retry = endpoint_client.post("/charge", json={}, headers=headers)
+    assert retry.status_code == 200
+    assert retry.json() == {"charged": True}
+    assert "Idempotent-Replayed" not in retry.headers
+
+
+def test_client_errors_are_stored_and_replayed(endpoint_client, outcomes, db, make_user, auth_headers):
+    user = make_user()
+    headers = {**auth_headers(user), "Idempotency-Key": "charge-2"}
+    outcomes.extend([HTTPException(status_code=400, detail="Seat taken"), {"charged": True}])
+
+    assert endpoint_client.post("/charge", json={}, headers=headers).status_code == 400
+    replay = endpoint_client.post("/charge", json={}, headers=headers)
+
+    assert replay.status_code == 400
+    assert replay.json() == {"detail": "Seat taken"}
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+    assert outcomes == [{"charged": True}]
+
+
+def test_unfinished_claim_blocks_until_lock_timeout_then_is_taken_over(db, make_user):
+    user = make_user()
+    first = claim(user.id, "slow", "test.charge", {"n": 1})
+    assert not first.is_replay
+
+    with pytest.raises(IdempotencyInProgress):
+        claim(user.id, "slow", "test.charge", {"n": 1}, wait=0)
+
+    # The holder died without committing or releasing
+    stale = datetime.now(timezone.utc) - idempotency.LOCK_TIMEOUT * 2
+    db.query(IdempotencyKey).filter_by(id=first.record_id).update({IdempotencyKey.locked_at: stale})
+    db.commit()
+
+    second = claim(user.id, "slow", "test.charge", {"n": 1}, wait=0)
+    assert second.record_id == first.record_id
+    assert not second.is_replay
+    assert _as_utc(_record(db, user.id, "slow").locked_at) > stale
+
+
+def test_claim_is_not_completed_when_the_commit_fails(db, make_user):
+    user = make_user()
+    held = claim(user.id, "fails", "test.charge", {"n": 1})
+
+    held.complete(db, {"charged": True})
+    # Something else in the same transaction fails at commit
+    db.add(User(email=user.email, phone="0000000000", password_hash="x", full_name="Duplicate"))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    assert not held.completed
+    assert _record(db, user.id, "fails").status == "in_progress"
+
+    held.release()
+    assert _record(db, user.id, "fails") is None
+    retry = claim(user.id, "fails", "test.charge", {"n": 1}, wait=0)
+    assert not retry.is_replay
+
+
+def test_claim_is_completed_once_the_commit_succeeds(db, make_user):
+    user = make_user()
+    held = claim(user.id, "works", "test.charge", {"n": 1})
+
+    held.complete(db, {"charged": True}, 201)
+    assert not held.completed
+    db.commit()
+    assert held.completed
+
+    # release() after a committed response keeps the stored outcome
+    held.release()
+    replay = claim(user.id, "works", "test.charge", {"n": 1}, wait=0)
+    assert (replay.replay_code, replay.replay_body) == (201, {"charged": True})
+
+
+def test_requests_without_a_key_are_not_tracked(db, make_user):
+    user = make_user()
+    untracked = claim(user.id, None, "test.charge", {"n": 1})
+
+    assert untracked.record_id is None and not untracked.is_replay
+    assert db.query(IdempotencyKey).count() == 0
@@ -0,0 +1,152 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import literal, select, union_all
+
+from app.database import SessionLocal
+from app.models import Transaction, Wallet, WalletSnapshot
+from app.services import ledger, statements
+from app.services.ledger import InsufficientBalance
+
+
+@pytest.fixture
+def wallet(db, make_user):
+    wallet = ledger.get_or_create_wallet(db, make_user().id)
+    db.commit()
+    return wallet
+
+
+def _balance(db, wallet_id: int) -> int:
+    db.expire_all()
+    return db.query(Wallet.balance_paise).filter(Wallet.id == wallet_id).scalar()
+
+
+def test_to_paise_rounds_half_up():
+    assert ledger.to_paise(10.005) == 1001
+    assert ledger.to_paise("0.1") == 10
+    assert ledger.to_paise(499.99) == 49999
+
+
+def test_credit_and_debit_update_balance_and_ledger(db, wallet):
+    ledger.credit(db, wallet.id, 10_000, "Top up")
+    ledger.debit(db, wallet.id, 2_550, "Booking payment", reference_id=7)
+    db.commit()
+
+    assert _balance(db, wallet.id) == 7_450
+    types = [t.type for t in db.query(Transaction).filter_by(wallet_id=wallet.id).order_by(Transaction.id)]
+    assert types == ["credit", "debit"]
+    assert ledger.reconcile_wallet(db, wallet.id)["consistent"]
+    assert statements.verify_snapshots(db, wallet.id) == []
+
+
+def test_debit_beyond_balance_is_refused(db, wallet):
+    ledger.credit(db, wallet.id, 500, "Top up")
+    db.commit()
+
+    with pytest.raises(InsufficientBalance):
+        ledger.debit(db, wallet.id, 501, "Booking payment")
+    db.rollback()
+
+    assert _balance(db, wallet.id) == 500
+    assert db.query(Transaction).filter_by(wallet_id=wallet.id).count() == 1
+
+
+@pytest.mark.parametrize("post", [ledger.credit, ledger.debit])
+def test_non_positive_amounts_are_rejected(db, wallet, post):
+    with pytest.raises(ValueError):
+        post(db, wallet.id, 0, "Nothing")
+
+
+def test_concurrent_debits_never_overdraw(db, wallet):
+    # Worker threads must not refresh the expired wallet through the test's session
+    wallet_id = wallet.id
+    ledger.credit(db, wallet_id, 1_000, "Top up")
+    db.commit()
+
+    def debit_once(_):
+        session = SessionLocal()
+        try:
+            ledger.debit(session, wallet_id, 100, "Booking payment")
+            session.commit()
+            return True
+        except InsufficientBalance:
+            session.rollback()
+            return False
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(debit_once, range(20)))
+
+    assert results.count(True) == 10
+    assert _balance(db, wallet_id) == 0
+    assert ledger.reconcile_wallet(db, wallet_id) == {
+        "wallet_id": wallet_id, "balance_paise": 0, "ledger_paise": 0, "consistent": True,
+    }
+
+
+def test_concurrent_credits_and_debits_match_the_ledger(db, wallet):
+    wallet_id = wallet.id
+    ledger.credit(db, wallet_id, 5_000, "Top up")
+    db.commit()
+    amounts = [(ledger.credit if i % 3 else ledger.debit, 100 + i) for i in range(30)]
+
+    def post(item):
+        post_fn, amount = item
+        session = SessionLocal()
+        try:
+            post_fn(session, wallet_id, amount, "Mixed")
+            session.commit()
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(post, amounts))
+
+    expected = 5_000 + sum(amount if post_fn is ledger.credit else -amount for post_fn, amount in amounts)
+    report = ledger.reconcile_wallet(db, wallet_id)
+    assert report["balance_paise"] == report["ledger_paise"] == expected
+    assert db.query(Wallet.transaction_count).filter(Wallet.id == wallet_id).scalar() == 31
+    assert statements.verify_snapshots(db, wallet_id) == []
+
+
+def test_credit_many_posts_one_transaction_per_row(db, make_user):
+    wallets = [ledger.get_or_create_wallet(db, make_user().id) for _ in range(2)]
+    db.commit()
+    postings = union_all(*[
+        select(
+            literal(w.id).label("wallet_id"),
+            literal(amount).label("amount_paise"),
+            literal("Refund").label("description"),
+            literal(None).label("reference_id"),
+        )
+        for w, amount in ((wallets[0], 300), (wallets[0], 200), (wallets[1], 150))
+    ])
+
+    assert ledger.credit_many(db, select(postings.subquery())) == 3
+    db.commit()
+
+    assert [_balance(db, w.id) for w in wallets] == [500, 150]
+    for w in wallets:
+        assert ledger.reconcile_wallet(db, w.id)["consistent"]
+        assert statements.verify_snapshots(db, w.id) == []
+
+
+def test_transactions_are_append_only(db, wallet):
+    transaction = ledger.credit(db, wallet.id, 100, "Top up")
+    db.commit()
+
+    transaction.amount_paise = 1_000_000
+    with pytest.raises(ValueError):
+        db.commit()
+    db.rollback()
+
+
+def test_balance_at_sums_the_ledger_without_snapshots(db, wallet):
+    ledger.credit(db, wallet.id, 700, "Top up")
+    db.commit()
+    db.query(WalletSnapshot).delete()
+    db.commit()
+
+    assert statements.balance_at(db, wallet.id, datetime.now(timezone.utc)) == 700
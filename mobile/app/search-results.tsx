@@ -23,25 +23,25 @@ export default function SearchResultsScreen() {
   const [error, setError] = useState<string | null>(null);
   const [sortBy, setSortBy] = useState<'price_asc' | 'price_desc' | null>(null);
   const [sortModalVisible, setSortModalVisible] = useState(false);
-
-  const sortedBuses = [...buses].sort((a, b) => {
-    if (sortBy === 'price_asc') return a.base_price - b.base_price;
-    if (sortBy === 'price_desc') return b.base_price - a.base_price;
-    return 0;
-  });
+  const [total, setTotal] = useState(0);
 
   useEffect(() => {
     searchBuses();
-  }, []);
+  }, [sortBy]);
 
+  // Sorting happens on the server
   const searchBuses = async () => {
     try {
-      const results = await busService.searchBuses({
+      const page = await busService.searchBusesFaceted({
         from_city: from,
         to_city: to,
         travel_date: date,
+        sort_by: sortBy ? 'price' : 'departure',
+        sort_order: sortBy === 'price_desc' ? 'desc' : 'asc',
+        page_size: 50,
       });
-      setBuses(results);
+      setBuses(page.results);
+      setTotal(page.total);
     } catch (err: any) {
       setError(err.response?.data?.detail || 'No buses found for this route');
     } finally {
@@ -162,7 +162,7 @@ export default function SearchResultsScreen() {
           <Text style={styles.routeTitle}>
             {from} → {to}
           </Text>
-          <Text style={styles.dateText}>{date} • {buses.length} buses found</Text>
+          <Text style={styles.dateText}>{date} • {total} buses found</Text>
         </View>
 
         <TouchableOpacity
@@ -178,7 +178,7 @@ export default function SearchResultsScreen() {
       </LinearGradient>
 
       <FlatList
-        data={sortedBuses}
+        data={buses}
         renderItem={renderBus}
         keyExtractor={(item) => item.id.toString()}
         contentContainerStyle={styles.listContent}
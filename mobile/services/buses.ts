@@ -1,5 +1,25 @@
 import api from './api';
-import { City, BusSchedule, BusSearchParams, Seat } from '../types';
+import { City, BusSchedule, BusSearchParams, BusSearchFilters, BusSearchPage, Seat } from '../types';
+
+// Last body and ETag per URL, so polling gets a bodyless 304 when nothing changed
+const etagCache = new Map<string, { etag: string; data: any }>();
+
+const getWithEtag = async <T>(url: string): Promise<T> => {
+  const cached = etagCache.get(url);
+  const response = await api.get<T>(url, {
+    headers: cached ? { 'If-None-Match': cached.etag } : undefined,
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+
+  if (response.status === 304 && cached) {
+    return cached.data as T;
+  }
+  const etag = response.headers['etag'];
+  if (etag) {
+    etagCache.set(url, { etag, data: response.data });
+  }
+  return response.data;
+};
 
 export const busService = {
   // Get list of cities
@@ -18,15 +38,19 @@ export const busService = {
     return response.data;
   },
 
+  // Search with server-side filters, sorting, paging and facet counts
+  searchBusesFaceted: async (params: BusSearchFilters): Promise<BusSearchPage> => {
+    const response = await api.post<BusSearchPage>('/buses/search/faceted', params);
+    return response.data;
+  },
+
   // Get bus schedule details with seats
   getBusDetails: async (scheduleId: number): Promise<BusSchedule> => {
-    const response = await api.get<BusSchedule>(`/buses/${scheduleId}`);
-    return response.data;
+    return getWithEtag<BusSchedule>(`/buses/${scheduleId}`);
   },
 
   // Get seats for a bus schedule
   getSeats: async (scheduleId: number): Promise<Seat[]> => {
-    const response = await api.get<Seat[]>(`/buses/${scheduleId}/seats`);
-    return response.data;
+    return getWithEtag<Seat[]>(`/buses/${scheduleId}/seats`);
   },
 };
@@ -156,6 +156,40 @@ export interface BusSearchParams {
   travel_date: string;
 }
 
+export interface BusSearchFilters extends BusSearchParams {
+  bus_types?: string[];
+  operator_ids?: number[];
+  amenities?: string[];
+  departure_windows?: ('early_morning' | 'morning' | 'afternoon' | 'evening')[];
+  min_price?: number;
+  max_price?: number;
+  min_seats?: number;
+  sort_by?: 'departure' | 'price' | 'rating' | 'duration' | 'seats';
+  sort_order?: 'asc' | 'desc';
+  page?: number;
+  page_size?: number;
+}
+
+export interface FacetCount {
+  value: string;
+  label: string;
+  count: number;
+}
+
+export interface BusSearchPage {
+  total: number;
+  page: number;
+  page_size: number;
+  results: BusSchedule[];
+  facets: {
+    bus_types: FacetCount[];
+    operators: FacetCount[];
+    amenities: FacetCount[];
+    departure_windows: FacetCount[];
+    price_range: { min: number; max: number } | null;
+  };
+}
+
 export interface BookingCreateParams {
   bus_schedule_id: number;
   passengers: Passenger[];